@@ -0,0 +1,142 @@
+"""Synthetic companies, branches and QR codes inserted in bulk.
+
+Rows get explicit sequential ids and deterministic hashes, so a run can
+address the n-th QR code without keeping a million hashes around:
+
+    python -m benchmarks.dataset --database-url sqlite+aiosqlite:///bench.db \
+        --companies 100000 --branches-per-company 3 --reset
+"""
+
+import argparse
+import asyncio
+import hashlib
+import time
+from typing import Iterator, List, Optional
+
+from sqlalchemy import func, insert, inspect, select
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from src.redirect_serv.apps.company.models import Company, CompanyBranch
+from src.redirect_serv.apps.qr_manager.models import QRCode
+from src.redirect_serv.models import Base
+from tests.fixtures.sqlite import adapt_table_for_sqlite
+
+SQLITE_MEMORY_URL = "sqlite+aiosqlite:///:memory:"
+
+
+def url_hash_for(n: int) -> str:
+    """Hash of the n-th (0-based) synthetic QR code"""
+    return hashlib.sha256(f"bench-{n}".encode()).hexdigest()
+
+
+def create_engine(database_url: str) -> AsyncEngine:
+    if database_url == SQLITE_MEMORY_URL:
+        return create_async_engine(
+            database_url,
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+        )
+    return create_async_engine(database_url)
+
+
+async def create_schema(engine: AsyncEngine, reset: bool = False) -> None:
+    """Create every model table; reset drops them first"""
+    tables = Base.metadata.sorted_tables
+    if engine.dialect.name == "sqlite":
+        for table in tables:
+            adapt_table_for_sqlite(table)
+
+    async with engine.begin() as conn:
+        if reset:
+            await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+
+def _chunks(total: int, chunk_size: int) -> Iterator[range]:
+    for start in range(0, total, chunk_size):
+        yield range(start, min(start + chunk_size, total))
+
+
+async def generate(
+    engine: AsyncEngine,
+    companies: int,
+    branches_per_company: int = 1,
+    chunk_size: int = 10000,
+) -> int:
+    """Insert the dataset with multi-row INSERTs, return the number of QR codes.
+
+    Every branch gets one QR code; company c owns branches
+    c * branches_per_company ... (c + 1) * branches_per_company - 1.
+    """
+    codes = companies * branches_per_company
+    async with engine.begin() as conn:
+        existing = await conn.scalar(select(func.count()).select_from(QRCode))
+        if existing:
+            raise RuntimeError(
+                f"qr_codes already holds {existing} rows, rerun with --reset"
+            )
+
+        for ids in _chunks(companies, chunk_size):
+            await conn.execute(
+                insert(Company.__table__),
+                [
+                    {"id": i + 1, "name": f"Company {i}", "subdomain": f"c{i}"}
+                    for i in ids
+                ],
+            )
+        for ids in _chunks(codes, chunk_size):
+            await conn.execute(
+                insert(CompanyBranch.__table__),
+                [
+                    {"id": i + 1, "company_id": i // branches_per_company + 1}
+                    for i in ids
+                ],
+            )
+            await conn.execute(
+                insert(QRCode.__table__),
+                [
+                    {
+                        "id": i + 1,
+                        "company_branch_id": i + 1,
+                        "url_hash": url_hash_for(i),
+                    }
+                    for i in ids
+                ],
+            )
+    return codes
+
+
+async def count_codes(engine: AsyncEngine) -> int:
+    async with engine.connect() as conn:
+        has_table = await conn.run_sync(
+            lambda sync_conn: inspect(sync_conn).has_table(QRCode.__tablename__)
+        )
+        if not has_table:
+            return 0
+        return await conn.scalar(select(func.count()).select_from(QRCode))
+
+
+async def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", required=True)
+    parser.add_argument("--companies", type=int, default=1000)
+    parser.add_argument("--branches-per-company", type=int, default=1)
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    parser.add_argument(
+        "--reset", action="store_true", help="drop and recreate all tables first"
+    )
+    args = parser.parse_args(argv)
+
+    engine = create_engine(args.database_url)
+    started = time.perf_counter()
+    await create_schema(engine, reset=args.reset)
+    codes = await generate(
+        engine, args.companies, args.branches_per_company, args.chunk_size
+    )
+    await engine.dispose()
+    print(f"Inserted {codes} QR codes in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,63 @@
+"""Compare /redirect/{hash} throughput with and without the raw ASGI fast path.
+
+Runs in-process against SQLite through httpx.ASGITransport, so the numbers
+reflect per-worker application overhead rather than network or Postgres cost.
+
+    python -m benchmarks.fast_redirect --requests 5000 --codes 100
+
+--write-behind queues scan counts in memory instead of committing per request,
+which isolates routing and response overhead from SQLite write cost. See
+benchmarks.redirect for the full load test.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+
+from benchmarks.dataset import (
+    SQLITE_MEMORY_URL,
+    create_engine,
+    create_schema,
+    generate,
+    url_hash_for,
+)
+from benchmarks.redirect import run_asgi
+from src.redirect_serv.apps.qr_manager.cache import redirect_cache
+from src.redirect_serv.apps.qr_manager.services import scan_count_aggregator
+
+
+async def main(requests: int, codes: int, write_behind: bool) -> None:
+    scan_count_aggregator.enabled = write_behind
+    engine = create_engine(SQLITE_MEMORY_URL)
+    await create_schema(engine)
+    await generate(engine, companies=1, branches_per_company=codes)
+
+    # Sequential requests, uniform popularity: the same mix for both variants
+    rng = random.Random(42)
+    paths = [f"/redirect/{url_hash_for(rng.randrange(codes))}" for _ in range(requests)]
+
+    baseline = await run_asgi(engine, paths, concurrency=1, fast_path=False)
+    redirect_cache.clear()
+    fast = await run_asgi(engine, paths, concurrency=1, fast_path=True)
+    await engine.dispose()
+
+    print(
+        json.dumps(
+            {
+                "fastapi": baseline,
+                "fast_path": fast,
+                "speedup": fast["rps"] / baseline["rps"],
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--codes", type=int, default=100)
+    parser.add_argument("--write-behind", action="store_true")
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.codes, args.write_behind))
@@ -0,0 +1,372 @@
+"""Load test /redirect/{hash} in-process and over a real uvicorn socket.
+
+Builds a synthetic dataset (see benchmarks.dataset), then replays requests
+whose hash popularity follows a Zipf distribution, first through
+httpx.ASGITransport and then through uvicorn on a loopback socket. Reports
+throughput, latency percentiles and DB statements per request as JSON and
+optionally compares them with a stored baseline:
+
+    python -m benchmarks.redirect --companies 1000 --requests 5000 \
+        --baseline benchmarks/baselines/sqlite.json
+
+SQLite is used by default (a temporary file, so the uvicorn thread can open
+it too); pass --database-url postgresql+asyncpg://... to run against
+Postgres. --reset is required when that database already has QR codes.
+SQLite serialises every scan write, so single requests can stall for
+seconds under concurrency; the client timeout (--timeout, 60s) is well
+above httpx's 5s default so such stalls land in the percentiles instead of
+aborting the run.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence
+
+import httpx
+import uvicorn
+from fastapi import FastAPI
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+from benchmarks.dataset import (
+    count_codes,
+    create_engine,
+    create_schema,
+    generate,
+    url_hash_for,
+)
+from src.redirect_serv.api.fast_redirect import RedirectFastPathMiddleware
+from src.redirect_serv.apps.qr_manager.cache import negative_cache, redirect_cache
+from src.redirect_serv.apps.qr_manager.services import scan_count_aggregator
+from src.redirect_serv.core.app import create_app
+from src.redirect_serv.core.config import base_settings
+from src.redirect_serv.core.dependencies.database import get_session
+
+TRANSPORTS = ("asgi", "uvicorn")
+WARMUP_REQUESTS = 200
+
+
+class ZipfSampler:
+    """Draws code indexes where index k is requested ~1 / (k + 1) ** s as often"""
+
+    def __init__(self, codes: int, exponent: float, rng: random.Random):
+        self.population = range(codes)
+        self.cum_weights = list(
+            itertools.accumulate(1 / (rank**exponent) for rank in range(1, codes + 1))
+        )
+        self.rng = rng
+
+    def sample(self, count: int) -> List[int]:
+        return self.rng.choices(self.population, cum_weights=self.cum_weights, k=count)
+
+
+class StatementCounter:
+    """Counts statements sent to the database by an engine"""
+
+    def __init__(self, engine: AsyncEngine):
+        self.count = 0
+        event.listen(engine.sync_engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *_args: Any) -> None:
+        self.count += 1
+
+
+def build_app(engine: AsyncEngine, fast_path: bool = False) -> FastAPI:
+    app = create_app()
+    if fast_path:
+        app.add_middleware(
+            RedirectFastPathMiddleware,
+            settings=base_settings,
+            dependency_overrides=app.dependency_overrides,
+        )
+
+    sessionmaker = async_sessionmaker(
+        engine, class_=AsyncSession, expire_on_commit=False
+    )
+
+    async def override_get_session():
+        async with sessionmaker() as session:
+            yield session
+
+    app.dependency_overrides[get_session] = override_get_session
+    return app
+
+
+def percentile(quantiles: Sequence[float], p: int) -> float:
+    return quantiles[p - 1]
+
+
+async def drive(
+    client: httpx.AsyncClient,
+    paths: List[str],
+    concurrency: int,
+    counter: StatementCounter,
+) -> Dict[str, Any]:
+    """Send paths with a fixed number of concurrent workers after a warm-up"""
+    for path in paths[:WARMUP_REQUESTS]:
+        await client.get(path)
+    statements = counter.count
+
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    queue = iter(paths)
+
+    async def worker() -> None:
+        for path in queue:
+            started = time.perf_counter()
+            response = await client.get(path)
+            latencies.append(time.perf_counter() - started)
+            statuses[response.status_code] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    statements = counter.count - statements
+
+    quantiles = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {
+        "requests": len(paths),
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 4),
+        "rps": round(len(paths) / elapsed, 1),
+        "latency_ms": {
+            "p50": round(percentile(quantiles, 50) * 1000, 3),
+            "p95": round(percentile(quantiles, 95) * 1000, 3),
+            "p99": round(percentile(quantiles, 99) * 1000, 3),
+            "max": round(max(latencies) * 1000, 3),
+        },
+        "statements_per_request": round(statements / len(paths), 3),
+        "status_counts": {str(code): n for code, n in sorted(statuses.items())},
+    }
+
+
+async def run_asgi(
+    engine: AsyncEngine,
+    paths: List[str],
+    concurrency: int,
+    fast_path: bool,
+    timeout: float,
+) -> Dict[str, Any]:
+    counter = StatementCounter(engine)
+    transport = httpx.ASGITransport(app=build_app(engine, fast_path))
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench", timeout=timeout
+    ) as ac:
+        return await drive(ac, paths, concurrency, counter)
+
+
+class UvicornThread:
+    """Serves the app from its own thread and event loop on a loopback socket.
+
+    The server gets its own engine, since async DB connections are bound to
+    the loop that opened them. Lifespan is off: background components would
+    otherwise connect to the database configured in the environment.
+    """
+
+    def __init__(self, database_url: str, fast_path: bool):
+        self.database_url = database_url
+        self.fast_path = fast_path
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.socket.bind(("127.0.0.1", 0))
+        self.port = self.socket.getsockname()[1]
+        self.counter: Optional[StatementCounter] = None
+        self._server: Optional[uvicorn.Server] = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        asyncio.run(self._serve())
+
+    async def _serve(self) -> None:
+        engine = create_engine(self.database_url)
+        self.counter = StatementCounter(engine)
+        config = uvicorn.Config(
+            build_app(engine, self.fast_path),
+            lifespan="off",
+            log_level="warning",
+            access_log=False,
+        )
+        self._server = uvicorn.Server(config)
+        await self._server.serve(sockets=[self.socket])
+        await engine.dispose()
+
+    def __enter__(self) -> "UvicornThread":
+        self._thread.start()
+        while self._server is None or not self._server.started:
+            if not self._thread.is_alive():
+                raise RuntimeError("uvicorn failed to start")
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *_exc: Any) -> None:
+        self._server.should_exit = True
+        self._thread.join()
+        self.socket.close()
+
+
+async def run_uvicorn(
+    database_url: str,
+    paths: List[str],
+    concurrency: int,
+    fast_path: bool,
+    timeout: float,
+) -> Dict[str, Any]:
+    limits = httpx.Limits(max_connections=concurrency)
+    with UvicornThread(database_url, fast_path) as server:
+        base_url = f"http://127.0.0.1:{server.port}"
+        async with httpx.AsyncClient(
+            base_url=base_url, limits=limits, timeout=timeout
+        ) as ac:
+            return await drive(ac, paths, concurrency, server.counter)
+
+
+def compare(
+    report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float
+) -> List[str]:
+    """Regressions of report against baseline, as human readable lines"""
+    if report["config"] != baseline.get("config"):
+        return [f"config differs from the baseline's: {baseline.get('config')}"]
+
+    regressions = []
+    for transport, result in report["results"].items():
+        base = baseline.get("results", {}).get(transport)
+        if base is None:
+            continue
+        if result["rps"] < base["rps"] * (1 - tolerance):
+            regressions.append(
+                f"{transport}: throughput {result['rps']} rps < baseline {base['rps']}"
+            )
+        p99, base_p99 = result["latency_ms"]["p99"], base["latency_ms"]["p99"]
+        if p99 > base_p99 * (1 + tolerance):
+            regressions.append(f"{transport}: p99 {p99} ms > baseline {base_p99} ms")
+        # Statement counts are deterministic, so any increase is a regression
+        statements = result["statements_per_request"]
+        if statements > base["statements_per_request"] + 0.01:
+            regressions.append(
+                f"{transport}: {statements} statements per request > baseline "
+                f"{base['statements_per_request']}"
+            )
+    return regressions
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    scan_count_aggregator.enabled = args.write_behind
+
+    engine = create_engine(args.database_url)
+    if args.reset or not await count_codes(engine):
+        await create_schema(engine, reset=args.reset)
+        await generate(engine, args.companies, args.branches_per_company)
+    codes = await count_codes(engine)
+
+    rng = random.Random(args.seed)
+    indexes = ZipfSampler(codes, args.zipf, rng).sample(args.requests)
+    paths = [f"/redirect/{url_hash_for(i)}" for i in indexes]
+
+    results = {}
+    for transport in args.transports:
+        redirect_cache.clear()
+        negative_cache.clear()
+        if transport == "asgi":
+            results[transport] = await run_asgi(
+                engine, paths, args.concurrency, args.fast_path, args.timeout
+            )
+        else:
+            results[transport] = await run_uvicorn(
+                args.database_url,
+                paths,
+                args.concurrency,
+                args.fast_path,
+                args.timeout,
+            )
+    await engine.dispose()
+
+    return {
+        "config": {
+            "dialect": engine.dialect.name,
+            "codes": codes,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "zipf": args.zipf,
+            "seed": args.seed,
+            "fast_path": args.fast_path,
+            "write_behind": args.write_behind,
+        },
+        "results": results,
+    }
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", help="defaults to a temporary SQLite file")
+    parser.add_argument("--reset", action="store_true")
+    parser.add_argument("--companies", type=int, default=1000)
+    parser.add_argument("--branches-per-company", type=int, default=1)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--zipf", type=float, default=1.1, help="Zipf exponent")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--transport",
+        dest="transports",
+        action="append",
+        choices=TRANSPORTS,
+        help="repeatable, defaults to all",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=60.0,
+        help="per-request client timeout in seconds",
+    )
+    parser.add_argument("--fast-path", action="store_true")
+    parser.add_argument("--write-behind", action="store_true")
+    parser.add_argument("--output", help="also write the JSON report here")
+    parser.add_argument("--baseline", help="JSON report to compare against")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="allowed relative throughput/p99 regression",
+    )
+    args = parser.parse_args(argv)
+    args.transports = args.transports or list(TRANSPORTS)
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.database_url is None:
+            path = os.path.join(tmp, "bench.db")
+            args.database_url = f"sqlite+aiosqlite:///{path}"
+        report = asyncio.run(run(args))
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,6 @@
 from src.redirect_serv.api.health import router as health_router
+from src.redirect_serv.api.metrics import router as metrics_router
+from src.redirect_serv.api.profiling import router as profiling_router
 from src.redirect_serv.api.router import api_router
 
-__all__ = ("api_router", "health_router")
+__all__ = ("api_router", "health_router", "metrics_router", "profiling_router")
@@ -0,0 +1,158 @@
+import json
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from src.redirect_serv.apps.qr_manager.application import (
+    BRANCH_COOKIE_MAX_AGE,
+    BRANCH_COOKIE_NAME,
+    edge_cache_headers,
+)
+from src.redirect_serv.apps.qr_manager.hash_filter import (
+    is_valid_url_hash,
+    known_hash_filter,
+)
+from src.redirect_serv.apps.qr_manager.services import QRCodeService
+from src.redirect_serv.core.config import BaseSettings, redirect_settings
+from src.redirect_serv.core.dependencies.database import get_session
+from src.redirect_serv.core.exceptions import NotFoundError, ServiceUnavailableError
+
+REDIRECT_PREFIX = "/redirect/"
+_MAX_LOCATIONS = 4096
+
+Headers = List[Tuple[bytes, bytes]]
+
+
+class RedirectFastPathMiddleware:
+    """Serves GET /redirect/{hash} without FastAPI routing or dependency injection.
+
+    Produces the same status, Location and cookie as
+    QRCodeApplication.redirect_qr_code; every other request is passed through.
+    Sessions come from get_session, honouring app.dependency_overrides.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        settings: BaseSettings,
+        dependency_overrides: Dict[Callable[..., Any], Callable[..., Any]],
+    ):
+        self.app = app
+        self.dependency_overrides = dependency_overrides
+
+        self._location_prefix = f"{settings.redirect_protocol}://"
+        self._location_suffix = f".{settings.guest_serv_domain}/"
+        self._cookie_prefix = f"{BRANCH_COOKIE_NAME}=".encode()
+        cookie_suffix = (
+            f"; HttpOnly; Max-Age={BRANCH_COOKIE_MAX_AGE}; Path=/; SameSite=lax"
+        )
+        if settings.use_https:
+            cookie_suffix += "; Secure"
+        self._cookie_suffix = cookie_suffix.encode()
+        self._locations: Dict[str, bytes] = {}
+        self._edge_cache = redirect_settings.edge_cache
+        self._edge_headers: Headers = [
+            (name.lower().encode(), value.encode())
+            for name, value in edge_cache_headers().items()
+        ]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+
+        path: str = scope["path"]
+        url_hash = path[len(REDIRECT_PREFIX) :]
+        if not path.startswith(REDIRECT_PREFIX) or not url_hash or "/" in url_hash:
+            await self.app(scope, receive, send)
+            return
+
+        if not is_valid_url_hash(url_hash):
+            known_hash_filter.rejected_malformed += 1
+            detail = f"QR code with hash '{url_hash}' not found"
+            await self._send(send, 404, *self._error(detail))
+            return
+        url_hash = url_hash.lower()
+
+        user_agent, referrer = self._client_headers(scope)
+        provider = self.dependency_overrides.get(get_session, get_session)
+        sessions = provider()
+        session = await sessions.__anext__()
+        try:
+            service = QRCodeService(session)
+            if self._edge_cache:
+                target = await service.resolve_redirect_target(url_hash)
+            else:
+                target = await service.get_redirect_target_and_increment_scan(
+                    url_hash, user_agent, referrer, self._client(scope)
+                )
+        except NotFoundError as exc:
+            await self._send(send, 404, *self._error(str(exc)))
+            return
+        except ServiceUnavailableError as exc:
+            await self._send(send, 503, *self._error(str(exc)))
+            return
+        finally:
+            await sessions.aclose()
+
+        headers: Headers = [
+            (b"content-length", b"0"),
+            (b"location", self._location(target.subdomain)),
+            (
+                b"set-cookie",
+                self._cookie_prefix
+                + str(target.company_branch_id).encode()
+                + self._cookie_suffix,
+            ),
+        ]
+        if self._edge_cache:
+            headers.extend(self._edge_headers)
+        await self._send(send, 302, headers, b"")
+
+    @staticmethod
+    def _client_headers(scope: Scope) -> Tuple[Optional[str], Optional[str]]:
+        user_agent = referrer = None
+        for name, value in scope["headers"]:
+            if name == b"user-agent":
+                user_agent = value.decode("latin-1")
+            elif name == b"referer":
+                referrer = value.decode("latin-1")
+        return user_agent, referrer
+
+    @staticmethod
+    def _client(scope: Scope) -> Optional[str]:
+        # uvicorn's proxy_headers has already resolved X-Forwarded-For
+        client = scope.get("client")
+        return client[0] if client else None
+
+    def _location(self, subdomain: str) -> bytes:
+        location = self._locations.get(subdomain)
+        if location is None:
+            url = f"{self._location_prefix}{subdomain}{self._location_suffix}"
+            location = quote(url, safe=":/%#?=@[]!$&'()*+,;").encode("latin-1")
+            if len(self._locations) >= _MAX_LOCATIONS:
+                self._locations.clear()
+            self._locations[subdomain] = location
+        return location
+
+    @staticmethod
+    def _error(detail: str) -> Tuple[Headers, bytes]:
+        body = json.dumps(
+            {"detail": detail}, ensure_ascii=False, separators=(",", ":")
+        ).encode()
+        headers: Headers = [
+            (b"content-length", str(len(body)).encode()),
+            (b"content-type", b"application/json"),
+        ]
+        return headers, body
+
+    @staticmethod
+    async def _send(send: Send, status: int, headers: Headers, body: bytes) -> None:
+        await send(
+            {"type": "http.response.start", "status": status, "headers": headers}
+        )
+        await send({"type": "http.response.body", "body": body})
+
+
+__all__ = ("RedirectFastPathMiddleware",)
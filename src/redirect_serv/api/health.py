@@ -1,33 +1,66 @@
 from fastapi import APIRouter, HTTPException, status
-from sqlalchemy import text
 
+from src.redirect_serv.apps.qr_manager.cache import (
+    last_known_targets,
+    negative_cache,
+    redirect_cache,
+)
+from src.redirect_serv.apps.qr_manager.hash_filter import known_hash_filter
+from src.redirect_serv.apps.qr_manager.last_known import last_known_store
+from src.redirect_serv.apps.qr_manager.redirect_table import redirect_table
+from src.redirect_serv.apps.qr_manager.services import (
+    scan_count_aggregator,
+    scan_count_sharding,
+    scan_event_recorder,
+    scan_rollup_aggregator,
+    scan_spool,
+    unique_visitor_tracker,
+)
+from src.redirect_serv.apps.qr_manager.snapshot import redirect_snapshot
+from src.redirect_serv.core.circuit_breaker import db_circuit_breaker
+from src.redirect_serv.core.config import health_settings
 from src.redirect_serv.core.dependencies.database import engine
+from src.redirect_serv.core.pool import pool_status
+from src.redirect_serv.core.probes import DatabaseProbe
+from src.redirect_serv.core.rate_limit import rate_limiter
+from src.redirect_serv.core.replicas import replica_router
 
 router = APIRouter(prefix="/health", tags=["health"])
 
+database_probe = DatabaseProbe(engine, ttl=health_settings.ready_probe_ttl)
+
 
 @router.get("/live")
 async def liveness():
     return {"status": "ok"}
 
 
+def _can_serve_from_memory() -> bool:
+    return (
+        redirect_table.ready or redirect_snapshot.ready or len(last_known_targets) > 0
+    )
+
+
 @router.get("/ready")
 async def readiness():
+    """Ready, degraded (redirects served from memory without the DB) or 503"""
+    probe = await database_probe.check()
     checks = {
-        "database": False,
+        "database": probe.ok,
+        "database_circuit": db_circuit_breaker.closed,
     }
 
     errors = []
+    if probe.error:
+        errors.append(probe.error)
 
-    try:
-        async with engine.connect() as conn:
-            result = await conn.execute(text("SELECT 1"))
-            result.scalar()
-        checks["database"] = True
-    except Exception as e:
-        errors.append(f"Database check failed: {str(e)}")
-
-    if not checks["database"]:
+    if not all(checks.values()):
+        if _can_serve_from_memory():
+            return {
+                "status": "degraded",
+                "checks": checks,
+                "errors": errors,
+            }
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail={
@@ -41,3 +74,51 @@ async def readiness():
         "status": "ready",
         "checks": checks,
     }
+
+
+@router.get("/pool")
+async def pool():
+    return pool_status(engine)
+
+
+@router.get("/replicas")
+async def replicas():
+    """Read replica health as of the last check; empty without replicas"""
+    return [
+        {
+            "name": replica.name,
+            "healthy": replica.healthy,
+            "lag_seconds": replica.lag,
+            "error": replica.error,
+            "pool": pool_status(replica.engine),
+        }
+        for replica in replica_router.replicas
+    ]
+
+
+@router.get("/stats")
+async def stats():
+    return {
+        "redirect_cache": {
+            "size": len(redirect_cache),
+            "hits": redirect_cache.hits,
+            "misses": redirect_cache.misses,
+        },
+        "negative_cache": {
+            "size": len(negative_cache),
+            "hits": negative_cache.hits,
+            "misses": negative_cache.misses,
+        },
+        "known_hash_filter": known_hash_filter.stats(),
+        "redirect_table": redirect_table.stats(),
+        "redirect_snapshot": redirect_snapshot.stats(),
+        "scan_counts": scan_count_aggregator.stats(),
+        "scan_count_shards": scan_count_sharding.stats(),
+        "scan_events": scan_event_recorder.stats(),
+        "scan_rollups": scan_rollup_aggregator.stats(),
+        "unique_visitors": unique_visitor_tracker.stats(),
+        "scan_spool": scan_spool.stats(),
+        "database_circuit": db_circuit_breaker.stats(),
+        "last_known_targets": last_known_store.stats(),
+        "rate_limit": rate_limiter.stats(),
+    }
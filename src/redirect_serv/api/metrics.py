@@ -0,0 +1,141 @@
+from fastapi import APIRouter, Response
+
+from src.redirect_serv.apps.qr_manager.cache import negative_cache, redirect_cache
+from src.redirect_serv.apps.qr_manager.hash_filter import known_hash_filter
+from src.redirect_serv.apps.qr_manager.last_known import last_known_store
+from src.redirect_serv.apps.qr_manager.qr_image import qr_image_renderer
+from src.redirect_serv.apps.qr_manager.redirect_table import redirect_table
+from src.redirect_serv.apps.qr_manager.services import (
+    scan_count_aggregator,
+    scan_count_sharding,
+    scan_event_recorder,
+    scan_rollup_aggregator,
+    scan_spool,
+    unique_visitor_tracker,
+)
+from src.redirect_serv.apps.qr_manager.snapshot import redirect_snapshot
+from src.redirect_serv.core.cache import TTLCache
+from src.redirect_serv.core.circuit_breaker import db_circuit_breaker
+from src.redirect_serv.core.config import metrics_settings
+from src.redirect_serv.core.dependencies.database import engine
+from src.redirect_serv.core.metrics import StatsExporter, render_metrics
+from src.redirect_serv.core.pool import pool_status
+from src.redirect_serv.core.rate_limit import rate_limiter
+from src.redirect_serv.core.replicas import replica_router
+
+router = APIRouter(tags=["metrics"])
+
+
+def _cache_stats(cache: TTLCache):
+    return lambda: {"entries": len(cache), "hits": cache.hits, "misses": cache.misses}
+
+
+stats_exporter = StatsExporter(sync_interval=metrics_settings.sync_interval)
+stats_exporter.register("redirect_cache", _cache_stats(redirect_cache))
+stats_exporter.register("negative_cache", _cache_stats(negative_cache))
+stats_exporter.register(
+    "known_hash_filter",
+    known_hash_filter.stats,
+    counters=(
+        "rejected_malformed",
+        "rejected_negative_cache",
+        "rejected_bloom",
+        "false_positives",
+    ),
+    maxima=("ready",),
+)
+stats_exporter.register(
+    "redirect_table",
+    redirect_table.stats,
+    counters=("full_reloads", "delta_rows"),
+    maxima=("ready", "lag_seconds"),
+)
+stats_exporter.register(
+    "redirect_snapshot",
+    redirect_snapshot.stats,
+    counters=("reloads", "failed_reloads", "masked"),
+    # Workers map the same snapshot file, so its size is not summed either
+    maxima=("ready", "entries", "age_seconds"),
+)
+stats_exporter.register(
+    "scan_counts",
+    scan_count_aggregator.stats,
+    counters=("flushes", "failed_flushes", "flushed_scans"),
+    maxima=("last_flush_seconds", "max_flush_seconds"),
+)
+stats_exporter.register(
+    "unique_visitors",
+    unique_visitor_tracker.stats,
+    counters=(
+        "flushes",
+        "failed_flushes",
+        "flushed_sketches",
+        "dropped_visits",
+        "dropped_sketches",
+    ),
+)
+stats_exporter.register(
+    "scan_count_shards",
+    scan_count_sharding.stats,
+    counters=(
+        "sharded_scans",
+        "compactions",
+        "failed_compactions",
+        "compacted_scans",
+    ),
+)
+stats_exporter.register(
+    "scan_events",
+    scan_event_recorder.stats,
+    counters=("enqueued", "dropped", "written", "failed_batches"),
+)
+stats_exporter.register(
+    "scan_rollups",
+    scan_rollup_aggregator.stats,
+    counters=("flushes", "failed_flushes", "flushed_scans", "dropped_scans"),
+)
+stats_exporter.register(
+    "qr_images",
+    qr_image_renderer.stats,
+    counters=("disk_hits", "renders", "failed_renders", "disk_evictions"),
+)
+stats_exporter.register(
+    "read_replicas",
+    replica_router.stats,
+    counters=("replica_reads", "primary_fallbacks", "failed_checks"),
+    maxima=("replicas", "healthy", "max_lag_seconds"),
+)
+stats_exporter.register(
+    "scan_spool",
+    scan_spool.stats,
+    counters=("spooled", "dropped", "fsyncs", "replayed_scans", "failed_replays"),
+)
+stats_exporter.register(
+    "database_circuit",
+    db_circuit_breaker.stats,
+    counters=("opens", "rejected"),
+    maxima=("open", "consecutive_failures"),
+)
+stats_exporter.register(
+    "last_known_targets",
+    last_known_store.stats,
+    counters=("saves", "failed_saves"),
+    maxima=("loaded",),
+)
+stats_exporter.register(
+    "rate_limit", rate_limiter.stats, counters=("allowed", "throttled", "evicted")
+)
+stats_exporter.register(
+    "db_pool",
+    lambda: pool_status(engine),
+    counters=("checkouts", "timeouts", "total_wait_seconds"),
+    maxima=("max_wait_seconds",),
+)
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics() -> Response:
+    """Prometheus exposition format"""
+    stats_exporter.sync()
+    content, media_type = render_metrics()
+    return Response(content=content, media_type=media_type)
@@ -0,0 +1,43 @@
+from typing import Annotated, List, Optional
+
+from fastapi import APIRouter, Header, HTTPException, status
+from fastapi.responses import FileResponse
+
+from src.redirect_serv.core.config import profiling_settings
+from src.redirect_serv.core.profiling import ProfileInfo, ProfileStore, token_matches
+
+router = APIRouter(prefix="/debug/profiles", tags=["debug"])
+
+profile_store = ProfileStore(
+    directory=profiling_settings.directory,
+    max_files=profiling_settings.max_files,
+    max_bytes=profiling_settings.max_bytes,
+)
+
+
+def _check_token(x_profile: Optional[str]) -> None:
+    # Without a token only sampling is possible and the listing stays closed
+    value = x_profile.encode() if x_profile is not None else None
+    if not token_matches(value, profiling_settings.token):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
+
+
+@router.get("")
+async def list_profiles(
+    x_profile: Annotated[Optional[str], Header()] = None, limit: int = 50
+) -> List[ProfileInfo]:
+    """Most recent profiles of this host"""
+    _check_token(x_profile)
+    return profile_store.list(limit)
+
+
+@router.get("/{name}")
+async def download_profile(
+    name: str, x_profile: Annotated[Optional[str], Header()] = None
+) -> FileResponse:
+    """Raw pstats file, readable with python -m pstats or snakeviz"""
+    _check_token(x_profile)
+    path = profile_store.find(name)
+    if path is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+    return FileResponse(path, media_type="application/octet-stream")
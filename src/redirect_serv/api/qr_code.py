@@ -1,14 +1,41 @@
-from fastapi import APIRouter
-from fastapi.responses import RedirectResponse
+from typing import Annotated, Literal, Optional
 
-from src.redirect_serv.core.dependencies import QRCodeApplicationDep
+from fastapi import APIRouter, Header, Request, Response
+from fastapi.responses import RedirectResponse, StreamingResponse
+
+from src.redirect_serv.apps.qr_manager.schemas import QRCodeProvisionRequest
+from src.redirect_serv.core.dependencies import QRCodeApplicationDep, UrlHashDep
 
 router = APIRouter()
 
 
 @router.get("/redirect/{hash}")
 async def redirect_qr_code(
-    hash: str, application: QRCodeApplicationDep
+    hash: UrlHashDep,
+    request: Request,
+    application: QRCodeApplicationDep,
+    user_agent: Annotated[Optional[str], Header()] = None,
+    referer: Annotated[Optional[str], Header()] = None,
 ) -> RedirectResponse:
     """Handle QR code redirect request"""
-    return await application.redirect_qr_code(hash)
+    client = request.client.host if request.client else None
+    return await application.redirect_qr_code(hash, user_agent, referer, client)
+
+
+@router.post("/qr-codes/bulk")
+async def provision_qr_codes(
+    request: QRCodeProvisionRequest, application: QRCodeApplicationDep
+) -> StreamingResponse:
+    """Create QR codes for a batch of branches, streaming back their hashes"""
+    return await application.provision_qr_codes(request.company_branch_ids)
+
+
+@router.get("/qr/{hash}.{image_format}")
+async def qr_image(
+    hash: UrlHashDep,
+    image_format: Literal["png", "svg"],
+    application: QRCodeApplicationDep,
+    if_none_match: Annotated[Optional[str], Header()] = None,
+) -> Response:
+    """QR code image pointing at /redirect/{hash}, styled by its qr_options"""
+    return await application.render_qr_image(hash, image_format, if_none_match)
@@ -1,10 +1,14 @@
 from fastapi import APIRouter
 
 from src.redirect_serv.api.qr_code import router as qr_code_router
+from src.redirect_serv.api.scan_stats import router as scan_stats_router
 
 api_router = APIRouter()
 
 # QR Code routes
 api_router.include_router(qr_code_router)
 
+# Scan statistics routes
+api_router.include_router(scan_stats_router)
+
 __all__ = ("api_router",)
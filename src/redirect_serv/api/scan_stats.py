@@ -0,0 +1,57 @@
+from datetime import datetime
+from typing import Literal, Optional
+
+from fastapi import APIRouter
+
+from src.redirect_serv.apps.qr_manager.schemas import (
+    ScanCount,
+    ScanSeries,
+    UniqueVisitors,
+)
+from src.redirect_serv.core.dependencies import ScanStatsApplicationDep
+
+router = APIRouter(prefix="/stats", tags=["stats"])
+
+
+@router.get("/branches/{company_branch_id}/scans")
+async def get_branch_scans(
+    company_branch_id: int,
+    application: ScanStatsApplicationDep,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    granularity: Literal["hour", "day"] = "day",
+) -> ScanSeries:
+    """Scan series of a branch's QR code over [start, end)"""
+    return await application.get_branch_scans(
+        company_branch_id, start, end, granularity
+    )
+
+
+@router.get("/branches/{company_branch_id}/scan-count")
+async def get_branch_scan_count(
+    company_branch_id: int, application: ScanStatsApplicationDep
+) -> ScanCount:
+    """All-time scans of a branch's QR code"""
+    return await application.get_branch_scan_count(company_branch_id)
+
+
+@router.get("/branches/{company_branch_id}/visitors")
+async def get_branch_visitors(
+    company_branch_id: int,
+    application: ScanStatsApplicationDep,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> UniqueVisitors:
+    """Estimated unique visitors of a branch's QR code over [start, end)"""
+    return await application.get_branch_visitors(company_branch_id, start, end)
+
+
+@router.get("/companies/{company_id}/scans")
+async def get_company_scans(
+    company_id: int,
+    application: ScanStatsApplicationDep,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> ScanSeries:
+    """Daily scan series of all company branches over [start, end)"""
+    return await application.get_company_scans(company_id, start, end)
@@ -4,10 +4,10 @@ from sqlalchemy import String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from src.redirect_serv.models import Base
-from src.redirect_serv.models.mixins import IdMixin
+from src.redirect_serv.models.mixins import IdMixin, TimestampMixin
 
 
-class Company(IdMixin, Base):
+class Company(IdMixin, TimestampMixin, Base):
     __tablename__ = "companies"
 
     name: Mapped[str] = mapped_column(String(128), nullable=False)
@@ -4,10 +4,10 @@ from sqlalchemy import ForeignKey
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from src.redirect_serv.models import Base
-from src.redirect_serv.models.mixins import IdMixin
+from src.redirect_serv.models.mixins import IdMixin, TimestampMixin
 
 
-class CompanyBranch(IdMixin, Base):
+class CompanyBranch(IdMixin, TimestampMixin, Base):
     __tablename__ = "company_branches"
 
     company_id: Mapped[int] = mapped_column(
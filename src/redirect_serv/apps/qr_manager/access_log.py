@@ -0,0 +1,107 @@
+"""Redirect scans parsed from proxy and uvicorn access logs.
+
+Understands the nginx/Apache combined format (any line with a
+[dd/Mon/yyyy:HH:MM:SS +zzzz] timestamp) and uvicorn's access log, which
+carries a time only when the log format puts an ISO timestamp at the start
+of the line; other lines get the default time of their file. Only GET
+requests answered with a 302 count as scans.
+"""
+
+import re
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import BinaryIO, Dict, Optional, Tuple
+
+from src.redirect_serv.apps.qr_manager.services.scan_rollup_aggregator import (
+    hour_bucket,
+)
+
+_REQUEST_RE = re.compile(
+    rb'"GET /redirect/([0-9A-Fa-f]{64})(?:\?[^ "]*)? HTTP/[0-9.]+" 302\b'
+)
+_CLF_TIME_RE = re.compile(rb"\[(\d{2}/[A-Za-z]{3}/\d{4}:\d{2}:\d{2}:\d{2} [+-]\d{4})\]")
+_ISO_TIME_RE = re.compile(
+    rb"(\d{4}-\d{2}-\d{2})[T ](\d{2}:\d{2}:\d{2})(?:[.,]\d+)?(Z|[+-]\d{2}:?\d{2})?"
+)
+
+
+@lru_cache(maxsize=4096)
+def _clf_time(value: bytes) -> datetime:
+    return datetime.strptime(value.decode(), "%d/%b/%Y:%H:%M:%S %z")
+
+
+@lru_cache(maxsize=4096)
+def _iso_time(day: bytes, clock: bytes, offset: Optional[bytes]) -> datetime:
+    scanned_at = datetime.fromisoformat(f"{day.decode()}T{clock.decode()}")
+    if offset and offset != b"Z":
+        return datetime.fromisoformat(f"{scanned_at.isoformat()}{offset.decode()}")
+    # Times without an offset are taken as UTC
+    return scanned_at.replace(tzinfo=timezone.utc)
+
+
+def parse_scan(line: bytes, default_time: datetime) -> Optional[Tuple[str, datetime]]:
+    """(url_hash, scanned_at) of a counted redirect, None for any other line"""
+    if b"/redirect/" not in line:
+        return None
+    request = _REQUEST_RE.search(line)
+    if request is None:
+        return None
+
+    url_hash = request.group(1).decode().lower()
+    clf = _CLF_TIME_RE.search(line, 0, request.start())
+    if clf is not None:
+        return url_hash, _clf_time(clf.group(1))
+    iso = _ISO_TIME_RE.match(line)
+    if iso is not None:
+        return url_hash, _iso_time(*iso.groups())
+    return url_hash, default_time
+
+
+@dataclass
+class LogBatch:
+    """Scans of consecutive complete lines, ending at end_offset"""
+
+    end_offset: int
+    lines: int = 0
+    # (url_hash, hour) -> scans
+    hourly: Dict[Tuple[str, datetime], int] = field(
+        default_factory=lambda: defaultdict(int)
+    )
+    latest: Dict[str, datetime] = field(default_factory=dict)
+
+    @property
+    def scans(self) -> int:
+        return sum(self.hourly.values())
+
+
+def read_batch(
+    f: BinaryIO, offset: int, max_lines: int, default_time: datetime
+) -> LogBatch:
+    """Read up to max_lines complete lines from offset.
+
+    A trailing line without its newline is still being written and is left
+    for the next run.
+    """
+    f.seek(offset)
+    batch = LogBatch(end_offset=offset)
+    while batch.lines < max_lines:
+        line = f.readline()
+        if not line.endswith(b"\n"):
+            break
+        batch.lines += 1
+        batch.end_offset += len(line)
+
+        scan = parse_scan(line, default_time)
+        if scan is None:
+            continue
+        url_hash, scanned_at = scan
+        batch.hourly[(url_hash, hour_bucket(scanned_at))] += 1
+        latest = batch.latest.get(url_hash)
+        if latest is None or latest < scanned_at:
+            batch.latest[url_hash] = scanned_at
+    return batch
+
+
+__all__ = ("LogBatch", "parse_scan", "read_batch")
@@ -1,8 +1,49 @@
-from fastapi.responses import RedirectResponse
+import json
+from dataclasses import asdict
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, Dict, List, Optional
+
+from fastapi import Response, status
+from fastapi.responses import RedirectResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.redirect_serv.apps.qr_manager.services import QRCodeService
-from src.redirect_serv.core.config import base_settings
+from src.redirect_serv.apps.qr_manager.qr_image import qr_image_renderer
+from src.redirect_serv.apps.qr_manager.schemas import (
+    ScanCount,
+    ScanSeries,
+    UniqueVisitors,
+)
+from src.redirect_serv.apps.qr_manager.services import QRCodeService, ScanStatsService
+from src.redirect_serv.apps.qr_manager.services.scan_stats_service import (
+    GRANULARITY_DAY,
+    GRANULARITY_HOUR,
+)
+from src.redirect_serv.core.config import (
+    base_settings,
+    qr_image_settings,
+    redirect_settings,
+)
+from src.redirect_serv.core.exceptions import BadRequestError, NotSupportedError
+from src.redirect_serv.core.http_cache import etag_matches
+
+BRANCH_COOKIE_NAME = "company_branch_id"
+BRANCH_COOKIE_MAX_AGE = 86400 * 30  # 30 days
+
+MAX_PROVISION_BATCH = 100_000
+PROVISION_CHUNK_SIZE = 1000
+
+
+def edge_cache_headers() -> Dict[str, str]:
+    """Headers letting shared caches serve redirects in edge-cache mode"""
+    return {
+        "Cache-Control": (
+            f"public, max-age={redirect_settings.edge_max_age}, "
+            f"s-maxage={redirect_settings.edge_shared_max_age}"
+        ),
+        # The redirect does not depend on any request header; naming only
+        # Accept-Encoding keeps proxies from keying on more than the URL
+        "Vary": "Accept-Encoding",
+    }
 
 
 class QRCodeApplication:
@@ -10,24 +51,118 @@ class QRCodeApplication:
         self.session = session
         self.qr_code_service = QRCodeService(session)
 
-    async def redirect_qr_code(self, url_hash: str) -> RedirectResponse:
-        company_branch = (
-            await self.qr_code_service.get_company_branch_and_increment_scan(url_hash)
-        )
+    async def redirect_qr_code(
+        self,
+        url_hash: str,
+        user_agent: Optional[str] = None,
+        referrer: Optional[str] = None,
+        client: Optional[str] = None,
+    ) -> RedirectResponse:
+        if redirect_settings.edge_cache:
+            # Counted later from the access logs, whether served here or cached
+            target = await self.qr_code_service.resolve_redirect_target(url_hash)
+        else:
+            target = await self.qr_code_service.get_redirect_target_and_increment_scan(
+                url_hash, user_agent, referrer, client
+            )
 
-        subdomain = company_branch.company.subdomain
+        subdomain = target.subdomain
         domain = base_settings.guest_serv_domain
         protocol = base_settings.redirect_protocol
         redirect_url = f"{protocol}://{subdomain}.{domain}/"
 
         response = RedirectResponse(url=redirect_url, status_code=302)
         response.set_cookie(
-            key="company_branch_id",
-            value=str(company_branch.id),
-            max_age=86400 * 30,  # 30 days
+            key=BRANCH_COOKIE_NAME,
+            value=str(target.company_branch_id),
+            max_age=BRANCH_COOKIE_MAX_AGE,
             httponly=True,
             secure=base_settings.use_https,
             samesite="lax",
         )
+        if redirect_settings.edge_cache:
+            response.headers.update(edge_cache_headers())
 
         return response
+
+    async def provision_qr_codes(
+        self, company_branch_ids: List[int]
+    ) -> StreamingResponse:
+        """Stream one NDJSON line per branch as its chunk is committed"""
+        if len(company_branch_ids) > MAX_PROVISION_BATCH:
+            raise BadRequestError(
+                f"At most {MAX_PROVISION_BATCH} branches can be provisioned at once"
+            )
+
+        async def lines() -> AsyncIterator[bytes]:
+            async for result in self.qr_code_service.provision_qr_codes(
+                company_branch_ids, PROVISION_CHUNK_SIZE
+            ):
+                yield json.dumps(asdict(result)).encode() + b"\n"
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    async def render_qr_image(
+        self, url_hash: str, image_format: str, if_none_match: Optional[str] = None
+    ) -> Response:
+        if not qr_image_renderer.available:
+            raise NotSupportedError("QR image rendering requires segno")
+
+        qr_options = await self.qr_code_service.get_qr_options(url_hash)
+        spec = qr_image_renderer.spec(url_hash, qr_options, image_format)
+        headers = {
+            "ETag": spec.etag,
+            "Cache-Control": f"public, max-age={qr_image_settings.max_age}",
+        }
+        if etag_matches(if_none_match, spec.etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        try:
+            content = await qr_image_renderer.render(spec)
+        except ValueError as exc:
+            raise BadRequestError(f"QR code options cannot be rendered: {exc}")
+        return Response(content, media_type=spec.media_type, headers=headers)
+
+
+class ScanStatsApplication:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+        self.scan_stats_service = ScanStatsService(session)
+
+    async def get_branch_scans(
+        self,
+        company_branch_id: int,
+        start: Optional[datetime],
+        end: Optional[datetime],
+        granularity: str,
+    ) -> ScanSeries:
+        start, end = self._default_range(start, end, granularity)
+        return await self.scan_stats_service.get_branch_series(
+            company_branch_id, start, end, granularity
+        )
+
+    async def get_branch_scan_count(self, company_branch_id: int) -> ScanCount:
+        return await self.scan_stats_service.get_branch_scan_count(company_branch_id)
+
+    async def get_branch_visitors(
+        self, company_branch_id: int, start: Optional[datetime], end: Optional[datetime]
+    ) -> UniqueVisitors:
+        start, end = self._default_range(start, end, GRANULARITY_DAY)
+        return await self.scan_stats_service.get_branch_visitors(
+            company_branch_id, start, end
+        )
+
+    async def get_company_scans(
+        self, company_id: int, start: Optional[datetime], end: Optional[datetime]
+    ) -> ScanSeries:
+        start, end = self._default_range(start, end, GRANULARITY_DAY)
+        return await self.scan_stats_service.get_company_series(company_id, start, end)
+
+    @staticmethod
+    def _default_range(start, end, granularity):
+        """Last 24 hours for hourly series, last 30 days for daily ones"""
+        end = end or datetime.now(timezone.utc)
+        if start is None:
+            span = timedelta(days=1 if granularity == GRANULARITY_HOUR else 30)
+            start = end - span
+        return start, end
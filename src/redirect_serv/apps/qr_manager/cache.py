@@ -0,0 +1,115 @@
+import math
+
+from sqlalchemy import event, inspect
+
+from src.redirect_serv.apps.company.models import Company, CompanyBranch
+from src.redirect_serv.apps.qr_manager.hash_filter import known_hash_filter
+from src.redirect_serv.apps.qr_manager.models import QRCode
+from src.redirect_serv.apps.qr_manager.schemas import RedirectTarget
+from src.redirect_serv.apps.qr_manager.snapshot import redirect_snapshot
+from src.redirect_serv.core.cache import TTLCache
+from src.redirect_serv.core.config import cache_settings, degraded_mode_settings
+from src.redirect_serv.core.replicas import replica_router
+
+redirect_cache: TTLCache[str, RedirectTarget] = TTLCache(
+    maxsize=cache_settings.redirect_cache_size,
+    ttl=cache_settings.redirect_cache_ttl,
+)
+
+# Hashes recently looked up and not found
+negative_cache: TTLCache[str, bool] = TTLCache(
+    maxsize=cache_settings.negative_cache_size,
+    ttl=cache_settings.negative_cache_ttl,
+)
+
+# Every target resolved by this worker, without expiry: only read while the
+# database circuit is open, when a stale redirect beats none at all
+last_known_targets: TTLCache[str, RedirectTarget] = TTLCache(
+    maxsize=degraded_mode_settings.last_known_size, ttl=math.inf
+)
+
+
+def remember_target(url_hash: str, target: RedirectTarget) -> None:
+    redirect_cache.set(url_hash, target)
+    last_known_targets.set(url_hash, target)
+
+
+# ==================== INVALIDATION HOOKS ====================
+
+
+def invalidate_url_hash(url_hash: str) -> None:
+    redirect_cache.pop(url_hash)
+    last_known_targets.pop(url_hash)
+    redirect_snapshot.mask_url_hash(url_hash)
+
+
+def invalidate_company_branch(company_branch_id: int) -> None:
+    for cache in (redirect_cache, last_known_targets):
+        cache.discard_where(
+            lambda target: target.company_branch_id == company_branch_id
+        )
+    redirect_snapshot.mask_company_branch(company_branch_id)
+
+
+def invalidate_subdomain(subdomain: str) -> None:
+    for cache in (redirect_cache, last_known_targets):
+        cache.discard_where(lambda target: target.subdomain == subdomain)
+    redirect_snapshot.mask_subdomain(subdomain)
+
+
+# ==================== ORM EVENTS ====================
+# Only cover changes made through the ORM in this worker; other workers and
+# bulk Core statements rely on the TTL or on the explicit hooks above.
+
+
+@event.listens_for(Company, "after_update")
+def _on_company_update(_mapper, _connection, target: Company) -> None:
+    for subdomain in inspect(target).attrs.subdomain.history.deleted:
+        invalidate_subdomain(subdomain)
+
+
+@event.listens_for(Company, "after_delete")
+def _on_company_delete(_mapper, _connection, target: Company) -> None:
+    invalidate_subdomain(target.subdomain)
+
+
+@event.listens_for(CompanyBranch, "after_update")
+@event.listens_for(CompanyBranch, "after_delete")
+def _on_company_branch_change(_mapper, _connection, target: CompanyBranch) -> None:
+    invalidate_company_branch(target.id)
+
+
+@event.listens_for(QRCode, "after_insert")
+def _on_qr_code_insert(_mapper, _connection, target: QRCode) -> None:
+    negative_cache.pop(target.url_hash)
+    known_hash_filter.add(target.url_hash)
+    replica_router.pin(target.url_hash)
+
+
+@event.listens_for(QRCode, "after_update")
+def _on_qr_code_update(_mapper, _connection, target: QRCode) -> None:
+    state = inspect(target)
+    for url_hash in state.attrs.url_hash.history.deleted:
+        invalidate_url_hash(url_hash)
+    for url_hash in state.attrs.url_hash.history.added:
+        negative_cache.pop(url_hash)
+        known_hash_filter.add(url_hash)
+        replica_router.pin(url_hash)
+    if state.attrs.company_branch_id.history.has_changes():
+        invalidate_url_hash(target.url_hash)
+
+
+@event.listens_for(QRCode, "after_delete")
+def _on_qr_code_delete(_mapper, _connection, target: QRCode) -> None:
+    invalidate_url_hash(target.url_hash)
+
+
+__all__ = (
+    "redirect_cache",
+    "negative_cache",
+    "last_known_targets",
+    "remember_target",
+    "invalidate_url_hash",
+    "invalidate_company_branch",
+    "invalidate_subdomain",
+)
@@ -0,0 +1,172 @@
+import asyncio
+import logging
+import re
+import secrets
+import time
+from contextlib import suppress
+from datetime import datetime, timedelta
+from typing import AsyncContextManager, Callable, Dict, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.redirect_serv.apps.qr_manager.repositories import QRCodeRepository
+from src.redirect_serv.core.bloom import BloomFilter
+from src.redirect_serv.core.config import cache_settings
+
+logger = logging.getLogger(__name__)
+
+SessionFactory = Callable[[], AsyncContextManager[AsyncSession]]
+
+URL_HASH_LENGTH = 64
+_URL_HASH_RE = re.compile(r"[0-9a-fA-F]{%d}" % URL_HASH_LENGTH)
+
+# Delta refreshes re-read this many ids below the last seen one, so codes whose
+# transaction committed after a higher id was already loaded are still picked up
+_REFRESH_LOOKBACK_IDS = 1000
+# Likewise for url_hash changes on existing codes, found by updated_at
+_REFRESH_LOOKBACK = timedelta(seconds=5)
+
+
+def is_valid_url_hash(url_hash: str) -> bool:
+    return _URL_HASH_RE.fullmatch(url_hash) is not None
+
+
+def generate_url_hash() -> str:
+    """Random 256-bit hash; the unique index still settles any collision"""
+    return secrets.token_hex(URL_HASH_LENGTH // 2)
+
+
+class KnownHashFilter:
+    """Bloom filter of every known url_hash, kept current in the background.
+
+    Until the first build completes every hash is treated as possibly known.
+    New codes and changed hashes show up after at most refresh_interval
+    seconds in other workers (immediately in the worker that made the
+    change); deleted codes and replaced hashes are dropped on the next full
+    rebuild.
+    """
+
+    def __init__(
+        self,
+        enabled: bool,
+        error_rate: float,
+        refresh_interval: float,
+        rebuild_interval: float,
+    ):
+        self.enabled = enabled
+        self.error_rate = error_rate
+        self.refresh_interval = refresh_interval
+        self.rebuild_interval = rebuild_interval
+        self._bloom: Optional[BloomFilter] = None
+        self._max_id = 0
+        self._watermark: Optional[datetime] = None
+        self._built_at = 0.0
+        self._session_factory: Optional[SessionFactory] = None
+        self._task: Optional[asyncio.Task] = None
+
+        self.rejected_malformed = 0
+        self.rejected_negative_cache = 0
+        self.rejected_bloom = 0
+        self.false_positives = 0
+
+    @property
+    def ready(self) -> bool:
+        return self._bloom is not None
+
+    def might_exist(self, url_hash: str) -> bool:
+        return self._bloom is None or url_hash in self._bloom
+
+    def add(self, url_hash: str) -> None:
+        if self._bloom is not None:
+            self._bloom.add(url_hash)
+
+    async def rebuild(self) -> None:
+        assert self._session_factory is not None
+        async with self._session_factory() as session:
+            repository = QRCodeRepository(session)
+            # Headroom for codes added by delta refreshes until the next rebuild
+            capacity = int(await repository.count_all() * 1.5) + 10000
+            bloom = BloomFilter(capacity, self.error_rate)
+            max_id = 0
+            watermark = None
+            async for (
+                qr_code_id,
+                url_hash,
+                updated_at,
+            ) in repository.stream_url_hashes():
+                bloom.add(url_hash)
+                max_id = qr_code_id
+                watermark = self._newest(watermark, updated_at)
+
+        self._bloom = bloom
+        self._max_id = max_id
+        self._watermark = watermark
+        self._built_at = time.monotonic()
+
+    async def refresh(self) -> None:
+        if self._bloom is None:
+            await self.rebuild()
+            return
+
+        assert self._session_factory is not None
+        async with self._session_factory() as session:
+            after_id = max(0, self._max_id - _REFRESH_LOOKBACK_IDS)
+            since = self._watermark - _REFRESH_LOOKBACK if self._watermark else None
+            async for qr_code_id, url_hash, updated_at in QRCodeRepository(
+                session
+            ).stream_url_hashes(after_id=after_id, changed_since=since):
+                self._bloom.add(url_hash)
+                self._max_id = max(self._max_id, qr_code_id)
+                self._watermark = self._newest(self._watermark, updated_at)
+
+    @staticmethod
+    def _newest(watermark: Optional[datetime], updated_at: datetime) -> datetime:
+        return updated_at if watermark is None else max(watermark, updated_at)
+
+    async def start(self, session_factory: SessionFactory) -> None:
+        self._session_factory = session_factory
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                if time.monotonic() - self._built_at >= self.rebuild_interval:
+                    await self.rebuild()
+                else:
+                    await self.refresh()
+            except Exception:
+                logger.exception("Failed to refresh known url_hash filter")
+            await asyncio.sleep(self.refresh_interval)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "ready": self.ready,
+            "entries": self._bloom.count if self._bloom is not None else 0,
+            "rejected_malformed": self.rejected_malformed,
+            "rejected_negative_cache": self.rejected_negative_cache,
+            "rejected_bloom": self.rejected_bloom,
+            "false_positives": self.false_positives,
+        }
+
+
+known_hash_filter = KnownHashFilter(
+    enabled=cache_settings.bloom_filter_enabled,
+    error_rate=cache_settings.bloom_filter_error_rate,
+    refresh_interval=cache_settings.bloom_filter_refresh_interval,
+    rebuild_interval=cache_settings.bloom_filter_rebuild_interval,
+)
+
+__all__ = (
+    "KnownHashFilter",
+    "generate_url_hash",
+    "is_valid_url_hash",
+    "known_hash_filter",
+)
@@ -0,0 +1,104 @@
+"""Last known redirect targets kept across restarts.
+
+last_known_targets is saved to path every save_interval seconds and on
+shutdown, in the redirect snapshot format, and loaded back at startup; a
+worker restarted during a database outage can then still serve the codes
+it had resolved before. Workers sharing a path overwrite each other's
+saves, so the file holds the targets of whichever worker saved last.
+"""
+
+import asyncio
+import logging
+import time
+from contextlib import suppress
+from typing import Any, Dict, Optional
+
+from src.redirect_serv.apps.qr_manager.cache import last_known_targets
+from src.redirect_serv.apps.qr_manager.snapshot import (
+    RedirectSnapshot,
+    SnapshotError,
+    write_snapshot,
+)
+from src.redirect_serv.core.config import degraded_mode_settings
+
+logger = logging.getLogger(__name__)
+
+
+class LastKnownTargetsStore:
+    def __init__(self, path: str, save_interval: float):
+        self.path = path
+        self.save_interval = save_interval
+        self._task: Optional[asyncio.Task] = None
+        self.loaded = 0
+        self.saves = 0
+        self.failed_saves = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    def load(self) -> int:
+        try:
+            snapshot = RedirectSnapshot(self.path)
+        except FileNotFoundError:
+            return 0
+        except (OSError, SnapshotError):
+            logger.exception("Ignoring unreadable last known targets")
+            return 0
+        try:
+            for url_hash, target in snapshot.items():
+                last_known_targets.set(url_hash, target)
+        finally:
+            snapshot.close()
+        self.loaded = snapshot.count
+        return self.loaded
+
+    async def save(self) -> int:
+        rows = [
+            (url_hash, target.qr_code_id, target.company_branch_id, target.subdomain)
+            for url_hash, target in last_known_targets.items()
+        ]
+        try:
+            count = await asyncio.to_thread(
+                write_snapshot, self.path, rows, int(time.time())
+            )
+        except OSError:
+            self.failed_saves += 1
+            logger.exception("Failed to save last known targets to %s", self.path)
+            return 0
+        self.saves += 1
+        return count
+
+    async def start(self) -> None:
+        if self.enabled and self._task is None:
+            await asyncio.to_thread(self.load)
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+            await self.save()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.save_interval)
+            await self.save()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(last_known_targets),
+            "loaded": self.loaded,
+            "saves": self.saves,
+            "failed_saves": self.failed_saves,
+        }
+
+
+last_known_store = LastKnownTargetsStore(
+    path=degraded_mode_settings.last_known_path,
+    save_interval=degraded_mode_settings.last_known_save_interval,
+)
+
+__all__ = ("LastKnownTargetsStore", "last_known_store")
@@ -1,3 +1,17 @@
+from .access_log_offset import AccessLogOffset
 from .qr_code import QRCode
+from .scan_count_shard import ScanCountShard
+from .scan_event import ScanEvent
+from .scan_rollup import CompanyScanDailyRollup, ScanDailyRollup, ScanHourlyRollup
+from .visitor_sketch import VisitorDailySketch
 
-__all__ = ("QRCode",)
+__all__ = (
+    "AccessLogOffset",
+    "QRCode",
+    "ScanCountShard",
+    "ScanEvent",
+    "ScanHourlyRollup",
+    "ScanDailyRollup",
+    "CompanyScanDailyRollup",
+    "VisitorDailySketch",
+)
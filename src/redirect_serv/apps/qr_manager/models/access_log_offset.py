@@ -0,0 +1,28 @@
+from datetime import datetime
+
+from sqlalchemy import BigInteger, Integer, LargeBinary, String
+from sqlalchemy.dialects.postgresql import TIMESTAMP
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.redirect_serv.models import Base
+
+
+class AccessLogOffset(Base):
+    """How far an access log file has been counted into the scan counters.
+
+    Keyed by device and inode rather than path, so a rotated file keeps its
+    offset under its new name. head_digest covers the first head_size bytes
+    and tells a reused inode apart from the file that was read before.
+    """
+
+    __tablename__ = "access_log_offsets"
+
+    file_id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    path: Mapped[str] = mapped_column(String(1024), nullable=False)
+    head_size: Mapped[int] = mapped_column(Integer, nullable=False)
+    head_digest: Mapped[bytes] = mapped_column(LargeBinary(32), nullable=False)
+    offset: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP(timezone=True),
+        nullable=False,
+    )
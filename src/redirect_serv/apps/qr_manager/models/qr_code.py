@@ -1,16 +1,17 @@
 from datetime import datetime
 from typing import Any, Dict, Optional
 
-from sqlalchemy import CHAR, ForeignKey, Integer
+from sqlalchemy import CheckConstraint, ForeignKey, Integer
 from sqlalchemy.dialects.postgresql import JSONB, TIMESTAMP
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
-from src.redirect_serv.models import Base
-from src.redirect_serv.models.mixins import IdMixin
+from src.redirect_serv.models import Base, HexBytes
+from src.redirect_serv.models.mixins import IdMixin, TimestampMixin
 
 
-class QRCode(IdMixin, Base):
+class QRCode(IdMixin, TimestampMixin, Base):
     __tablename__ = "qr_codes"
+    __table_args__ = (CheckConstraint("length(url_hash) = 32", name="url_hash_length"),)
 
     company_branch_id: Mapped[int] = mapped_column(
         ForeignKey("company_branches.id", ondelete="CASCADE"),
@@ -23,9 +24,9 @@ class QRCode(IdMixin, Base):
         default=dict,
         nullable=True,
     )
-    url_hash: Mapped[str] = mapped_column(
-        CHAR(64), nullable=False, unique=True, index=True
-    )
+    # 64 hex characters in Python, 32 bytes in the table; the unique
+    # constraint's index is the only one on it (see migrate_url_hash)
+    url_hash: Mapped[str] = mapped_column(HexBytes(32), nullable=False, unique=True)
     scan_count: Mapped[int] = mapped_column(
         Integer,
         default=0,
@@ -0,0 +1,25 @@
+from datetime import datetime
+
+from sqlalchemy import BigInteger, Integer, SmallInteger
+from sqlalchemy.dialects.postgresql import TIMESTAMP
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.redirect_serv.models import Base
+
+
+class ScanCountShard(Base):
+    """Scans of a hot QR code not yet compacted into qr_codes.scan_count.
+
+    A code's count is its scan_count plus the scans of all its shards. No
+    foreign key, like the rollups: an increment must not fail because the
+    code was just deleted, and compaction drops orphaned shards anyway.
+    """
+
+    __tablename__ = "scan_count_shards"
+
+    qr_code_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    shard: Mapped[int] = mapped_column(SmallInteger, primary_key=True)
+    scans: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    last_scanned: Mapped[datetime] = mapped_column(
+        TIMESTAMP(timezone=True), nullable=False
+    )
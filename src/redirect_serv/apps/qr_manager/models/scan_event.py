@@ -0,0 +1,40 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import BigInteger, Index, Integer
+from sqlalchemy.dialects.postgresql import TIMESTAMP
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.redirect_serv.models import Base
+
+
+class ScanEvent(Base):
+    """Append-only scan log, range-partitioned by day on PostgreSQL.
+
+    Partitioned tables need the partition key in every unique constraint and
+    events are never looked up by identity, so the table has no primary key
+    or foreign keys; the mapper key only exists to satisfy the ORM.
+    """
+
+    __tablename__ = "scan_events"
+
+    scanned_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP(timezone=True),
+        nullable=False,
+    )
+    qr_code_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    company_branch_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    user_agent_fingerprint: Mapped[Optional[int]] = mapped_column(
+        BigInteger,
+        nullable=True,
+    )
+    referrer_fingerprint: Mapped[Optional[int]] = mapped_column(
+        BigInteger,
+        nullable=True,
+    )
+
+    __table_args__ = (
+        Index("ix_scan_events_qr_code_id_scanned_at", "qr_code_id", "scanned_at"),
+        {"postgresql_partition_by": "RANGE (scanned_at)"},
+    )
+    __mapper_args__ = {"primary_key": [qr_code_id, scanned_at]}
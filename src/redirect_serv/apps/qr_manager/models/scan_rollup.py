@@ -0,0 +1,35 @@
+from datetime import date, datetime
+
+from sqlalchemy import BigInteger, Date, Integer
+from sqlalchemy.dialects.postgresql import TIMESTAMP
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.redirect_serv.models import Base
+
+# Rollups are keyed by their series so range reads are a primary key scan.
+# They carry no foreign keys: a batch must not fail because a code was
+# deleted between the scan and the flush, and orphaned buckets are harmless.
+
+
+class ScanHourlyRollup(Base):
+    __tablename__ = "scan_rollups_hourly"
+
+    qr_code_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    hour: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), primary_key=True)
+    scans: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+
+
+class ScanDailyRollup(Base):
+    __tablename__ = "scan_rollups_daily"
+
+    qr_code_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    scans: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+
+
+class CompanyScanDailyRollup(Base):
+    __tablename__ = "scan_rollups_company_daily"
+
+    company_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    scans: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
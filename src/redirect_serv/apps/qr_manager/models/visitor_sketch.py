@@ -0,0 +1,19 @@
+from datetime import date
+
+from sqlalchemy import Date, Integer, LargeBinary
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.redirect_serv.models import Base
+
+
+class VisitorDailySketch(Base):
+    """HyperLogLog registers of the visitors of a QR code on one UTC day.
+
+    Keyed like the daily rollups and, like them, without a foreign key.
+    """
+
+    __tablename__ = "visitor_sketches_daily"
+
+    qr_code_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    registers: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
@@ -0,0 +1,347 @@
+"""QR code images rendered from url_hash and qr_options, cached by content.
+
+A render is addressed by the SHA-256 of the payload, the supported options,
+the image format and the segno version: a key always maps to the same bytes,
+so it doubles as a strong ETag and cached entries never go stale. Entries are
+kept in a per-worker LRU bounded by bytes and in a directory shared by every
+worker, pruned of its least recently used files once it outgrows its cap.
+Rendering is CPU bound and runs in a process pool, off the event loop.
+
+segno is an optional dependency (pip install segno); without it the image
+endpoint answers 501.
+"""
+
+import asyncio
+import hashlib
+import io
+import json
+import logging
+import multiprocessing
+import os
+import tempfile
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import suppress
+from typing import Any, Dict, Mapping, Optional
+
+from src.redirect_serv.apps.qr_manager.schemas import QRImageSpec
+from src.redirect_serv.core.config import qr_image_settings
+
+try:
+    import segno
+except ImportError:  # pragma: no cover - depends on the environment
+    segno = None
+
+logger = logging.getLogger(__name__)
+
+# qr_options keys passed to segno.make and QRCode.save; anything else stored
+# by the back office is ignored and does not affect the cache key
+_MAKE_OPTIONS = ("error", "micro", "boost_error")
+_SAVE_OPTIONS = (
+    "scale",
+    "border",
+    "dark",
+    "light",
+    "data_dark",
+    "data_light",
+    "finder_dark",
+    "finder_light",
+)
+# Every numeric option sizes the image, so none is passed through unbounded
+_NUMERIC_OPTIONS = ("scale", "border")
+# A worker prunes the disk cache after writing this fraction of its cap, down
+# to the low watermark so the next renders do not trigger another pass
+_PRUNE_EVERY = 0.1
+_PRUNE_TO = 0.9
+_TMP_PREFIX = ".tmp-"
+
+
+def render_image(payload: str, options: Mapping[str, Any], image_format: str) -> bytes:
+    """Render in the calling process; a ValueError means unusable options"""
+    qr = segno.make(payload, **{k: options[k] for k in _MAKE_OPTIONS if k in options})
+    out = io.BytesIO()
+    qr.save(
+        out,
+        kind=image_format,
+        **{k: options[k] for k in _SAVE_OPTIONS if k in options},
+    )
+    return out.getvalue()
+
+
+class QRImageRenderer:
+    """Content-addressed render cache in front of a pool of render processes"""
+
+    def __init__(
+        self,
+        base_url: str,
+        cache_dir: str,
+        memory_cache_bytes: int,
+        disk_cache_bytes: int,
+        render_workers: int,
+        max_scale: int,
+        max_border: int,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.cache_dir = cache_dir
+        self.memory_cache_bytes = memory_cache_bytes
+        self.disk_cache_bytes = disk_cache_bytes
+        self.render_workers = render_workers
+        self.max_scale = max_scale
+        self.max_border = max_border
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_size = 0
+        # Concurrent requests for the same image share one render
+        self._pending: Dict[str, "asyncio.Future[bytes]"] = {}
+        self._executor: Optional[Executor] = None
+        self._written_since_prune = 0
+        self._prune_task: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.renders = 0
+        self.failed_renders = 0
+        self.disk_evictions = 0
+
+    @property
+    def available(self) -> bool:
+        return segno is not None
+
+    def spec(
+        self, url_hash: str, qr_options: Optional[Mapping[str, Any]], image_format: str
+    ) -> QRImageSpec:
+        payload = f"{self.base_url}/redirect/{url_hash}"
+        options = self._supported_options(qr_options or {})
+        material = json.dumps(
+            [payload, options, image_format, segno.__version__],
+            sort_keys=True,
+            separators=(",", ":"),
+        )
+        key = hashlib.sha256(material.encode()).hexdigest()
+        return QRImageSpec(key, payload, options, image_format)
+
+    async def render(self, spec: QRImageSpec) -> bytes:
+        content = self._memory_get(spec.key)
+        if content is not None:
+            self.hits += 1
+            return content
+        self.misses += 1
+
+        pending = self._pending.get(spec.key)
+        if pending is None:
+            pending = self._pending[spec.key] = asyncio.ensure_future(
+                self._load_or_render(spec)
+            )
+            pending.add_done_callback(lambda _: self._pending.pop(spec.key, None))
+        # Shielded so one cancelled request does not cancel the others waiting
+        return await asyncio.shield(pending)
+
+    async def prune_disk(self) -> int:
+        """Remove least recently used files over the disk cap, return their number"""
+        if not self.cache_dir or not self.disk_cache_bytes:
+            return 0
+        removed = await asyncio.to_thread(
+            _prune_dir, self.cache_dir, int(self.disk_cache_bytes * _PRUNE_TO)
+        )
+        self.disk_evictions += removed
+        return removed
+
+    async def stop(self) -> None:
+        if self._prune_task is not None:
+            self._prune_task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._prune_task
+            self._prune_task = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._memory),
+            "bytes": self._memory_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "disk_hits": self.disk_hits,
+            "renders": self.renders,
+            "failed_renders": self.failed_renders,
+            "disk_evictions": self.disk_evictions,
+        }
+
+    def clear(self) -> None:
+        self._memory.clear()
+        self._memory_size = 0
+
+    async def _load_or_render(self, spec: QRImageSpec) -> bytes:
+        path = self._path(spec)
+        content = None
+        if path is not None:
+            content = await asyncio.to_thread(_read_file, path)
+        if content is not None:
+            self.disk_hits += 1
+        else:
+            content = await self._render_in_pool(spec)
+            if path is not None:
+                try:
+                    await asyncio.to_thread(_write_file, path, content)
+                except OSError:
+                    logger.exception("Failed to store rendered QR image %s", path)
+                else:
+                    self._schedule_prune(len(content))
+        self._memory_set(spec.key, content)
+        return content
+
+    async def _render_in_pool(self, spec: QRImageSpec) -> bytes:
+        loop = asyncio.get_running_loop()
+        try:
+            content = await loop.run_in_executor(
+                self._get_executor(),
+                render_image,
+                spec.payload,
+                spec.options,
+                spec.image_format,
+            )
+        except Exception:
+            self.failed_renders += 1
+            raise
+        self.renders += 1
+        return content
+
+    def _schedule_prune(self, written: int) -> None:
+        if not self.disk_cache_bytes:
+            return
+        self._written_since_prune += written
+        if self._written_since_prune < self.disk_cache_bytes * _PRUNE_EVERY:
+            return
+        if self._prune_task is not None and not self._prune_task.done():
+            return
+        self._written_since_prune = 0
+        # Walking the directory is slow, the render that triggered it does not wait
+        self._prune_task = asyncio.create_task(self._prune_logged())
+
+    async def _prune_logged(self) -> None:
+        try:
+            await self.prune_disk()
+        except OSError:
+            logger.exception("Failed to prune QR image cache %s", self.cache_dir)
+
+    def _get_executor(self) -> Optional[Executor]:
+        # None selects the loop's default thread pool
+        if self._executor is None and self.render_workers > 0:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.render_workers,
+                mp_context=multiprocessing.get_context("forkserver"),
+            )
+        return self._executor
+
+    def _supported_options(self, qr_options: Mapping[str, Any]) -> Dict[str, Any]:
+        options = {}
+        for key in _MAKE_OPTIONS + _SAVE_OPTIONS:
+            if key not in qr_options:
+                continue
+            value = qr_options[key]
+            # JSON has no tuples, segno wants RGB(A) colors as tuples
+            options[key] = tuple(value) if isinstance(value, list) else value
+        bounds = {"scale": (1, self.max_scale), "border": (0, self.max_border)}
+        for key in _NUMERIC_OPTIONS:
+            if key not in options:
+                continue
+            value = options[key]
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                low, high = bounds[key]
+                options[key] = min(max(value, low), high)
+            else:
+                # segno would coerce some of these; render its default instead
+                del options[key]
+        return options
+
+    def _path(self, spec: QRImageSpec) -> Optional[str]:
+        if not self.cache_dir:
+            return None
+        return os.path.join(
+            self.cache_dir, spec.key[:2], f"{spec.key}.{spec.image_format}"
+        )
+
+    def _memory_get(self, key: str) -> Optional[bytes]:
+        content = self._memory.get(key)
+        if content is not None:
+            self._memory.move_to_end(key)
+        return content
+
+    def _memory_set(self, key: str, content: bytes) -> None:
+        if len(content) > self.memory_cache_bytes or key in self._memory:
+            return
+        self._memory[key] = content
+        self._memory_size += len(content)
+        while self._memory_size > self.memory_cache_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_size -= len(evicted)
+
+
+def _read_file(path: str) -> Optional[bytes]:
+    try:
+        with open(path, "rb") as f:
+            content = f.read()
+    except FileNotFoundError:
+        return None
+    # The mtime orders files for pruning, so a hit keeps an image cached
+    with suppress(OSError):
+        os.utime(path)
+    return content
+
+
+def _prune_dir(directory: str, target_bytes: int) -> int:
+    """Remove the oldest files until directory holds at most target_bytes"""
+    files = []
+    total = 0
+    with suppress(FileNotFoundError), os.scandir(directory) as shards:
+        for shard in shards:
+            if not shard.is_dir(follow_symlinks=False):
+                continue
+            with suppress(FileNotFoundError), os.scandir(shard.path) as entries:
+                for entry in entries:
+                    # Files being written are renamed into place, never pruned
+                    if entry.name.startswith(_TMP_PREFIX):
+                        continue
+                    with suppress(FileNotFoundError):
+                        stat = entry.stat(follow_symlinks=False)
+                        files.append((stat.st_mtime, stat.st_size, entry.path))
+                        total += stat.st_size
+
+    removed = 0
+    for _, size, path in sorted(files):
+        if total <= target_bytes:
+            break
+        # Another worker may be pruning the same directory
+        with suppress(FileNotFoundError):
+            os.remove(path)
+            removed += 1
+        total -= size
+    return removed
+
+
+def _write_file(path: str, content: bytes) -> None:
+    """Written next to path and moved into place, so readers never see a part"""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=_TMP_PREFIX)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    except BaseException:
+        with suppress(FileNotFoundError):
+            os.remove(tmp_path)
+        raise
+
+
+qr_image_renderer = QRImageRenderer(
+    base_url=qr_image_settings.base_url,
+    cache_dir=qr_image_settings.cache_dir,
+    memory_cache_bytes=qr_image_settings.memory_cache_bytes,
+    disk_cache_bytes=qr_image_settings.disk_cache_bytes,
+    render_workers=qr_image_settings.render_workers,
+    max_scale=qr_image_settings.max_scale,
+    max_border=qr_image_settings.max_border,
+)
+
+__all__ = ("QRImageRenderer", "qr_image_renderer", "render_image")
@@ -0,0 +1,181 @@
+import asyncio
+import logging
+import sys
+import time
+from contextlib import suppress
+from datetime import datetime, timedelta
+from typing import Any, AsyncContextManager, Callable, Dict, Optional, Tuple
+
+from sqlalchemy import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.redirect_serv.apps.qr_manager.repositories import QRCodeRepository
+from src.redirect_serv.apps.qr_manager.schemas import RedirectTarget
+from src.redirect_serv.core.config import cache_settings
+
+logger = logging.getLogger(__name__)
+
+SessionFactory = Callable[[], AsyncContextManager[AsyncSession]]
+
+# Delta syncs re-read changes this far behind the newest updated_at seen, to
+# catch transactions that committed after a later timestamp was already read
+_SYNC_LOOKBACK = timedelta(seconds=5)
+
+
+class RedirectTable:
+    """Every hash -> redirect target mapping, held in memory by each worker.
+
+    Loaded in full at startup, then kept current by polling for rows whose
+    updated_at (on qr_codes, company_branches or companies) moved. Deletions
+    are detected by a row count mismatch, which triggers a full reload.
+    Keys are the 32 raw bytes of the hex url_hash.
+    """
+
+    def __init__(self, enabled: bool, poll_interval: float, reload_interval: float):
+        self.enabled = enabled
+        self.poll_interval = poll_interval
+        self.reload_interval = reload_interval
+        self._entries: Dict[bytes, RedirectTarget] = {}
+        self._keys_by_id: Dict[int, bytes] = {}
+        self._watermark: Optional[datetime] = None
+        self._loaded = False
+        self._loaded_at = 0.0
+        self._synced_at = 0.0
+        self._session_factory: Optional[SessionFactory] = None
+        self._task: Optional[asyncio.Task] = None
+
+        self.hits = 0
+        self.misses = 0
+        self.full_reloads = 0
+        self.delta_rows = 0
+
+    @property
+    def ready(self) -> bool:
+        return self._loaded
+
+    @property
+    def lag_seconds(self) -> Optional[float]:
+        """Seconds since the table was last confirmed in sync with the DB"""
+        return time.monotonic() - self._synced_at if self._loaded else None
+
+    def get(self, url_hash: str) -> Optional[RedirectTarget]:
+        if not self._loaded:
+            return None
+        try:
+            target = self._entries.get(bytes.fromhex(url_hash))
+        except ValueError:
+            target = None
+        if target is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return target
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def reload(self) -> None:
+        assert self._session_factory is not None
+        entries: Dict[bytes, RedirectTarget] = {}
+        keys_by_id: Dict[int, bytes] = {}
+        watermark: Optional[datetime] = None
+
+        async with self._session_factory() as session:
+            async for row in QRCodeRepository(session).stream_redirect_rows():
+                key, target = self._entry(row)
+                entries[key] = target
+                keys_by_id[target.qr_code_id] = key
+                watermark = self._newest(watermark, row)
+
+        self._entries = entries
+        self._keys_by_id = keys_by_id
+        self._watermark = watermark
+        self._loaded = True
+        self._loaded_at = self._synced_at = time.monotonic()
+        self.full_reloads += 1
+
+    async def sync(self) -> None:
+        if not self._loaded:
+            await self.reload()
+            return
+
+        assert self._session_factory is not None
+        async with self._session_factory() as session:
+            repository = QRCodeRepository(session)
+            since = self._watermark - _SYNC_LOOKBACK if self._watermark else None
+            async for row in repository.stream_redirect_rows(changed_since=since):
+                key, target = self._entry(row)
+                previous_key = self._keys_by_id.get(target.qr_code_id)
+                if previous_key is not None and previous_key != key:
+                    self._entries.pop(previous_key, None)
+                self._entries[key] = target
+                self._keys_by_id[target.qr_code_id] = key
+                self._watermark = self._newest(self._watermark, row)
+                self.delta_rows += 1
+
+            count = await repository.count_redirect_targets()
+
+        if count != len(self._entries):
+            await self.reload()
+        else:
+            self._synced_at = time.monotonic()
+
+    @staticmethod
+    def _entry(row: Row) -> Tuple[bytes, RedirectTarget]:
+        return bytes.fromhex(row.url_hash), RedirectTarget(
+            qr_code_id=row.id,
+            company_branch_id=row.company_branch_id,
+            subdomain=sys.intern(row.subdomain),
+        )
+
+    @staticmethod
+    def _newest(watermark: Optional[datetime], row: Row) -> datetime:
+        newest = max(row.updated_at, row.branch_updated_at, row.company_updated_at)
+        return newest if watermark is None else max(watermark, newest)
+
+    async def start(self, session_factory: SessionFactory) -> None:
+        self._session_factory = session_factory
+        if self.enabled and self._task is None:
+            try:
+                await self.reload()
+            except Exception:
+                logger.exception("Initial redirect table load failed")
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                if time.monotonic() - self._loaded_at >= self.reload_interval:
+                    await self.reload()
+                else:
+                    await self.sync()
+            except Exception:
+                logger.exception("Failed to sync redirect table")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "entries": len(self._entries),
+            "lag_seconds": self.lag_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "full_reloads": self.full_reloads,
+            "delta_rows": self.delta_rows,
+        }
+
+
+redirect_table = RedirectTable(
+    enabled=cache_settings.redirect_table_enabled,
+    poll_interval=cache_settings.redirect_table_poll_interval,
+    reload_interval=cache_settings.redirect_table_reload_interval,
+)
+
+__all__ = ("RedirectTable", "redirect_table")
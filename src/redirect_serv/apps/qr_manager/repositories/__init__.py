@@ -1,3 +1,15 @@
+from .access_log_offset_repository import AccessLogOffsetRepository
 from .qr_code_repository import QRCodeRepository
+from .scan_count_shard_repository import ScanCountShardRepository
+from .scan_event_repository import ScanEventRepository
+from .scan_rollup_repository import ScanRollupRepository
+from .visitor_sketch_repository import VisitorSketchRepository
 
-__all__ = ("QRCodeRepository",)
+__all__ = (
+    "AccessLogOffsetRepository",
+    "QRCodeRepository",
+    "ScanCountShardRepository",
+    "ScanEventRepository",
+    "ScanRollupRepository",
+    "VisitorSketchRepository",
+)
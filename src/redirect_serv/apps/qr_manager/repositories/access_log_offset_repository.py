@@ -0,0 +1,66 @@
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import Row, delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.redirect_serv.apps.qr_manager.models import AccessLogOffset
+from src.redirect_serv.core.repositories import BaseRepository
+
+_offsets = AccessLogOffset.__table__
+
+
+class AccessLogOffsetRepository(BaseRepository[AccessLogOffset]):
+    def __init__(self, session: AsyncSession):
+        super().__init__(AccessLogOffset, session)
+
+    async def get(self, file_id: str) -> Optional[Row]:
+        result = await self.session.execute(
+            select(_offsets).where(_offsets.c.file_id == file_id)
+        )
+        return result.first()
+
+    async def advance(
+        self,
+        file_id: str,
+        path: str,
+        head_size: int,
+        head_digest: bytes,
+        expected_offset: Optional[int],
+        offset: int,
+    ) -> bool:
+        """Move a file's offset, unless it is no longer expected_offset.
+
+        expected_offset None claims a file seen for the first time. Meant to
+        run first in the batch transaction: the row lock it takes serialises
+        concurrent ingestion of the same file, and False means another run
+        got there first.
+        """
+        values = {
+            "path": path,
+            "head_size": head_size,
+            "head_digest": head_digest,
+            "offset": offset,
+            "updated_at": datetime.now(timezone.utc),
+        }
+        if expected_offset is None:
+            inserted = await self.bulk_upsert(
+                [{"file_id": file_id, **values}],
+                conflict_columns=("file_id",),
+                returning=("file_id",),
+            )
+            return bool(inserted)
+
+        result = await self.session.execute(
+            update(_offsets)
+            .where(_offsets.c.file_id == file_id)
+            .where(_offsets.c.offset == expected_offset)
+            .values(**values)
+        )
+        return result.rowcount == 1
+
+    async def forget(self, file_id: str) -> None:
+        await self.session.execute(
+            delete(_offsets).where(_offsets.c.file_id == file_id)
+        )
+        await self.session.commit()
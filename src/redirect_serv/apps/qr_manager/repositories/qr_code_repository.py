@@ -1,16 +1,93 @@
-from typing import Optional
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Set, Tuple
 
-from sqlalchemy import select
+from sqlalchemy import (
+    Executable,
+    Integer,
+    Row,
+    bindparam,
+    case,
+    column,
+    func,
+    or_,
+    select,
+    update,
+    values,
+)
+from sqlalchemy.dialects.postgresql import TIMESTAMP
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from src.redirect_serv.apps.company.models.company_branch import CompanyBranch
+from src.redirect_serv.apps.company.models import Company, CompanyBranch
 from src.redirect_serv.apps.qr_manager.models import QRCode
+from src.redirect_serv.apps.qr_manager.schemas import RedirectTarget
+from src.redirect_serv.core.replicas import replica_router
+from src.redirect_serv.core.repositories import BaseRepository
 
+# (qr_code_id, scans, last_scanned)
+ScanCountRow = Tuple[int, int, datetime]
 
-class QRCodeRepository:
+
+def _latest(current, candidate):
+    return case(
+        (current.is_(None), candidate),
+        (current < candidate, candidate),
+        else_=current,
+    )
+
+
+_qr_codes = QRCode.__table__
+_company_branches = CompanyBranch.__table__
+_companies = Company.__table__
+
+_redirect_join = _qr_codes.join(
+    _company_branches, _company_branches.c.id == _qr_codes.c.company_branch_id
+).join(_companies, _companies.c.id == _company_branches.c.company_id)
+
+# Built once so every lookup reuses the same cached compiled statement
+_REDIRECT_TARGET_QUERY = (
+    select(_qr_codes.c.id, _qr_codes.c.company_branch_id, _companies.c.subdomain)
+    .select_from(_redirect_join)
+    .where(_qr_codes.c.url_hash == bindparam("url_hash"))
+)
+
+_QR_OPTIONS_QUERY = select(_qr_codes.c.qr_options).where(
+    _qr_codes.c.url_hash == bindparam("url_hash")
+)
+
+# Full redirect table with the change timestamps of every joined row
+_REDIRECT_ROWS_QUERY = select(
+    _qr_codes.c.url_hash,
+    _qr_codes.c.id,
+    _qr_codes.c.company_branch_id,
+    _companies.c.subdomain,
+    _qr_codes.c.updated_at,
+    _company_branches.c.updated_at.label("branch_updated_at"),
+    _companies.c.updated_at.label("company_updated_at"),
+).select_from(_redirect_join)
+
+
+# Resolves the hash and bumps the counter in one statement; the row lock taken
+# by the UPDATE serialises concurrent scans of the same code. Counter writes
+# keep updated_at as is: it tracks changes to the redirect mapping only.
+_INCREMENT_AND_RETURN_TARGET = (
+    update(_qr_codes)
+    .where(_qr_codes.c.url_hash == bindparam("b_url_hash"))
+    .where(_company_branches.c.id == _qr_codes.c.company_branch_id)
+    .where(_companies.c.id == _company_branches.c.company_id)
+    .values(
+        scan_count=_qr_codes.c.scan_count + 1,
+        last_scanned=bindparam("b_scanned_at"),
+        updated_at=_qr_codes.c.updated_at,
+    )
+    .returning(_qr_codes.c.id, _qr_codes.c.company_branch_id, _companies.c.subdomain)
+)
+
+
+class QRCodeRepository(BaseRepository[QRCode]):
     def __init__(self, session: AsyncSession):
-        self.session = session
+        super().__init__(QRCode, session)
 
     async def get_by_url_hash_with_branch(self, url_hash: str) -> Optional[QRCode]:
         result = await self.session.execute(
@@ -22,9 +99,225 @@ class QRCodeRepository:
         )
         return result.scalar_one_or_none()
 
-    async def increment_scan_count(self, qr_code: QRCode) -> None:
-        from datetime import datetime, timezone
+    async def get_redirect_target(self, url_hash: str) -> Optional[RedirectTarget]:
+        """Resolve a hash to its redirect target in one joined Core query"""
+        row = await self._read_first(
+            _REDIRECT_TARGET_QUERY, {"url_hash": url_hash}, url_hash
+        )
+        return RedirectTarget(*row) if row is not None else None
+
+    async def _read_first(
+        self, statement: Executable, params: Dict[str, Any], url_hash: str
+    ) -> Optional[Row]:
+        """First row from a healthy read replica, or from the primary.
+
+        A replica miss is retried on the primary, since the hash may have
+        been created by another process within the replication lag.
+        """
+        replica = replica_router.choose(url_hash)
+        if replica is not None:
+            try:
+                async with replica.engine.connect() as conn:
+                    row = (await conn.execute(statement, params)).first()
+            except (SQLAlchemyError, OSError) as e:
+                replica_router.mark_failed(replica, e)
+            else:
+                replica_router.replica_reads += 1
+                if row is not None:
+                    return row
+            replica_router.primary_fallbacks += 1
+
+        result = await self.session.execute(statement, params)
+        return result.first()
+
+    async def get_redirect_target_and_increment_scan(
+        self, url_hash: str
+    ) -> Optional[RedirectTarget]:
+        """Resolve a hash and count the scan in a single UPDATE ... RETURNING.
+
+        SQLite cannot return columns of the joined tables from an UPDATE, so
+        other dialects fall back to a lookup followed by an atomic increment.
+        """
+        scanned_at = datetime.now(timezone.utc)
+        if not self._is_postgresql:
+            target = await self.get_redirect_target(url_hash)
+            if target is not None:
+                await self.increment_scan_count_by_id(target.qr_code_id)
+            return target
+
+        result = await self.session.execute(
+            _INCREMENT_AND_RETURN_TARGET,
+            {"b_url_hash": url_hash, "b_scanned_at": scanned_at},
+        )
+        row = result.first()
+        await self.session.commit()
+        return RedirectTarget(*row) if row is not None else None
+
+    async def get_id_by_company_branch_id(
+        self, company_branch_id: int
+    ) -> Optional[int]:
+        return await self.session.scalar(
+            select(_qr_codes.c.id).where(
+                _qr_codes.c.company_branch_id == company_branch_id
+            )
+        )
+
+    async def get_qr_options(self, url_hash: str) -> Optional[Dict[str, Any]]:
+        """qr_options of the code with this hash ({} when unset), None if unknown"""
+        row = await self._read_first(
+            _QR_OPTIONS_QUERY, {"url_hash": url_hash}, url_hash
+        )
+        return None if row is None else row.qr_options or {}
+
+    async def get_ids_by_url_hashes(self, url_hashes: List[str]) -> Dict[str, int]:
+        result = await self.session.execute(
+            select(_qr_codes.c.url_hash, _qr_codes.c.id).where(
+                _qr_codes.c.url_hash.in_(url_hashes)
+            )
+        )
+        return dict(result.all())
+
+    async def get_existing_branch_ids(self, company_branch_ids: List[int]) -> Set[int]:
+        result = await self.session.execute(
+            select(_company_branches.c.id).where(
+                _company_branches.c.id.in_(company_branch_ids)
+            )
+        )
+        return set(result.scalars().all())
+
+    async def get_url_hashes_by_branch_ids(
+        self, company_branch_ids: List[int]
+    ) -> Dict[int, str]:
+        result = await self.session.execute(
+            select(_qr_codes.c.company_branch_id, _qr_codes.c.url_hash).where(
+                _qr_codes.c.company_branch_id.in_(company_branch_ids)
+            )
+        )
+        return dict(result.all())
+
+    async def insert_qr_codes(self, url_hashes: Dict[int, str]) -> Dict[int, str]:
+        """Insert codes for branches in one statement, skipping any conflict.
+
+        Returns the rows actually inserted; a branch that already has a code
+        or a (practically impossible) duplicate hash is left out.
+        """
+        rows = await self.bulk_upsert(
+            (
+                {"company_branch_id": branch_id, "url_hash": url_hash}
+                for branch_id, url_hash in url_hashes.items()
+            ),
+            conflict_columns=(),
+            returning=("company_branch_id", "url_hash"),
+            chunk_size=max(len(url_hashes), 1),
+        )
+        return dict(rows)
+
+    async def count_all(self) -> int:
+        result = await self.session.execute(select(func.count()).select_from(_qr_codes))
+        return result.scalar_one()
+
+    async def stream_url_hashes(
+        self,
+        after_id: int = 0,
+        changed_since: Optional[datetime] = None,
+        chunk_size: int = 10000,
+    ) -> AsyncIterator[Tuple[int, str, datetime]]:
+        """Yield (id, url_hash, updated_at) for codes with id above after_id
+        or, given changed_since, updated after it, in id order"""
+        condition = _qr_codes.c.id > after_id
+        if changed_since is not None:
+            condition = or_(condition, _qr_codes.c.updated_at > changed_since)
+        result = await self.session.stream(
+            select(_qr_codes.c.id, _qr_codes.c.url_hash, _qr_codes.c.updated_at)
+            .where(condition)
+            .order_by(_qr_codes.c.id)
+            .execution_options(yield_per=chunk_size)
+        )
+        async for qr_code_id, url_hash, updated_at in result:
+            yield qr_code_id, url_hash, updated_at
 
+    async def count_redirect_targets(self) -> int:
+        result = await self.session.execute(
+            select(func.count()).select_from(_redirect_join)
+        )
+        return result.scalar_one()
+
+    async def stream_redirect_rows(
+        self, changed_since: Optional[datetime] = None, chunk_size: int = 10000
+    ) -> AsyncIterator[Row]:
+        """Yield redirect rows, optionally only those where any joined row changed"""
+        query = _REDIRECT_ROWS_QUERY
+        if changed_since is not None:
+            query = query.where(
+                or_(
+                    _qr_codes.c.updated_at > changed_since,
+                    _company_branches.c.updated_at > changed_since,
+                    _companies.c.updated_at > changed_since,
+                )
+            )
+        result = await self.session.stream(
+            query.execution_options(yield_per=chunk_size)
+        )
+        async for row in result:
+            yield row
+
+    async def increment_scan_count(self, qr_code: QRCode) -> None:
         qr_code.scan_count += 1
         qr_code.last_scanned = datetime.now(timezone.utc)
         await self.session.commit()
+
+    async def increment_scan_count_by_id(self, qr_code_id: int) -> None:
+        await self.session.execute(
+            update(QRCode)
+            .where(QRCode.id == qr_code_id)
+            .values(
+                scan_count=QRCode.scan_count + 1,
+                last_scanned=datetime.now(timezone.utc),
+                updated_at=QRCode.updated_at,
+            )
+        )
+        await self.session.commit()
+
+    async def apply_scan_counts(
+        self, rows: Iterable[ScanCountRow], commit: bool = True
+    ) -> None:
+        """Add aggregated scans to many QR codes, keeping the latest last_scanned"""
+        rows = list(rows)
+        if not rows:
+            return
+
+        table = _qr_codes
+        if self._is_postgresql:
+            batch = values(
+                column("qr_code_id", Integer),
+                column("scans", Integer),
+                column("scanned_at", TIMESTAMP(timezone=True)),
+                name="batch",
+            ).data(rows)
+            await self.session.execute(
+                update(table)
+                .where(table.c.id == batch.c.qr_code_id)
+                .values(
+                    scan_count=table.c.scan_count + batch.c.scans,
+                    last_scanned=_latest(table.c.last_scanned, batch.c.scanned_at),
+                    updated_at=table.c.updated_at,
+                )
+            )
+        else:
+            await self.session.execute(
+                update(table)
+                .where(table.c.id == bindparam("b_qr_code_id"))
+                .values(
+                    scan_count=table.c.scan_count + bindparam("b_scans"),
+                    last_scanned=_latest(
+                        table.c.last_scanned, bindparam("b_scanned_at")
+                    ),
+                    updated_at=table.c.updated_at,
+                ),
+                [
+                    {"b_qr_code_id": qr_code_id, "b_scans": scans, "b_scanned_at": at}
+                    for qr_code_id, scans, at in rows
+                ],
+            )
+        if commit:
+            await self.session.commit()
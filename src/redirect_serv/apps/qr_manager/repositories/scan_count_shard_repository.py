@@ -0,0 +1,86 @@
+from datetime import datetime
+from typing import Dict, Iterable, List
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.redirect_serv.apps.qr_manager.models import QRCode, ScanCountShard
+from src.redirect_serv.apps.qr_manager.repositories.qr_code_repository import (
+    ScanCountRow,
+    _latest,
+)
+
+_shards = ScanCountShard.__table__
+_qr_codes = QRCode.__table__
+
+
+class ScanCountShardRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    @property
+    def _is_postgresql(self) -> bool:
+        return self.session.bind.dialect.name == "postgresql"
+
+    async def increment(
+        self, qr_code_id: int, shard: int, scanned_at: datetime, commit: bool = True
+    ) -> None:
+        """Count one scan into a shard row, creating it on first use"""
+        insert = postgresql_insert if self._is_postgresql else sqlite_insert
+        statement = insert(_shards).values(
+            qr_code_id=qr_code_id, shard=shard, scans=1, last_scanned=scanned_at
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=["qr_code_id", "shard"],
+            set_={
+                "scans": _shards.c.scans + statement.excluded.scans,
+                "last_scanned": _latest(
+                    _shards.c.last_scanned, statement.excluded.last_scanned
+                ),
+            },
+        )
+        await self.session.execute(statement)
+        if commit:
+            await self.session.commit()
+
+    async def take_all(self) -> List[ScanCountRow]:
+        """Delete every shard row, returning its scans summed per QR code.
+
+        Meant to run in the transaction that adds them to qr_codes: a
+        concurrent increment waits for the deleted row and then starts a
+        new one, so no scan is lost or counted twice.
+        """
+        result = await self.session.execute(
+            delete(_shards).returning(
+                _shards.c.qr_code_id, _shards.c.scans, _shards.c.last_scanned
+            )
+        )
+        totals: Dict[int, ScanCountRow] = {}
+        for qr_code_id, scans, last_scanned in result.all():
+            total = totals.get(qr_code_id)
+            if total is not None:
+                scans += total[1]
+                last_scanned = max(last_scanned, total[2])
+            totals[qr_code_id] = (qr_code_id, scans, last_scanned)
+        return list(totals.values())
+
+    async def get_scan_counts(self, qr_code_ids: Iterable[int]) -> Dict[int, int]:
+        """Total scans per QR code: scan_count plus uncompacted shard scans"""
+        qr_code_ids = list(qr_code_ids)
+        pending = (
+            select(_shards.c.qr_code_id, func.sum(_shards.c.scans).label("scans"))
+            .where(_shards.c.qr_code_id.in_(qr_code_ids))
+            .group_by(_shards.c.qr_code_id)
+            .subquery()
+        )
+        result = await self.session.execute(
+            select(
+                _qr_codes.c.id,
+                _qr_codes.c.scan_count + func.coalesce(pending.c.scans, 0),
+            )
+            .outerjoin(pending, pending.c.qr_code_id == _qr_codes.c.id)
+            .where(_qr_codes.c.id.in_(qr_code_ids))
+        )
+        return dict(result.all())
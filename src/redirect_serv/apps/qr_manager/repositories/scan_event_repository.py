@@ -0,0 +1,172 @@
+import logging
+import re
+from datetime import date, datetime, time, timedelta, timezone
+from typing import List, Sequence
+
+from sqlalchemy import insert, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.redirect_serv.apps.qr_manager.models import ScanEvent
+from src.redirect_serv.apps.qr_manager.schemas import ScanEventRecord
+
+logger = logging.getLogger(__name__)
+
+_scan_events = ScanEvent.__table__
+_COLUMNS = list(ScanEventRecord._fields)
+
+_PARTITION_PREFIX = "scan_events_p"
+_PARTITION_RE = re.compile(rf"{_PARTITION_PREFIX}(\d{{8}})")
+_DEFAULT_PARTITION = "scan_events_default"
+
+
+def partition_name(day: date) -> str:
+    return f"{_PARTITION_PREFIX}{day:%Y%m%d}"
+
+
+def _day_start(day: date) -> str:
+    return datetime.combine(day, time.min, tzinfo=timezone.utc).isoformat()
+
+
+class ScanEventRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    @property
+    def _is_postgresql(self) -> bool:
+        return self.session.bind.dialect.name == "postgresql"
+
+    async def insert_many(self, records: Sequence[ScanEventRecord]) -> None:
+        """Append events with COPY on PostgreSQL, multi-row INSERT elsewhere"""
+        if not records:
+            return
+
+        if self._is_postgresql:
+            connection = await self.session.connection()
+            raw = await connection.get_raw_connection()
+            await raw.driver_connection.copy_records_to_table(
+                _scan_events.name, records=records, columns=_COLUMNS
+            )
+        else:
+            await self.session.execute(
+                insert(_scan_events), [record._asdict() for record in records]
+            )
+        await self.session.commit()
+
+    async def ensure_partitions(self, first_day: date, days: int) -> List[str]:
+        """Create daily partitions (and the default one) on PostgreSQL.
+
+        Events of a day without a partition land in the default partition,
+        and PostgreSQL refuses to create that day's partition while they are
+        there; such a day gets its rows moved out of the default partition.
+        Each day is committed on its own, so one failure does not hold back
+        the partitions of later days.
+        """
+        if not self._is_postgresql:
+            return []
+
+        await self.session.execute(
+            text(
+                f"CREATE TABLE IF NOT EXISTS {_DEFAULT_PARTITION} "
+                f"PARTITION OF {_scan_events.name} DEFAULT"
+            )
+        )
+        await self.session.commit()
+
+        existing = set(await self._partitions())
+        names = []
+        for offset in range(days):
+            day = first_day + timedelta(days=offset)
+            name = partition_name(day)
+            names.append(name)
+            if name in existing:
+                continue
+            try:
+                await self._create_partition(day)
+                await self.session.commit()
+            except Exception:
+                await self.session.rollback()
+                logger.exception("Failed to create scan_events partition %s", name)
+        return names
+
+    async def _create_partition(self, day: date) -> None:
+        name = partition_name(day)
+        bounds = {"start": _day_start(day), "end": _day_start(day + timedelta(days=1))}
+        # Partition names and bounds are generated from dates, never user input
+        create = (
+            f"CREATE TABLE IF NOT EXISTS {name} "  # nosec B608
+            f"PARTITION OF {_scan_events.name} "
+            f"FOR VALUES FROM ('{bounds['start']}') TO ('{bounds['end']}')"
+        )
+        stranded = await self.session.scalar(
+            text(
+                f"SELECT EXISTS (SELECT 1 FROM {_DEFAULT_PARTITION} "  # nosec B608
+                "WHERE scanned_at >= CAST(:start AS timestamptz) "
+                "AND scanned_at < CAST(:end AS timestamptz))"
+            ),
+            bounds,
+        )
+        if not stranded:
+            await self.session.execute(text(create))
+            return
+
+        # The default partition is detached while the day is carved out of it;
+        # inserts into scan_events wait on the lock until the commit
+        columns = ", ".join(_COLUMNS)
+        await self.session.execute(
+            text(
+                f"ALTER TABLE {_scan_events.name} DETACH PARTITION {_DEFAULT_PARTITION}"
+            )
+        )
+        await self.session.execute(text(create))
+        await self.session.execute(
+            text(
+                f"WITH moved AS (DELETE FROM {_DEFAULT_PARTITION} "  # nosec B608
+                "WHERE scanned_at >= CAST(:start AS timestamptz) "
+                "AND scanned_at < CAST(:end AS timestamptz) "
+                f"RETURNING {columns}) "
+                f"INSERT INTO {name} ({columns}) SELECT {columns} FROM moved"
+            ),
+            bounds,
+        )
+        await self.session.execute(
+            text(
+                f"ALTER TABLE {_scan_events.name} "
+                f"ATTACH PARTITION {_DEFAULT_PARTITION} DEFAULT"
+            )
+        )
+
+    async def _partitions(self) -> List[str]:
+        result = await self.session.execute(
+            text(
+                "SELECT child.relname FROM pg_inherits "
+                "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+                "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+                "WHERE parent.relname = :parent"
+            ),
+            {"parent": _scan_events.name},
+        )
+        return [name for (name,) in result]
+
+    async def drop_partitions_before(self, day: date) -> List[str]:
+        """Drop daily partitions that only hold events older than day.
+
+        Older events stranded in the default partition are deleted as well.
+        """
+        if not self._is_postgresql:
+            return []
+
+        dropped = []
+        for name in await self._partitions():
+            match = _PARTITION_RE.fullmatch(name)
+            if match and datetime.strptime(match.group(1), "%Y%m%d").date() < day:
+                await self.session.execute(text(f"DROP TABLE IF EXISTS {name}"))
+                dropped.append(name)
+        await self.session.execute(
+            text(
+                f"DELETE FROM {_DEFAULT_PARTITION} "  # nosec B608
+                "WHERE scanned_at < CAST(:cutoff AS timestamptz)"
+            ),
+            {"cutoff": _day_start(day)},
+        )
+        await self.session.commit()
+        return sorted(dropped)
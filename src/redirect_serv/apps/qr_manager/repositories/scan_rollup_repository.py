@@ -0,0 +1,126 @@
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Dict, List, Mapping, Tuple
+
+from sqlalchemy import Table, select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.redirect_serv.apps.company.models import CompanyBranch
+from src.redirect_serv.apps.qr_manager.models import (
+    CompanyScanDailyRollup,
+    QRCode,
+    ScanDailyRollup,
+    ScanHourlyRollup,
+)
+from src.redirect_serv.apps.qr_manager.schemas import ScanSeriesPoint
+
+# (qr_code_id, hour) -> scans
+HourlyScans = Mapping[Tuple[int, datetime], int]
+
+_hourly = ScanHourlyRollup.__table__
+_daily = ScanDailyRollup.__table__
+_company_daily = CompanyScanDailyRollup.__table__
+_qr_codes = QRCode.__table__
+_company_branches = CompanyBranch.__table__
+
+
+class ScanRollupRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    @property
+    def _is_postgresql(self) -> bool:
+        return self.session.bind.dialect.name == "postgresql"
+
+    async def apply_hourly_scans(self, scans: HourlyScans, commit: bool = True) -> None:
+        """Add hourly scan counts to the hourly, daily and per-company rollups"""
+        if not scans:
+            return
+
+        daily: Dict[Tuple[int, date], int] = defaultdict(int)
+        for (qr_code_id, hour), count in scans.items():
+            daily[(qr_code_id, hour.date())] += count
+
+        companies = await self._company_ids({qr_code_id for qr_code_id, _ in daily})
+        company_daily: Dict[Tuple[int, date], int] = defaultdict(int)
+        for (qr_code_id, day), count in daily.items():
+            company_id = companies.get(qr_code_id)
+            if company_id is not None:
+                company_daily[(company_id, day)] += count
+
+        await self._upsert(_hourly, ("qr_code_id", "hour"), scans)
+        await self._upsert(_daily, ("qr_code_id", "day"), daily)
+        await self._upsert(_company_daily, ("company_id", "day"), company_daily)
+        if commit:
+            await self.session.commit()
+
+    async def _company_ids(self, qr_code_ids) -> Dict[int, int]:
+        result = await self.session.execute(
+            select(_qr_codes.c.id, _company_branches.c.company_id)
+            .join(
+                _company_branches,
+                _company_branches.c.id == _qr_codes.c.company_branch_id,
+            )
+            .where(_qr_codes.c.id.in_(qr_code_ids))
+        )
+        return dict(result.all())
+
+    async def _upsert(
+        self, table: Table, key: Tuple[str, str], scans: Mapping[Tuple, int]
+    ) -> None:
+        if not scans:
+            return
+
+        insert = postgresql_insert if self._is_postgresql else sqlite_insert
+        statement = insert(table)
+        statement = statement.on_conflict_do_update(
+            index_elements=list(key),
+            set_={"scans": table.c.scans + statement.excluded.scans},
+        )
+        # Sorted so concurrent flushes from several workers lock rows in the
+        # same order and cannot deadlock each other
+        await self.session.execute(
+            statement,
+            [
+                {key[0]: series, key[1]: bucket, "scans": count}
+                for (series, bucket), count in sorted(scans.items())
+            ],
+        )
+
+    async def hourly_series(
+        self, qr_code_id: int, start: datetime, end: datetime
+    ) -> List[ScanSeriesPoint]:
+        return await self._series(
+            _hourly, _hourly.c.qr_code_id, qr_code_id, _hourly.c.hour, start, end
+        )
+
+    async def daily_series(
+        self, qr_code_id: int, start: date, end: date
+    ) -> List[ScanSeriesPoint]:
+        return await self._series(
+            _daily, _daily.c.qr_code_id, qr_code_id, _daily.c.day, start, end
+        )
+
+    async def company_daily_series(
+        self, company_id: int, start: date, end: date
+    ) -> List[ScanSeriesPoint]:
+        return await self._series(
+            _company_daily,
+            _company_daily.c.company_id,
+            company_id,
+            _company_daily.c.day,
+            start,
+            end,
+        )
+
+    async def _series(self, table, series_column, series_id, bucket_column, start, end):
+        """Buckets in [start, end), read with a primary key range scan"""
+        result = await self.session.execute(
+            select(bucket_column, table.c.scans)
+            .where(series_column == series_id)
+            .where(bucket_column >= start, bucket_column < end)
+            .order_by(bucket_column)
+        )
+        return [ScanSeriesPoint(bucket, scans) for bucket, scans in result]
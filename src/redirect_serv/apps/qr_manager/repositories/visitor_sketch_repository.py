@@ -0,0 +1,96 @@
+from datetime import date
+from typing import List, Mapping, Tuple
+
+from sqlalchemy import bindparam, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.redirect_serv.apps.qr_manager.models import VisitorDailySketch
+from src.redirect_serv.core.hyperloglog import HyperLogLog
+
+# (qr_code_id, day) -> serialised HyperLogLog registers
+DailySketches = Mapping[Tuple[int, date], bytes]
+
+_sketches = VisitorDailySketch.__table__
+
+
+class VisitorSketchRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    @property
+    def _is_postgresql(self) -> bool:
+        return self.session.bind.dialect.name == "postgresql"
+
+    async def merge_sketches(
+        self, sketches: DailySketches, commit: bool = True
+    ) -> None:
+        """Union sketches into the stored ones, creating missing days.
+
+        Missing rows are inserted first, then exactly the rows of the batch
+        are locked, merged in Python and written back. Merging is idempotent,
+        so a batch retried after a failure is never counted twice. The
+        register-wise maximum has no SQL form, hence no ON CONFLICT merge.
+        """
+        if not sketches:
+            return
+
+        # Sorted so concurrent flushes from several workers lock rows in the
+        # same order and cannot deadlock each other
+        insert = postgresql_insert if self._is_postgresql else sqlite_insert
+        await self.session.execute(
+            insert(_sketches).on_conflict_do_nothing(
+                index_elements=["qr_code_id", "day"]
+            ),
+            [
+                {"qr_code_id": qr_code_id, "day": day, "registers": registers}
+                for (qr_code_id, day), registers in sorted(sketches.items())
+            ],
+        )
+
+        result = await self.session.execute(
+            select(_sketches.c.qr_code_id, _sketches.c.day, _sketches.c.registers)
+            # By (qr_code_id, day) pair: separate IN lists would lock and read
+            # every code's row for every day of the batch
+            .where(
+                tuple_(_sketches.c.qr_code_id, _sketches.c.day).in_(sorted(sketches))
+            )
+            .order_by(_sketches.c.qr_code_id, _sketches.c.day)
+            .with_for_update()
+        )
+        changed = []
+        for qr_code_id, day, registers in result:
+            added = sketches[(qr_code_id, day)]
+            if added == registers:
+                continue
+            sketch = HyperLogLog.from_bytes(registers)
+            sketch.merge(HyperLogLog.from_bytes(added))
+            merged = sketch.to_bytes()
+            if merged != registers:
+                changed.append(
+                    {"b_qr_code_id": qr_code_id, "b_day": day, "b_registers": merged}
+                )
+
+        if changed:
+            await self.session.execute(
+                update(_sketches)
+                .where(_sketches.c.qr_code_id == bindparam("b_qr_code_id"))
+                .where(_sketches.c.day == bindparam("b_day"))
+                .values(registers=bindparam("b_registers")),
+                changed,
+            )
+        if commit:
+            await self.session.commit()
+
+    async def daily_sketches(
+        self, qr_code_id: int, start: date, end: date
+    ) -> List[Tuple[date, bytes]]:
+        """(day, registers) for days in [start, end), a primary key range scan"""
+        result = await self.session.execute(
+            select(_sketches.c.day, _sketches.c.registers)
+            .where(_sketches.c.qr_code_id == qr_code_id)
+            .where(_sketches.c.day >= start, _sketches.c.day < end)
+            .order_by(_sketches.c.day)
+        )
+        return [(day, registers) for day, registers in result]
@@ -0,0 +1,21 @@
+from .access_log import AccessLogIngestResult
+from .provisioning import ProvisionedQRCode, QRCodeProvisionRequest
+from .qr_image import QRImageSpec
+from .redirect_target import RedirectTarget
+from .scan_event_record import ScanEventRecord
+from .scan_series import ScanCount, ScanSeries, ScanSeriesPoint
+from .unique_visitors import UniqueVisitors, UniqueVisitorsPoint
+
+__all__ = (
+    "AccessLogIngestResult",
+    "ProvisionedQRCode",
+    "QRCodeProvisionRequest",
+    "QRImageSpec",
+    "RedirectTarget",
+    "ScanEventRecord",
+    "ScanCount",
+    "ScanSeries",
+    "ScanSeriesPoint",
+    "UniqueVisitors",
+    "UniqueVisitorsPoint",
+)
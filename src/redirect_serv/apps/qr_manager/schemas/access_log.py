@@ -0,0 +1,16 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class AccessLogIngestResult:
+    """What one ingestion run counted from a log file"""
+
+    path: str
+    start_offset: int
+    end_offset: int = 0
+    lines: int = 0
+    scans: int = 0
+    # Redirects of hashes that no longer exist
+    unknown_scans: int = 0
+    # The file was truncated or its inode reused, so it was read from the start
+    restarted: bool = False
@@ -0,0 +1,18 @@
+from dataclasses import dataclass
+from typing import List, Optional
+
+
+@dataclass
+class QRCodeProvisionRequest:
+    """Branches that should each get a QR code"""
+
+    company_branch_ids: List[int]
+
+
+@dataclass(frozen=True, slots=True)
+class ProvisionedQRCode:
+    """Outcome for one branch; url_hash is None when the branch does not exist"""
+
+    company_branch_id: int
+    url_hash: Optional[str]
+    created: bool
@@ -0,0 +1,22 @@
+from dataclasses import dataclass
+from typing import Any, Dict
+
+MEDIA_TYPES = {"png": "image/png", "svg": "image/svg+xml"}
+
+
+@dataclass(frozen=True, slots=True)
+class QRImageSpec:
+    """Everything a render depends on; key is the content address of the result"""
+
+    key: str
+    payload: str
+    options: Dict[str, Any]
+    image_format: str
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.key}"'
+
+    @property
+    def media_type(self) -> str:
+        return MEDIA_TYPES[self.image_format]
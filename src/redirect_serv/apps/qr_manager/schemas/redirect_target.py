@@ -0,0 +1,10 @@
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True, slots=True)
+class RedirectTarget:
+    """Resolved redirect destination of a QR code"""
+
+    qr_code_id: int
+    company_branch_id: int
+    subdomain: str
@@ -0,0 +1,12 @@
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+
+class ScanEventRecord(NamedTuple):
+    """One scan_events row, in table column order"""
+
+    scanned_at: datetime
+    qr_code_id: int
+    company_branch_id: int
+    user_agent_fingerprint: Optional[int]
+    referrer_fingerprint: Optional[int]
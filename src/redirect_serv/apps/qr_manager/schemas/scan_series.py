@@ -0,0 +1,31 @@
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import List, Union
+
+
+@dataclass(frozen=True, slots=True)
+class ScanSeriesPoint:
+    """Scans counted in one hourly or daily bucket"""
+
+    bucket: Union[datetime, date]
+    scans: int
+
+
+@dataclass(frozen=True, slots=True)
+class ScanSeries:
+    """Scan counts over a time range; buckets without scans are omitted"""
+
+    granularity: str
+    start: datetime
+    end: datetime
+    total: int
+    points: List[ScanSeriesPoint] = field(default_factory=list)
+
+
+@dataclass(frozen=True, slots=True)
+class ScanCount:
+    """All-time scans of a QR code, including shard scans not yet compacted"""
+
+    qr_code_id: int
+    company_branch_id: int
+    scans: int
@@ -0,0 +1,25 @@
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import List
+
+
+@dataclass(frozen=True, slots=True)
+class UniqueVisitorsPoint:
+    """Estimated distinct visitors on one UTC day"""
+
+    day: date
+    visitors: int
+
+
+@dataclass(frozen=True, slots=True)
+class UniqueVisitors:
+    """Estimated distinct visitors over a time range and on each of its days.
+
+    total counts a visitor seen on several days once, so it is usually less
+    than the sum of the points; days without scans are omitted.
+    """
+
+    start: datetime
+    end: datetime
+    total: int
+    points: List[UniqueVisitorsPoint] = field(default_factory=list)
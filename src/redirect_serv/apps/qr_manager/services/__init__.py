@@ -1,3 +1,27 @@
+from .access_log_ingestor import AccessLogIngestor
 from .qr_code_service import QRCodeService
+from .scan_count_aggregator import ScanCountAggregator, scan_count_aggregator
+from .scan_count_sharding import ScanCountSharding, scan_count_sharding
+from .scan_event_recorder import ScanEventRecorder, scan_event_recorder
+from .scan_rollup_aggregator import ScanRollupAggregator, scan_rollup_aggregator
+from .scan_spool import ScanSpool, scan_spool
+from .scan_stats_service import ScanStatsService
+from .unique_visitor_tracker import UniqueVisitorTracker, unique_visitor_tracker
 
-__all__ = ("QRCodeService",)
+__all__ = (
+    "AccessLogIngestor",
+    "QRCodeService",
+    "ScanCountAggregator",
+    "scan_count_aggregator",
+    "ScanCountSharding",
+    "scan_count_sharding",
+    "ScanEventRecorder",
+    "scan_event_recorder",
+    "ScanRollupAggregator",
+    "scan_rollup_aggregator",
+    "ScanSpool",
+    "scan_spool",
+    "ScanStatsService",
+    "UniqueVisitorTracker",
+    "unique_visitor_tracker",
+)
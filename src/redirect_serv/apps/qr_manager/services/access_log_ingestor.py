@@ -0,0 +1,155 @@
+import asyncio
+import hashlib
+import logging
+import os
+from datetime import datetime, timezone
+from typing import (
+    AsyncContextManager,
+    BinaryIO,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+)
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.redirect_serv.apps.qr_manager.access_log import LogBatch, read_batch
+from src.redirect_serv.apps.qr_manager.repositories import (
+    AccessLogOffsetRepository,
+    QRCodeRepository,
+    ScanRollupRepository,
+)
+from src.redirect_serv.apps.qr_manager.schemas import AccessLogIngestResult
+from src.redirect_serv.core.repositories.base_repository import chunked
+
+logger = logging.getLogger(__name__)
+
+SessionFactory = Callable[[], AsyncContextManager[AsyncSession]]
+
+# Bytes of the file start remembered to recognise the file on the next run
+HEAD_BYTES = 4096
+_HASH_LOOKUP_CHUNK = 5000
+
+
+class ConcurrentIngestionError(Exception):
+    """Raised when another run advanced the same file first"""
+
+    pass
+
+
+def file_id(stat: os.stat_result) -> str:
+    return f"{stat.st_dev}:{stat.st_ino}"
+
+
+def _head_digest(f: BinaryIO, size: int) -> bytes:
+    f.seek(0)
+    return hashlib.sha256(f.read(size)).digest()
+
+
+class AccessLogIngestor:
+    """Counts redirects found in access logs into scan counters and rollups.
+
+    Each batch of lines is applied in one transaction together with the
+    file's new offset, so a crashed or repeated run never counts a line
+    twice. Files are identified by device and inode, so a rotated file
+    (access.log -> access.log.1) is picked up where it was left.
+    """
+
+    def __init__(self, session_factory: SessionFactory, batch_lines: int = 100_000):
+        self.session_factory = session_factory
+        self.batch_lines = batch_lines
+
+    async def ingest(self, path: str) -> AccessLogIngestResult:
+        with open(path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            # Lines of a log without timestamps are dated by the last write
+            default_time = datetime.fromtimestamp(stat.st_mtime, timezone.utc)
+
+            async with self.session_factory() as session:
+                state = await AccessLogOffsetRepository(session).get(file_id(stat))
+                expected = state.offset if state is not None else None
+                start = 0
+                if state is not None:
+                    unchanged = state.offset <= stat.st_size and state.head_digest == (
+                        await asyncio.to_thread(_head_digest, f, state.head_size)
+                    )
+                    start = state.offset if unchanged else 0
+
+            result = AccessLogIngestResult(
+                path=path,
+                start_offset=start,
+                end_offset=start,
+                restarted=state is not None and start == 0 and state.offset > 0,
+            )
+            if result.restarted:
+                logger.warning("%s was truncated or replaced, reading it again", path)
+
+            while True:
+                batch = await asyncio.to_thread(
+                    read_batch, f, result.end_offset, self.batch_lines, default_time
+                )
+                if not batch.lines:
+                    break
+                head_size = min(HEAD_BYTES, batch.end_offset)
+                head_digest = await asyncio.to_thread(_head_digest, f, head_size)
+                result.unknown_scans += await self._apply(
+                    stat, path, head_size, head_digest, expected, batch
+                )
+                expected = result.end_offset = batch.end_offset
+                result.lines += batch.lines
+                result.scans += batch.scans
+        return result
+
+    async def _apply(
+        self,
+        stat: os.stat_result,
+        path: str,
+        head_size: int,
+        head_digest: bytes,
+        expected_offset: Optional[int],
+        batch: LogBatch,
+    ) -> int:
+        """Apply a batch with its offset in one transaction, return unknown scans"""
+        async with self.session_factory() as session:
+            advanced = await AccessLogOffsetRepository(session).advance(
+                file_id(stat),
+                path,
+                head_size,
+                head_digest,
+                expected_offset,
+                batch.end_offset,
+            )
+            if not advanced:
+                await session.rollback()
+                raise ConcurrentIngestionError(f"{path} is being ingested elsewhere")
+
+            qr_codes = QRCodeRepository(session)
+            ids: Dict[str, int] = {}
+            for url_hashes in chunked(batch.latest, _HASH_LOOKUP_CHUNK):
+                ids.update(await qr_codes.get_ids_by_url_hashes(url_hashes))
+
+            counts: Dict[int, int] = {}
+            hourly: Dict[Tuple[int, datetime], int] = {}
+            unknown = 0
+            for (url_hash, hour), scans in batch.hourly.items():
+                qr_code_id = ids.get(url_hash)
+                if qr_code_id is None:
+                    unknown += scans
+                    continue
+                counts[qr_code_id] = counts.get(qr_code_id, 0) + scans
+                hourly[(qr_code_id, hour)] = hourly.get((qr_code_id, hour), 0) + scans
+
+            rows: List[Tuple[int, int, datetime]] = [
+                (ids[url_hash], counts[ids[url_hash]], scanned_at)
+                for url_hash, scanned_at in batch.latest.items()
+                if url_hash in ids
+            ]
+            await qr_codes.apply_scan_counts(rows, commit=False)
+            await ScanRollupRepository(session).apply_hourly_scans(hourly, commit=False)
+            await session.commit()
+        return unknown
+
+
+__all__ = ("AccessLogIngestor", "ConcurrentIngestionError")
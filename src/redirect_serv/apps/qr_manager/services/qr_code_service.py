@@ -1,8 +1,66 @@
+from datetime import datetime, timezone
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+)
+
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.redirect_serv.apps.company.models import CompanyBranch
+from src.redirect_serv.apps.qr_manager.cache import (
+    last_known_targets,
+    negative_cache,
+    redirect_cache,
+    remember_target,
+)
+from src.redirect_serv.apps.qr_manager.hash_filter import (
+    generate_url_hash,
+    known_hash_filter,
+)
+from src.redirect_serv.apps.qr_manager.redirect_table import redirect_table
 from src.redirect_serv.apps.qr_manager.repositories import QRCodeRepository
-from src.redirect_serv.core.exceptions import NotFoundError
+from src.redirect_serv.apps.qr_manager.schemas import (
+    ProvisionedQRCode,
+    RedirectTarget,
+)
+from src.redirect_serv.apps.qr_manager.services.scan_count_aggregator import (
+    scan_count_aggregator,
+)
+from src.redirect_serv.apps.qr_manager.services.scan_count_sharding import (
+    scan_count_sharding,
+)
+from src.redirect_serv.apps.qr_manager.services.scan_event_recorder import (
+    scan_event_recorder,
+)
+from src.redirect_serv.apps.qr_manager.services.scan_rollup_aggregator import (
+    scan_rollup_aggregator,
+)
+from src.redirect_serv.apps.qr_manager.services.scan_spool import scan_spool
+from src.redirect_serv.apps.qr_manager.services.unique_visitor_tracker import (
+    unique_visitor_tracker,
+)
+from src.redirect_serv.apps.qr_manager.snapshot import redirect_snapshot
+from src.redirect_serv.core.circuit_breaker import (
+    DB_UNAVAILABLE_ERRORS,
+    db_circuit_breaker,
+)
+from src.redirect_serv.core.exceptions import NotFoundError, ServiceUnavailableError
+from src.redirect_serv.core.metrics import (
+    REDIRECT_RESOLVE_SECONDS,
+    REDIRECT_SCAN_WRITE_SECONDS,
+)
+from src.redirect_serv.core.replicas import replica_router
+from src.redirect_serv.core.repositories.base_repository import chunked
+
+# A hash collision needs another attempt; a third one is never expected
+_MAX_HASH_ATTEMPTS = 3
 
 
 class QRCodeService:
@@ -20,3 +78,210 @@ class QRCodeService:
         await self.repository.increment_scan_count(qr_code)
 
         return qr_code.company_branch
+
+    async def get_redirect_target_and_increment_scan(
+        self,
+        url_hash: str,
+        user_agent: Optional[str] = None,
+        referrer: Optional[str] = None,
+        client: Optional[str] = None,
+    ) -> RedirectTarget:
+        target, degraded = await self._guarded(url_hash, self._resolve_and_count_scan)
+        if degraded:
+            # Replayed into the scan counters and rollups once the DB is back;
+            # scan events are not kept while degraded
+            scan_spool.add(url_hash)
+            return target
+        scan_rollup_aggregator.add(target.qr_code_id)
+        scan_event_recorder.record(target, user_agent, referrer)
+        unique_visitor_tracker.add(target.qr_code_id, client, user_agent)
+        return target
+
+    async def resolve_redirect_target(self, url_hash: str) -> RedirectTarget:
+        """get_redirect_target, served from memory while the DB is unreachable"""
+        target, _ = await self._guarded(url_hash, self.get_redirect_target)
+        return target
+
+    async def _guarded(
+        self, url_hash: str, resolve: Callable[[str], Awaitable[RedirectTarget]]
+    ) -> Tuple[RedirectTarget, bool]:
+        """Run resolve behind the DB circuit breaker, (target, degraded)"""
+        if db_circuit_breaker.allow():
+            try:
+                target = await resolve(url_hash)
+            except NotFoundError:
+                db_circuit_breaker.record_success()
+                raise
+            except DB_UNAVAILABLE_ERRORS:
+                db_circuit_breaker.record_failure()
+                await self.session.rollback()
+            else:
+                db_circuit_breaker.record_success()
+                return target, False
+        return self._resolve_degraded(url_hash), True
+
+    def _resolve_degraded(self, url_hash: str) -> RedirectTarget:
+        target = self._lookup_in_memory(url_hash) or last_known_targets.get(url_hash)
+        if target is not None:
+            return target
+        if self._is_known_unknown(url_hash):
+            raise self._not_found(url_hash)
+        raise ServiceUnavailableError(
+            f"QR code with hash '{url_hash}' cannot be resolved right now"
+        )
+
+    async def _resolve_and_count_scan(self, url_hash: str) -> RedirectTarget:
+        if scan_count_aggregator.enabled:
+            with REDIRECT_RESOLVE_SECONDS.time():
+                target = await self.get_redirect_target(url_hash)
+            with REDIRECT_SCAN_WRITE_SECONDS.time():
+                scan_count_aggregator.add(target.qr_code_id)
+            return target
+
+        hot = scan_count_sharding.is_hot(url_hash)
+        with REDIRECT_RESOLVE_SECONDS.time():
+            target = self._lookup_in_memory(url_hash)
+            if target is None and self._is_known_unknown(url_hash):
+                raise self._not_found(url_hash)
+            if target is None and hot:
+                # A plain lookup, so the scan goes to a shard, not the code's row
+                target = await self.get_redirect_target(url_hash)
+        if target is not None:
+            with REDIRECT_SCAN_WRITE_SECONDS.time():
+                await self._count_scan(target.qr_code_id, hot)
+            return target
+
+        # Resolved by the counting statement itself, so it is timed as a write
+        with REDIRECT_SCAN_WRITE_SECONDS.time():
+            target = await self.repository.get_redirect_target_and_increment_scan(
+                url_hash
+            )
+        if target is None:
+            self._remember_unknown(url_hash)
+            raise self._not_found(url_hash)
+
+        remember_target(url_hash, target)
+        return target
+
+    async def _count_scan(self, qr_code_id: int, hot: bool) -> None:
+        if hot:
+            await scan_count_sharding.increment(
+                self.session, qr_code_id, datetime.now(timezone.utc)
+            )
+        else:
+            await self.repository.increment_scan_count_by_id(qr_code_id)
+
+    async def get_redirect_target(self, url_hash: str) -> RedirectTarget:
+        """Resolve a hash through the per-worker caches, falling back to the DB"""
+        target = self._lookup_in_memory(url_hash)
+        if target is not None:
+            return target
+
+        if self._is_known_unknown(url_hash):
+            raise self._not_found(url_hash)
+
+        target = await self.repository.get_redirect_target(url_hash)
+        if target is None:
+            self._remember_unknown(url_hash)
+            raise self._not_found(url_hash)
+
+        remember_target(url_hash, target)
+        return target
+
+    async def get_qr_options(self, url_hash: str) -> Dict[str, Any]:
+        if self._is_known_unknown(url_hash):
+            raise self._not_found(url_hash)
+
+        qr_options = await self.repository.get_qr_options(url_hash)
+        if qr_options is None:
+            self._remember_unknown(url_hash)
+            raise self._not_found(url_hash)
+        return qr_options
+
+    async def provision_qr_codes(
+        self, company_branch_ids: Iterable[int], chunk_size: int = 1000
+    ) -> AsyncIterator[ProvisionedQRCode]:
+        """Give every branch a QR code, yielding results as each chunk commits.
+
+        Idempotent: branches that already have a code get it back with
+        created=False.
+        """
+        for chunk in chunked(dict.fromkeys(company_branch_ids), chunk_size):
+            branches = await self.repository.get_existing_branch_ids(chunk)
+            url_hashes = await self.repository.get_url_hashes_by_branch_ids(chunk)
+            created = await self._create_missing(
+                [branch_id for branch_id in branches if branch_id not in url_hashes],
+                url_hashes,
+            )
+            await self.session.commit()
+
+            for url_hash in created.values():
+                # Core inserts bypass the ORM events that keep these current
+                negative_cache.pop(url_hash)
+                known_hash_filter.add(url_hash)
+                replica_router.pin(url_hash)
+
+            for branch_id in chunk:
+                if branch_id in created:
+                    yield ProvisionedQRCode(branch_id, created[branch_id], True)
+                else:
+                    yield ProvisionedQRCode(branch_id, url_hashes.get(branch_id), False)
+
+    async def _create_missing(
+        self, pending: List[int], url_hashes: Dict[int, str]
+    ) -> Dict[int, str]:
+        created: Dict[int, str] = {}
+        for _ in range(_MAX_HASH_ATTEMPTS):
+            if not pending:
+                return created
+            inserted = await self.repository.insert_qr_codes(
+                {branch_id: generate_url_hash() for branch_id in pending}
+            )
+            created.update(inserted)
+            skipped = [branch_id for branch_id in pending if branch_id not in inserted]
+            if not skipped:
+                return created
+            # Skipped because a concurrent request provisioned the branch first,
+            # or because of a hash collision: only the latter is retried
+            url_hashes.update(
+                await self.repository.get_url_hashes_by_branch_ids(skipped)
+            )
+            pending = [
+                branch_id for branch_id in skipped if branch_id not in url_hashes
+            ]
+        if pending:
+            raise RuntimeError(f"Could not generate unique hashes for {pending}")
+        return created
+
+    @staticmethod
+    def _lookup_in_memory(url_hash: str) -> Optional[RedirectTarget]:
+        if redirect_table.ready:
+            target = redirect_table.get(url_hash)
+            if target is not None:
+                return target
+        if redirect_snapshot.ready:
+            target = redirect_snapshot.get(url_hash)
+            if target is not None:
+                return target
+        return redirect_cache.get(url_hash)
+
+    @staticmethod
+    def _is_known_unknown(url_hash: str) -> bool:
+        """Whether the hash can be ruled out without querying the DB"""
+        if negative_cache.get(url_hash) is not None:
+            known_hash_filter.rejected_negative_cache += 1
+            return True
+        if not known_hash_filter.might_exist(url_hash):
+            known_hash_filter.rejected_bloom += 1
+            return True
+        return False
+
+    @staticmethod
+    def _remember_unknown(url_hash: str) -> None:
+        if known_hash_filter.ready:
+            known_hash_filter.false_positives += 1
+        negative_cache.set(url_hash, True)
+
+    @staticmethod
+    def _not_found(url_hash: str) -> NotFoundError:
+        return NotFoundError(f"QR code with hash '{url_hash}' not found")
@@ -0,0 +1,155 @@
+import asyncio
+import logging
+import time
+from contextlib import suppress
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import AsyncContextManager, Callable, Dict, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.redirect_serv.apps.qr_manager.repositories import QRCodeRepository
+from src.redirect_serv.core.config import scan_count_settings
+
+logger = logging.getLogger(__name__)
+
+SessionFactory = Callable[[], AsyncContextManager[AsyncSession]]
+
+
+@dataclass(slots=True)
+class _PendingScans:
+    count: int
+    last_scanned: datetime
+
+
+class ScanCountAggregator:
+    """Collects scan increments per QR code and writes them in batches.
+
+    Increments are kept in memory and flushed as one set-based UPDATE every
+    flush_interval seconds, or as soon as flush_threshold distinct codes are
+    pending. A failed flush puts its batch back so no scans are lost.
+    """
+
+    def __init__(self, enabled: bool, flush_interval: float, flush_threshold: int):
+        self.enabled = enabled
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+        self._session_factory: Optional[SessionFactory] = None
+        self._pending: Dict[int, _PendingScans] = {}
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._threshold_flush: Optional[asyncio.Task] = None
+
+        self.flushes = 0
+        self.failed_flushes = 0
+        self.flushed_scans = 0
+        self.last_flush_seconds = 0.0
+        self.max_flush_seconds = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._pending)
+
+    @property
+    def pending_scans(self) -> int:
+        return sum(pending.count for pending in self._pending.values())
+
+    def add(self, qr_code_id: int, scanned_at: Optional[datetime] = None) -> None:
+        scanned_at = scanned_at or datetime.now(timezone.utc)
+        pending = self._pending.get(qr_code_id)
+        if pending is None:
+            self._pending[qr_code_id] = _PendingScans(1, scanned_at)
+        else:
+            pending.count += 1
+            if scanned_at > pending.last_scanned:
+                pending.last_scanned = scanned_at
+
+        if (
+            len(self._pending) >= self.flush_threshold
+            and self._session_factory is not None
+            and (self._threshold_flush is None or self._threshold_flush.done())
+        ):
+            self._threshold_flush = asyncio.get_running_loop().create_task(self.flush())
+
+    async def flush(self) -> int:
+        """Write all pending increments, return the number of scans written"""
+        if self._session_factory is None:
+            return 0
+
+        async with self._flush_lock:
+            batch, self._pending = self._pending, {}
+            if not batch:
+                return 0
+
+            started = time.perf_counter()
+            try:
+                async with self._session_factory() as session:
+                    await QRCodeRepository(session).apply_scan_counts(
+                        (qr_code_id, pending.count, pending.last_scanned)
+                        for qr_code_id, pending in batch.items()
+                    )
+            except Exception:
+                self._requeue(batch)
+                self.failed_flushes += 1
+                logger.exception("Failed to flush scan counts for %d codes", len(batch))
+                return 0
+            finally:
+                elapsed = time.perf_counter() - started
+                self.last_flush_seconds = elapsed
+                self.max_flush_seconds = max(self.max_flush_seconds, elapsed)
+
+            scans = sum(pending.count for pending in batch.values())
+            self.flushes += 1
+            self.flushed_scans += scans
+            return scans
+
+    def _requeue(self, batch: Dict[int, _PendingScans]) -> None:
+        for qr_code_id, failed in batch.items():
+            pending = self._pending.get(qr_code_id)
+            if pending is None:
+                self._pending[qr_code_id] = failed
+            else:
+                pending.count += failed.count
+                pending.last_scanned = max(pending.last_scanned, failed.last_scanned)
+
+    async def start(self, session_factory: SessionFactory) -> None:
+        self._session_factory = session_factory
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the periodic flush and write out everything still pending"""
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        if self._threshold_flush is not None:
+            await self._threshold_flush
+            self._threshold_flush = None
+        await self.flush()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "queue_depth": self.queue_depth,
+            "pending_scans": self.pending_scans,
+            "flushes": self.flushes,
+            "failed_flushes": self.failed_flushes,
+            "flushed_scans": self.flushed_scans,
+            "last_flush_seconds": self.last_flush_seconds,
+            "max_flush_seconds": self.max_flush_seconds,
+        }
+
+
+scan_count_aggregator = ScanCountAggregator(
+    enabled=scan_count_settings.write_behind,
+    flush_interval=scan_count_settings.flush_interval,
+    flush_threshold=scan_count_settings.flush_threshold,
+)
+
+__all__ = ("ScanCountAggregator", "scan_count_aggregator")
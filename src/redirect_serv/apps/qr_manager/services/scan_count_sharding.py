@@ -0,0 +1,154 @@
+import asyncio
+import logging
+import random
+import time
+from contextlib import suppress
+from datetime import datetime
+from typing import Any, AsyncContextManager, Callable, Dict, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.redirect_serv.apps.qr_manager.repositories import (
+    QRCodeRepository,
+    ScanCountShardRepository,
+)
+from src.redirect_serv.core.cache import TTLCache
+from src.redirect_serv.core.config import scan_count_settings
+
+logger = logging.getLogger(__name__)
+
+SessionFactory = Callable[[], AsyncContextManager[AsyncSession]]
+
+# Codes remembered as hot at once; beyond that the least recent fall back
+_MAX_HOT_CODES = 10000
+
+
+class ScanCountSharding:
+    """Moves the scan counter of hot QR codes off their qr_codes row.
+
+    Scans are counted per url_hash over one-second windows, before the code
+    is resolved; a code scanned at least hot_threshold times within a window
+    is hot for hot_ttl seconds, and its scans go to a random one of `shards`
+    shard rows, so concurrent scans of a viral code rarely wait on the same
+    row lock. Every compact_interval seconds all shard rows are folded back
+    into qr_codes.scan_count in one transaction.
+    """
+
+    def __init__(
+        self,
+        enabled: bool,
+        shards: int,
+        hot_threshold: float,
+        hot_ttl: float,
+        compact_interval: float,
+        timer: Callable[[], float] = time.monotonic,
+    ):
+        self.enabled = enabled
+        self.shards = shards
+        self.hot_threshold = hot_threshold
+        self.compact_interval = compact_interval
+        self._timer = timer
+        self._window = int(timer())
+        self._window_scans: Dict[str, int] = {}
+        self._hot: TTLCache[str, bool] = TTLCache(
+            maxsize=_MAX_HOT_CODES, ttl=hot_ttl, timer=timer
+        )
+        self._session_factory: Optional[SessionFactory] = None
+        self._task: Optional[asyncio.Task] = None
+
+        self.sharded_scans = 0
+        self.compactions = 0
+        self.failed_compactions = 0
+        self.compacted_scans = 0
+
+    def is_hot(self, url_hash: str) -> bool:
+        """Record a scan of the code, return whether it should go to a shard"""
+        if not self.enabled:
+            return False
+        window = int(self._timer())
+        if window != self._window:
+            self._window, self._window_scans = window, {}
+        scans = self._window_scans.get(url_hash, 0) + 1
+        self._window_scans[url_hash] = scans
+        if scans >= self.hot_threshold:
+            self._hot.set(url_hash, True)
+            return True
+        return self._hot.get(url_hash) is not None
+
+    def pick_shard(self) -> int:
+        return random.randrange(self.shards)  # nosec B311 - not security related
+
+    async def increment(
+        self, session: AsyncSession, qr_code_id: int, scanned_at: datetime
+    ) -> None:
+        await ScanCountShardRepository(session).increment(
+            qr_code_id, self.pick_shard(), scanned_at
+        )
+        self.sharded_scans += 1
+
+    async def compact(self) -> int:
+        """Fold every shard into qr_codes.scan_count, return the scans moved"""
+        if self._session_factory is None:
+            return 0
+        try:
+            async with self._session_factory() as session:
+                rows = await ScanCountShardRepository(session).take_all()
+                await QRCodeRepository(session).apply_scan_counts(rows, commit=False)
+                await session.commit()
+        except Exception:
+            self.failed_compactions += 1
+            raise
+        scans = sum(scans for _, scans, _ in rows)
+        self.compactions += 1
+        self.compacted_scans += scans
+        return scans
+
+    async def start(self, session_factory: SessionFactory) -> None:
+        self._session_factory = session_factory
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+            try:
+                await self.compact()
+            except Exception:
+                logger.exception("Failed to compact scan count shards on shutdown")
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.compact_interval)
+            try:
+                await self.compact()
+            except Exception:
+                logger.exception("Failed to compact scan count shards")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hot_codes": len(self._hot),
+            "sharded_scans": self.sharded_scans,
+            "compactions": self.compactions,
+            "failed_compactions": self.failed_compactions,
+            "compacted_scans": self.compacted_scans,
+        }
+
+
+if scan_count_settings.sharding and scan_count_settings.write_behind:
+    logger.warning(
+        "SCAN_COUNT_SHARDING is ignored while SCAN_COUNT_WRITE_BEHIND is on: "
+        "write-behind already folds a code's scans into one update per flush"
+    )
+
+scan_count_sharding = ScanCountSharding(
+    enabled=scan_count_settings.sharding and not scan_count_settings.write_behind,
+    shards=scan_count_settings.shards,
+    hot_threshold=scan_count_settings.hot_threshold,
+    hot_ttl=scan_count_settings.hot_ttl,
+    compact_interval=scan_count_settings.compact_interval,
+)
+
+__all__ = ("ScanCountSharding", "scan_count_sharding")
@@ -0,0 +1,176 @@
+import asyncio
+import logging
+from collections import deque
+from contextlib import suppress
+from datetime import datetime, timezone
+from hashlib import blake2b
+from typing import AsyncContextManager, Callable, Deque, Dict, List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.redirect_serv.apps.qr_manager.repositories import ScanEventRepository
+from src.redirect_serv.apps.qr_manager.schemas import RedirectTarget, ScanEventRecord
+from src.redirect_serv.core.config import scan_event_settings
+
+logger = logging.getLogger(__name__)
+
+SessionFactory = Callable[[], AsyncContextManager[AsyncSession]]
+
+DROP_NEWEST = "drop_newest"
+DROP_OLDEST = "drop_oldest"
+OVERFLOW_POLICIES = (DROP_NEWEST, DROP_OLDEST)
+
+
+def fingerprint(value: Optional[str]) -> Optional[int]:
+    """Signed 64-bit digest of a header value, fits a BIGINT column"""
+    if not value:
+        return None
+    digest = blake2b(value.encode("utf-8", "surrogateescape"), digest_size=8)
+    return int.from_bytes(digest.digest(), "big", signed=True)
+
+
+class ScanEventRecorder:
+    """Buffers scan events in a bounded queue and appends them in batches.
+
+    record() never awaits, so the redirect response does not wait on the
+    event log. When the queue is full the overflow policy decides whether
+    the new event (drop_newest) or the oldest queued one (drop_oldest) is
+    discarded; both are counted in dropped.
+    """
+
+    def __init__(
+        self,
+        enabled: bool,
+        queue_size: int,
+        batch_size: int,
+        flush_interval: float,
+        overflow_policy: str = DROP_NEWEST,
+    ):
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown scan event overflow policy '{overflow_policy}'")
+
+        self.enabled = enabled
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow_policy = overflow_policy
+        self._session_factory: Optional[SessionFactory] = None
+        self._queue: Deque[ScanEventRecord] = deque()
+        self._wakeup = asyncio.Event()
+        self._drain_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+        self.enqueued = 0
+        self.dropped = 0
+        self.written = 0
+        self.failed_batches = 0
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._queue)
+
+    def record(
+        self,
+        target: RedirectTarget,
+        user_agent: Optional[str] = None,
+        referrer: Optional[str] = None,
+        scanned_at: Optional[datetime] = None,
+    ) -> None:
+        if not self.enabled:
+            return
+
+        self._enqueue(
+            ScanEventRecord(
+                scanned_at or datetime.now(timezone.utc),
+                target.qr_code_id,
+                target.company_branch_id,
+                fingerprint(user_agent),
+                fingerprint(referrer),
+            )
+        )
+        if len(self._queue) >= self.batch_size:
+            self._wakeup.set()
+
+    def _enqueue(self, record: ScanEventRecord) -> None:
+        if len(self._queue) >= self.queue_size:
+            self.dropped += 1
+            if self.overflow_policy == DROP_NEWEST:
+                return
+            self._queue.popleft()
+        self._queue.append(record)
+        self.enqueued += 1
+
+    async def drain(self) -> int:
+        """Write queued events in batches, return the number written"""
+        if self._session_factory is None:
+            return 0
+
+        written = 0
+        async with self._drain_lock:
+            while self._queue:
+                batch = self._take_batch()
+                try:
+                    async with self._session_factory() as session:
+                        await ScanEventRepository(session).insert_many(batch)
+                except Exception:
+                    self._requeue(batch)
+                    self.failed_batches += 1
+                    logger.exception("Failed to write %d scan events", len(batch))
+                    break
+                written += len(batch)
+                self.written += len(batch)
+        return written
+
+    def _take_batch(self) -> List[ScanEventRecord]:
+        size = min(self.batch_size, len(self._queue))
+        return [self._queue.popleft() for _ in range(size)]
+
+    def _requeue(self, batch: List[ScanEventRecord]) -> None:
+        """Put a failed batch back in front, dropping what no longer fits"""
+        room = self.queue_size - len(self._queue)
+        if room < len(batch):
+            self.dropped += len(batch) - max(room, 0)
+            batch = batch[len(batch) - max(room, 0) :]
+        self._queue.extendleft(reversed(batch))
+
+    async def start(self, session_factory: SessionFactory) -> None:
+        self._session_factory = session_factory
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background writer and flush what is still queued"""
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        await self.drain()
+
+    async def _run(self) -> None:
+        while True:
+            with suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            self._wakeup.clear()
+            await self.drain()
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "queue_depth": self.queue_depth,
+            "queue_size": self.queue_size,
+            "enqueued": self.enqueued,
+            "dropped": self.dropped,
+            "written": self.written,
+            "failed_batches": self.failed_batches,
+        }
+
+
+scan_event_recorder = ScanEventRecorder(
+    enabled=scan_event_settings.enabled,
+    queue_size=scan_event_settings.queue_size,
+    batch_size=scan_event_settings.batch_size,
+    flush_interval=scan_event_settings.flush_interval,
+    overflow_policy=scan_event_settings.overflow_policy,
+)
+
+__all__ = ("ScanEventRecorder", "fingerprint", "scan_event_recorder")
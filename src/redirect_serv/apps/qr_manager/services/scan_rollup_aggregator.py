@@ -0,0 +1,145 @@
+import asyncio
+import logging
+from contextlib import suppress
+from datetime import datetime, timezone
+from typing import AsyncContextManager, Callable, Dict, Optional, Tuple
+
+from sqlalchemy.exc import ProgrammingError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.redirect_serv.apps.qr_manager.repositories import ScanRollupRepository
+from src.redirect_serv.core.circuit_breaker import DB_UNAVAILABLE_ERRORS
+from src.redirect_serv.core.config import scan_rollup_settings
+
+logger = logging.getLogger(__name__)
+
+SessionFactory = Callable[[], AsyncContextManager[AsyncSession]]
+
+
+def hour_bucket(scanned_at: datetime) -> datetime:
+    return scanned_at.astimezone(timezone.utc).replace(
+        minute=0, second=0, microsecond=0
+    )
+
+
+class ScanRollupAggregator:
+    """Counts scans per (qr_code_id, UTC hour) and folds them into the rollups.
+
+    The redirect path only bumps an in-memory counter; every flush_interval
+    seconds the buckets are upserted into the hourly, daily and per-company
+    rollup tables. A flush that failed because the database was unreachable
+    merges its batch back into the pending one; any other failure drops it,
+    and a missing table (migrate_schema not run) disables the aggregator.
+    Scans of buckets beyond max_pending_buckets are dropped.
+    """
+
+    def __init__(self, enabled: bool, flush_interval: float, max_pending_buckets: int):
+        self.enabled = enabled
+        self.flush_interval = flush_interval
+        self.max_pending_buckets = max_pending_buckets
+        self._session_factory: Optional[SessionFactory] = None
+        self._pending: Dict[Tuple[int, datetime], int] = {}
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+        self.flushes = 0
+        self.failed_flushes = 0
+        self.flushed_scans = 0
+        self.dropped_scans = 0
+
+    @property
+    def pending_buckets(self) -> int:
+        return len(self._pending)
+
+    def add(self, qr_code_id: int, scanned_at: Optional[datetime] = None) -> None:
+        if not self.enabled:
+            return
+        key = (qr_code_id, hour_bucket(scanned_at or datetime.now(timezone.utc)))
+        scans = self._pending.get(key)
+        if scans is None and len(self._pending) >= self.max_pending_buckets:
+            self.dropped_scans += 1
+            return
+        self._pending[key] = (scans or 0) + 1
+
+    async def flush(self) -> int:
+        """Write all pending buckets, return the number of scans written"""
+        if self._session_factory is None:
+            return 0
+
+        async with self._flush_lock:
+            batch, self._pending = self._pending, {}
+            if not batch:
+                return 0
+
+            try:
+                async with self._session_factory() as session:
+                    await ScanRollupRepository(session).apply_hourly_scans(batch)
+            except DB_UNAVAILABLE_ERRORS:
+                for key, scans in batch.items():
+                    if (
+                        key in self._pending
+                        or len(self._pending) < self.max_pending_buckets
+                    ):
+                        self._pending[key] = self._pending.get(key, 0) + scans
+                    else:
+                        self.dropped_scans += scans
+                self.failed_flushes += 1
+                logger.exception("Failed to flush %d scan rollup buckets", len(batch))
+                return 0
+            except ProgrammingError:
+                # No later flush can succeed against a schema without the tables
+                self.enabled = False
+                self.dropped_scans += sum(batch.values()) + sum(self._pending.values())
+                self._pending.clear()
+                self.failed_flushes += 1
+                logger.exception(
+                    "Scan rollups disabled, run migrate_schema to create their tables"
+                )
+                return 0
+            except Exception:
+                self.dropped_scans += sum(batch.values())
+                self.failed_flushes += 1
+                logger.exception("Dropped %d scan rollup buckets", len(batch))
+                return 0
+
+            scans = sum(batch.values())
+            self.flushes += 1
+            self.flushed_scans += scans
+            return scans
+
+    async def start(self, session_factory: SessionFactory) -> None:
+        self._session_factory = session_factory
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the periodic flush and write out everything still pending"""
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        await self.flush()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "pending_buckets": self.pending_buckets,
+            "flushes": self.flushes,
+            "failed_flushes": self.failed_flushes,
+            "flushed_scans": self.flushed_scans,
+            "dropped_scans": self.dropped_scans,
+        }
+
+
+scan_rollup_aggregator = ScanRollupAggregator(
+    enabled=scan_rollup_settings.enabled,
+    flush_interval=scan_rollup_settings.flush_interval,
+    max_pending_buckets=scan_rollup_settings.max_pending_buckets,
+)
+
+__all__ = ("ScanRollupAggregator", "scan_rollup_aggregator")
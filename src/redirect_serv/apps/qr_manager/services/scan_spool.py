@@ -0,0 +1,221 @@
+"""Scans that could not be counted while the database was unreachable.
+
+Each scan is appended to a segment file as an access log line, and the
+buffer is written and fsynced every fsync_interval seconds, so at most that
+much is lost if the worker dies. Once the database circuit is closed again
+the segments are replayed through AccessLogIngestor: its per-file offsets
+make a replay idempotent, even when it is interrupted or several workers
+replay the same segment. Fully replayed segments are deleted.
+
+A worker holds an exclusive flock on the segment it is writing, so others
+only replay segments that were rotated or left behind by a dead worker.
+"""
+
+import asyncio
+import fcntl
+import glob
+import logging
+import os
+from contextlib import suppress
+from datetime import datetime, timezone
+from typing import IO, Any, Dict, List, Optional
+
+from src.redirect_serv.apps.qr_manager.repositories import AccessLogOffsetRepository
+from src.redirect_serv.apps.qr_manager.services.access_log_ingestor import (
+    AccessLogIngestor,
+    ConcurrentIngestionError,
+    SessionFactory,
+    file_id,
+)
+from src.redirect_serv.core.circuit_breaker import CircuitBreaker, db_circuit_breaker
+from src.redirect_serv.core.config import degraded_mode_settings
+
+logger = logging.getLogger(__name__)
+
+_SEGMENT_GLOB = "scans-*.log"
+
+
+def spool_line(url_hash: str, scanned_at: datetime) -> bytes:
+    """An access log line that apps.qr_manager.access_log counts as one scan"""
+    return (
+        f'{scanned_at.isoformat()} "GET /redirect/{url_hash} HTTP/1.1" 302\n'
+    ).encode()
+
+
+def _try_lock(f: IO[bytes]) -> bool:
+    try:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return False
+    return True
+
+
+class ScanSpool:
+    def __init__(
+        self,
+        directory: str,
+        fsync_interval: float,
+        replay_interval: float,
+        breaker: CircuitBreaker,
+    ):
+        self.directory = directory
+        self.fsync_interval = fsync_interval
+        self.replay_interval = replay_interval
+        self.breaker = breaker
+        self._buffer: List[bytes] = []
+        self._segment: Optional[IO[bytes]] = None
+        self._segment_size = 0
+        # Serialises writes with segment rotation
+        self._lock = asyncio.Lock()
+        self._ingestor: Optional[AccessLogIngestor] = None
+        self._session_factory: Optional[SessionFactory] = None
+        self._tasks: List[asyncio.Task] = []
+        self.spooled = 0
+        self.dropped = 0
+        self.fsyncs = 0
+        self.replayed_scans = 0
+        self.failed_replays = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.directory)
+
+    def add(self, url_hash: str) -> None:
+        if not self.enabled:
+            self.dropped += 1
+            return
+        self._buffer.append(spool_line(url_hash, datetime.now(timezone.utc)))
+        self.spooled += 1
+
+    async def flush(self) -> None:
+        async with self._lock:
+            if not self._buffer:
+                return
+            lines, self._buffer = self._buffer, []
+            try:
+                await asyncio.to_thread(self._write, lines)
+            except OSError:
+                self.dropped += len(lines)
+                logger.exception("Failed to spool %d scans", len(lines))
+                return
+            self.fsyncs += 1
+
+    def _write(self, lines: List[bytes]) -> None:
+        if self._segment is None:
+            os.makedirs(self.directory, exist_ok=True)
+            stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+            path = os.path.join(self.directory, f"scans-{os.getpid()}-{stamp}.log")
+            segment = open(path, "ab")
+            fcntl.flock(segment.fileno(), fcntl.LOCK_EX)
+            self._segment, self._segment_size = segment, 0
+        data = b"".join(lines)
+        self._segment.write(data)
+        self._segment.flush()
+        os.fsync(self._segment.fileno())
+        self._segment_size += len(data)
+
+    async def _rotate(self) -> None:
+        """Close the current segment so it can be replayed"""
+        async with self._lock:
+            if self._segment is not None and self._segment_size:
+                self._segment.close()
+                self._segment = None
+
+    async def replay(self) -> int:
+        """Replay every unlocked segment, return the scans counted"""
+        if self._ingestor is None or not self.enabled:
+            return 0
+        await self.flush()
+        await self._rotate()
+        scans = 0
+        for path in sorted(glob.glob(os.path.join(self.directory, _SEGMENT_GLOB))):
+            try:
+                scans += await self._replay_segment(path)
+            except ConcurrentIngestionError:
+                continue
+        self.replayed_scans += scans
+        return scans
+
+    async def _replay_segment(self, path: str) -> int:
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            return 0
+        with f:
+            if not _try_lock(f):
+                return 0
+            stat = os.fstat(f.fileno())
+            # Deleted by another worker between the listing and the lock
+            if stat.st_nlink == 0:
+                return 0
+            result = await self._ingestor.ingest(path)
+            if result.end_offset < stat.st_size:
+                return result.scans
+            # Unlinked first: a crash in between leaves an offset row that no
+            # file matches, never a file whose offset was forgotten
+            os.unlink(path)
+            async with self._session_factory() as session:
+                await AccessLogOffsetRepository(session).forget(file_id(stat))
+        if result.unknown_scans:
+            logger.warning(
+                "%d spooled scans of unknown QR codes dropped", result.unknown_scans
+            )
+        return result.scans
+
+    async def start(self, session_factory: SessionFactory) -> None:
+        if not self.enabled or self._tasks:
+            return
+        self._session_factory = session_factory
+        self._ingestor = AccessLogIngestor(session_factory)
+        self._tasks = [
+            asyncio.create_task(self._run_flush()),
+            asyncio.create_task(self._run_replay()),
+        ]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+        self._tasks = []
+        await self.flush()
+        async with self._lock:
+            if self._segment is not None:
+                self._segment.close()
+                self._segment = None
+
+    async def _run_flush(self) -> None:
+        while True:
+            await asyncio.sleep(self.fsync_interval)
+            await self.flush()
+
+    async def _run_replay(self) -> None:
+        while True:
+            await asyncio.sleep(self.replay_interval)
+            if not self.breaker.closed:
+                continue
+            try:
+                await self.replay()
+            except Exception:
+                self.failed_replays += 1
+                logger.exception("Failed to replay spooled scans")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "buffered": len(self._buffer),
+            "spooled": self.spooled,
+            "dropped": self.dropped,
+            "fsyncs": self.fsyncs,
+            "replayed_scans": self.replayed_scans,
+            "failed_replays": self.failed_replays,
+        }
+
+
+scan_spool = ScanSpool(
+    directory=degraded_mode_settings.spool_dir,
+    fsync_interval=degraded_mode_settings.spool_fsync_interval,
+    replay_interval=degraded_mode_settings.spool_replay_interval,
+    breaker=db_circuit_breaker,
+)
+
+__all__ = ("ScanSpool", "scan_spool", "spool_line")
@@ -0,0 +1,155 @@
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.redirect_serv.apps.qr_manager.repositories import (
+    QRCodeRepository,
+    ScanCountShardRepository,
+    ScanRollupRepository,
+    VisitorSketchRepository,
+)
+from src.redirect_serv.apps.qr_manager.schemas import (
+    ScanCount,
+    ScanSeries,
+    UniqueVisitors,
+    UniqueVisitorsPoint,
+)
+from src.redirect_serv.apps.qr_manager.services.scan_rollup_aggregator import (
+    hour_bucket,
+)
+from src.redirect_serv.core.config import scan_rollup_settings
+from src.redirect_serv.core.exceptions import BadRequestError, NotFoundError
+from src.redirect_serv.core.hyperloglog import HyperLogLog
+
+GRANULARITY_HOUR = "hour"
+GRANULARITY_DAY = "day"
+
+
+def as_utc(value: datetime) -> datetime:
+    """Treat naive datetimes as UTC, convert aware ones"""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def day_range(start: datetime, end: datetime) -> Tuple[date, date]:
+    """UTC days overlapping [start, end), end day exclusive"""
+    last = end.date() if end.time() == time.min else end.date() + timedelta(days=1)
+    return start.date(), last
+
+
+class ScanStatsService:
+    """Reads scan time series from the rollup and visitor sketch tables only"""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+        self.qr_code_repository = QRCodeRepository(session)
+        self.repository = ScanRollupRepository(session)
+        self.visitor_repository = VisitorSketchRepository(session)
+
+    async def get_branch_series(
+        self,
+        company_branch_id: int,
+        start: datetime,
+        end: datetime,
+        granularity: str = GRANULARITY_DAY,
+    ) -> ScanSeries:
+        start, end = self._check_range(start, end, granularity)
+        qr_code_id = await self._branch_qr_code_id(company_branch_id)
+        if granularity == GRANULARITY_HOUR:
+            points = await self.repository.hourly_series(
+                qr_code_id, hour_bucket(start), end
+            )
+        else:
+            points = await self.repository.daily_series(
+                qr_code_id, *day_range(start, end)
+            )
+        return self._series(granularity, start, end, points)
+
+    async def get_branch_scan_count(self, company_branch_id: int) -> ScanCount:
+        qr_code_id = await self._branch_qr_code_id(company_branch_id)
+        counts = await ScanCountShardRepository(self.session).get_scan_counts(
+            [qr_code_id]
+        )
+        return ScanCount(
+            qr_code_id=qr_code_id,
+            company_branch_id=company_branch_id,
+            scans=counts.get(qr_code_id, 0),
+        )
+
+    async def get_branch_visitors(
+        self, company_branch_id: int, start: datetime, end: datetime
+    ) -> UniqueVisitors:
+        """Visitors per day and over the whole range, the union of the days"""
+        start, end = self._check_range(start, end, GRANULARITY_DAY)
+        qr_code_id = await self._branch_qr_code_id(company_branch_id)
+        sketches = await self.visitor_repository.daily_sketches(
+            qr_code_id, *day_range(start, end)
+        )
+
+        points = []
+        union = None
+        for day, registers in sketches:
+            sketch = HyperLogLog.from_bytes(registers)
+            points.append(UniqueVisitorsPoint(day, sketch.count()))
+            if union is None:
+                union = sketch
+            else:
+                union.merge(sketch)
+        return UniqueVisitors(
+            start=start,
+            end=end,
+            total=union.count() if union is not None else 0,
+            points=points,
+        )
+
+    async def _branch_qr_code_id(self, company_branch_id: int) -> int:
+        qr_code_id = await self.qr_code_repository.get_id_by_company_branch_id(
+            company_branch_id
+        )
+        if qr_code_id is None:
+            raise NotFoundError(
+                f"QR code for company branch '{company_branch_id}' not found"
+            )
+        return qr_code_id
+
+    async def get_company_series(
+        self, company_id: int, start: datetime, end: datetime
+    ) -> ScanSeries:
+        start, end = self._check_range(start, end, GRANULARITY_DAY)
+        points = await self.repository.company_daily_series(
+            company_id, *day_range(start, end)
+        )
+        return self._series(GRANULARITY_DAY, start, end, points)
+
+    @staticmethod
+    def _check_range(
+        start: datetime, end: datetime, granularity: str
+    ) -> Tuple[datetime, datetime]:
+        start, end = as_utc(start), as_utc(end)
+        if start >= end:
+            raise BadRequestError("start must be before end")
+
+        if granularity == GRANULARITY_HOUR:
+            max_days = scan_rollup_settings.max_hourly_days
+        elif granularity == GRANULARITY_DAY:
+            max_days = scan_rollup_settings.max_daily_days
+        else:
+            raise BadRequestError(f"Unknown granularity '{granularity}'")
+
+        if end - start > timedelta(days=max_days):
+            raise BadRequestError(
+                f"{granularity} series are limited to {max_days} days per request"
+            )
+        return start, end
+
+    @staticmethod
+    def _series(granularity, start, end, points) -> ScanSeries:
+        return ScanSeries(
+            granularity=granularity,
+            start=start,
+            end=end,
+            total=sum(point.scans for point in points),
+            points=points,
+        )
@@ -0,0 +1,177 @@
+import asyncio
+import logging
+from contextlib import suppress
+from datetime import date, datetime, timezone
+from hashlib import blake2b
+from typing import AsyncContextManager, Callable, Dict, Optional, Tuple
+
+from sqlalchemy.exc import ProgrammingError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.redirect_serv.apps.qr_manager.repositories import VisitorSketchRepository
+from src.redirect_serv.core.circuit_breaker import DB_UNAVAILABLE_ERRORS
+from src.redirect_serv.core.config import unique_visitor_settings
+from src.redirect_serv.core.hyperloglog import HyperLogLog
+
+logger = logging.getLogger(__name__)
+
+SessionFactory = Callable[[], AsyncContextManager[AsyncSession]]
+
+
+def visitor_hash(client: Optional[str], user_agent: Optional[str]) -> Optional[int]:
+    """Unsigned 64-bit digest identifying a visitor, None without a client"""
+    if not client:
+        return None
+    digest = blake2b(digest_size=8)
+    digest.update(client.encode("utf-8", "surrogateescape"))
+    digest.update(b"\0")
+    digest.update((user_agent or "").encode("utf-8", "surrogateescape"))
+    return int.from_bytes(digest.digest(), "big")
+
+
+class UniqueVisitorTracker:
+    """Keeps a HyperLogLog sketch of visitors per (qr_code_id, UTC day).
+
+    The redirect path only sets a register in memory; every flush_interval
+    seconds the pending sketches are merged into the stored ones. A flush
+    that failed because the database was unreachable merges its sketches
+    back into the pending ones; any other failure drops them, and a missing
+    table (migrate_schema not run) disables the tracker. Visits that would
+    start a sketch beyond max_pending_sketches are dropped.
+    """
+
+    def __init__(
+        self,
+        enabled: bool,
+        precision: int,
+        flush_interval: float,
+        max_pending_sketches: int,
+    ):
+        self.enabled = enabled
+        self.precision = precision
+        self.flush_interval = flush_interval
+        self.max_pending_sketches = max_pending_sketches
+        self._session_factory: Optional[SessionFactory] = None
+        self._pending: Dict[Tuple[int, date], HyperLogLog] = {}
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+        self.flushes = 0
+        self.failed_flushes = 0
+        self.flushed_sketches = 0
+        self.dropped_visits = 0
+        self.dropped_sketches = 0
+
+    @property
+    def pending_sketches(self) -> int:
+        return len(self._pending)
+
+    def add(
+        self,
+        qr_code_id: int,
+        client: Optional[str],
+        user_agent: Optional[str] = None,
+        scanned_at: Optional[datetime] = None,
+    ) -> None:
+        if not self.enabled:
+            return
+        visitor = visitor_hash(client, user_agent)
+        if visitor is None:
+            return
+
+        scanned_at = scanned_at or datetime.now(timezone.utc)
+        key = (qr_code_id, scanned_at.astimezone(timezone.utc).date())
+        sketch = self._pending.get(key)
+        if sketch is None:
+            if len(self._pending) >= self.max_pending_sketches:
+                self.dropped_visits += 1
+                return
+            sketch = self._pending[key] = HyperLogLog(self.precision)
+        sketch.add(visitor)
+
+    async def flush(self) -> int:
+        """Merge all pending sketches into the stored ones, return their number"""
+        if self._session_factory is None:
+            return 0
+
+        async with self._flush_lock:
+            batch, self._pending = self._pending, {}
+            if not batch:
+                return 0
+
+            try:
+                async with self._session_factory() as session:
+                    await VisitorSketchRepository(session).merge_sketches(
+                        {key: sketch.to_bytes() for key, sketch in batch.items()}
+                    )
+            except DB_UNAVAILABLE_ERRORS:
+                for key, sketch in batch.items():
+                    pending = self._pending.get(key)
+                    if pending is not None:
+                        pending.merge(sketch)
+                    elif len(self._pending) < self.max_pending_sketches:
+                        self._pending[key] = sketch
+                    else:
+                        self.dropped_sketches += 1
+                self.failed_flushes += 1
+                logger.exception("Failed to flush %d visitor sketches", len(batch))
+                return 0
+            except ProgrammingError:
+                # No later flush can succeed against a schema without the table
+                self.enabled = False
+                self.dropped_sketches += len(batch) + len(self._pending)
+                self._pending.clear()
+                self.failed_flushes += 1
+                logger.exception(
+                    "Unique visitors disabled, run migrate_schema to create "
+                    "visitor_sketches_daily"
+                )
+                return 0
+            except Exception:
+                self.dropped_sketches += len(batch)
+                self.failed_flushes += 1
+                logger.exception("Dropped %d visitor sketches", len(batch))
+                return 0
+
+            self.flushes += 1
+            self.flushed_sketches += len(batch)
+            return len(batch)
+
+    async def start(self, session_factory: SessionFactory) -> None:
+        self._session_factory = session_factory
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the periodic flush and write out everything still pending"""
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        await self.flush()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "pending_sketches": self.pending_sketches,
+            "flushes": self.flushes,
+            "failed_flushes": self.failed_flushes,
+            "flushed_sketches": self.flushed_sketches,
+            "dropped_visits": self.dropped_visits,
+            "dropped_sketches": self.dropped_sketches,
+        }
+
+
+unique_visitor_tracker = UniqueVisitorTracker(
+    enabled=unique_visitor_settings.enabled,
+    precision=unique_visitor_settings.precision,
+    flush_interval=unique_visitor_settings.flush_interval,
+    max_pending_sketches=unique_visitor_settings.max_pending_sketches,
+)
+
+__all__ = ("UniqueVisitorTracker", "unique_visitor_tracker", "visitor_hash")
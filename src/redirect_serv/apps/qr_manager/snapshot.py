@@ -0,0 +1,338 @@
+"""Binary redirect snapshot shared by all workers through mmap.
+
+Layout (little endian):
+
+    header   magic(8) version(H) reserved(H) count(I) created_at(q)
+             pool_offset(Q) pool_size(Q) checksum(I)
+    records  count x [url_hash(32s) qr_code_id(I) company_branch_id(I)
+             subdomain_offset(I)], sorted by url_hash bytes
+    pool     subdomains as [length(B) utf-8 bytes], deduplicated
+
+checksum is the CRC32 of everything after the header. Files are only ever
+replaced (new inode), never rewritten in place, since workers keep them mapped.
+"""
+
+import asyncio
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import time
+import zlib
+from contextlib import suppress
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from src.redirect_serv.apps.qr_manager.schemas import RedirectTarget
+from src.redirect_serv.core.config import cache_settings
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_MAGIC = b"QRSNAP\x00\x00"
+SNAPSHOT_VERSION = 1
+
+_HEADER = struct.Struct("<8sHHIqQQI")
+_RECORD = struct.Struct("<32sIII")
+_KEY_SIZE = 32
+
+# Masks outlive a snapshot built this long after them: ORM hooks fire at
+# flush, so a build may start after a mask but before the change commits
+_MASK_GRACE_SECONDS = 60
+
+
+class SnapshotError(Exception):
+    """Raised when a snapshot file is malformed or fails its checksum"""
+
+    pass
+
+
+def write_snapshot(
+    path: str, rows: Iterable[Tuple[str, int, int, str]], created_at: int
+) -> int:
+    """Write (url_hash, qr_code_id, company_branch_id, subdomain) rows to path.
+
+    The file is written next to path and moved into place atomically, so
+    readers see either the old or the new snapshot. Returns the row count.
+    """
+    pool = bytearray()
+    pool_offsets: Dict[str, int] = {}
+    records: List[Tuple[bytes, int, int, int]] = []
+
+    for url_hash, qr_code_id, company_branch_id, subdomain in rows:
+        offset = pool_offsets.get(subdomain)
+        if offset is None:
+            encoded = subdomain.encode()
+            offset = pool_offsets[subdomain] = len(pool)
+            pool.append(len(encoded))
+            pool += encoded
+        records.append((bytes.fromhex(url_hash), qr_code_id, company_branch_id, offset))
+
+    records.sort(key=lambda record: record[0])
+    body = bytearray(len(records) * _RECORD.size)
+    for index, record in enumerate(records):
+        _RECORD.pack_into(body, index * _RECORD.size, *record)
+    body += pool
+
+    header = _HEADER.pack(
+        SNAPSHOT_MAGIC,
+        SNAPSHOT_VERSION,
+        0,
+        len(records),
+        created_at,
+        _HEADER.size + len(records) * _RECORD.size,
+        len(pool),
+        zlib.crc32(body),
+    )
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".snapshot-")
+    try:
+        with os.fdopen(fd, "wb") as tmp:
+            tmp.write(header)
+            tmp.write(body)
+            tmp.flush()
+            os.fsync(tmp.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        with suppress(FileNotFoundError):
+            os.unlink(tmp_path)
+        raise
+
+    return len(records)
+
+
+class RedirectSnapshot:
+    """Read-only view of one snapshot file, binary searched in place"""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as file:
+            stat = os.fstat(file.fileno())
+            if stat.st_size < _HEADER.size:
+                raise SnapshotError(f"{path} is too small to be a snapshot")
+            self._mm = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self.file_id = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        try:
+            self._read_header(path)
+        except SnapshotError:
+            self._mm.close()
+            raise
+
+    def _read_header(self, path: str) -> None:
+        (
+            magic,
+            version,
+            _reserved,
+            self.count,
+            self.created_at,
+            self._pool_offset,
+            pool_size,
+            checksum,
+        ) = _HEADER.unpack_from(self._mm, 0)
+
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+            raise SnapshotError(f"{path} has an unsupported format")
+        if self._pool_offset + pool_size != len(self._mm):
+            raise SnapshotError(f"{path} is truncated")
+        if zlib.crc32(memoryview(self._mm)[_HEADER.size :]) != checksum:
+            raise SnapshotError(f"{path} failed its checksum")
+
+    def get(self, url_hash: str) -> Optional[RedirectTarget]:
+        try:
+            key = bytes.fromhex(url_hash)
+        except ValueError:
+            return None
+        if len(key) != _KEY_SIZE:
+            return None
+
+        mm = self._mm
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            offset = _HEADER.size + middle * _RECORD.size
+            probe = mm[offset : offset + _KEY_SIZE]
+            if probe < key:
+                low = middle + 1
+            elif probe > key:
+                high = middle
+            else:
+                return self._target(offset)
+        return None
+
+    def items(self) -> Iterator[Tuple[str, RedirectTarget]]:
+        """Every (url_hash, target) in url_hash order"""
+        for index in range(self.count):
+            offset = _HEADER.size + index * _RECORD.size
+            key = self._mm[offset : offset + _KEY_SIZE]
+            yield key.hex(), self._target(offset)
+
+    def _target(self, offset: int) -> RedirectTarget:
+        _, qr_code_id, company_branch_id, subdomain_offset = _RECORD.unpack_from(
+            self._mm, offset
+        )
+        return RedirectTarget(
+            qr_code_id=qr_code_id,
+            company_branch_id=company_branch_id,
+            subdomain=self._subdomain(subdomain_offset),
+        )
+
+    def _subdomain(self, offset: int) -> str:
+        start = self._pool_offset + offset
+        length = self._mm[start]
+        return self._mm[start + 1 : start + 1 + length].decode()
+
+    def close(self) -> None:
+        self._mm.close()
+
+
+class RedirectSnapshotWatcher:
+    """Keeps the newest valid snapshot at path mapped, reloading on change.
+
+    The invalidation hooks mask entries changed through this worker, by
+    hash, company branch or subdomain, so get() stops returning them until a
+    snapshot built after the change is loaded.
+    """
+
+    def __init__(self, path: str, check_interval: float):
+        self.path = path
+        self.check_interval = check_interval
+        self._snapshot: Optional[RedirectSnapshot] = None
+        self._task: Optional[asyncio.Task] = None
+        # Masked key -> time.time() it was masked at
+        self._masked_hashes: Dict[str, float] = {}
+        self._masked_branches: Dict[int, float] = {}
+        self._masked_subdomains: Dict[str, float] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.masked = 0
+        self.reloads = 0
+        self.failed_reloads = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    @property
+    def ready(self) -> bool:
+        return self._snapshot is not None
+
+    def get(self, url_hash: str) -> Optional[RedirectTarget]:
+        if self._snapshot is None:
+            return None
+        target = self._snapshot.get(url_hash)
+        if target is None:
+            self.misses += 1
+        elif self._is_masked(url_hash, target):
+            self.masked += 1
+            return None
+        else:
+            self.hits += 1
+        return target
+
+    def _is_masked(self, url_hash: str, target: RedirectTarget) -> bool:
+        return (
+            url_hash in self._masked_hashes
+            or target.company_branch_id in self._masked_branches
+            or target.subdomain in self._masked_subdomains
+        )
+
+    def mask_url_hash(self, url_hash: str) -> None:
+        self._masked_hashes[url_hash] = time.time()
+
+    def mask_company_branch(self, company_branch_id: int) -> None:
+        self._masked_branches[company_branch_id] = time.time()
+
+    def mask_subdomain(self, subdomain: str) -> None:
+        self._masked_subdomains[subdomain] = time.time()
+
+    def _unmask_before(self, created_at: float) -> None:
+        """Drop masks the snapshot built at created_at already reflects"""
+        cutoff = created_at - _MASK_GRACE_SECONDS
+        for masks in (
+            self._masked_hashes,
+            self._masked_branches,
+            self._masked_subdomains,
+        ):
+            for key in [key for key, masked_at in masks.items() if masked_at < cutoff]:
+                del masks[key]
+
+    def reload_if_changed(self) -> bool:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+
+        current = self._snapshot
+        if current is not None and current.file_id == (
+            stat.st_ino,
+            stat.st_mtime_ns,
+            stat.st_size,
+        ):
+            return False
+
+        try:
+            snapshot = RedirectSnapshot(self.path)
+        except (OSError, SnapshotError):
+            self.failed_reloads += 1
+            logger.exception("Keeping previous redirect snapshot")
+            return False
+
+        # Lookups never await, so no reader can still hold the old mapping
+        self._snapshot = snapshot
+        if current is not None:
+            current.close()
+        self._unmask_before(snapshot.created_at)
+        self.reloads += 1
+        return True
+
+    async def start(self) -> None:
+        if self.enabled and self._task is None:
+            self.reload_if_changed()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.check_interval)
+            self.reload_if_changed()
+
+    def stats(self) -> Dict[str, Any]:
+        snapshot = self._snapshot
+        return {
+            "ready": self.ready,
+            "entries": snapshot.count if snapshot is not None else 0,
+            "age_seconds": (
+                time.time() - snapshot.created_at if snapshot is not None else None
+            ),
+            "hits": self.hits,
+            "misses": self.misses,
+            "masked": self.masked,
+            "masked_entries": (
+                len(self._masked_hashes)
+                + len(self._masked_branches)
+                + len(self._masked_subdomains)
+            ),
+            "reloads": self.reloads,
+            "failed_reloads": self.failed_reloads,
+        }
+
+
+redirect_snapshot = RedirectSnapshotWatcher(
+    path=cache_settings.redirect_snapshot_path,
+    check_interval=cache_settings.redirect_snapshot_check_interval,
+)
+
+__all__ = (
+    "RedirectSnapshot",
+    "RedirectSnapshotWatcher",
+    "SnapshotError",
+    "redirect_snapshot",
+    "write_snapshot",
+)
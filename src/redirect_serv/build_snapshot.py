@@ -0,0 +1,46 @@
+"""Export the resolved redirect table into a snapshot file for workers to mmap.
+
+python -m src.redirect_serv.build_snapshot --output /var/lib/redirect/snapshot.bin
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Optional
+
+from src.redirect_serv.apps.qr_manager.repositories import QRCodeRepository
+from src.redirect_serv.apps.qr_manager.snapshot import write_snapshot
+from src.redirect_serv.core.config import cache_settings
+from src.redirect_serv.core.dependencies.database import AsyncSessionLocal, engine
+
+
+async def build_snapshot(path: str) -> int:
+    # Taken before reading, so workers only unmask changes the rows include
+    created_at = int(time.time())
+    async with AsyncSessionLocal() as session:
+        rows = [
+            (row.url_hash, row.id, row.company_branch_id, row.subdomain)
+            async for row in QRCodeRepository(session).stream_redirect_rows()
+        ]
+    await engine.dispose()
+    return write_snapshot(path, rows, created_at=created_at)
+
+
+def main(argv: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--output",
+        default=cache_settings.redirect_snapshot_path,
+        required=not cache_settings.redirect_snapshot_path,
+        help="snapshot path (defaults to REDIRECT_SNAPSHOT_PATH)",
+    )
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    count = asyncio.run(build_snapshot(args.output))
+    elapsed = time.perf_counter() - started
+    print(f"Wrote {count} redirects to {args.output} in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,102 @@
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from src.redirect_serv.api import api_router, health_router
-from src.redirect_serv.core.config import cors_settings
-from src.redirect_serv.core.exceptions import NotFoundError
-from src.redirect_serv.core.handlers import not_found_handler
+from src.redirect_serv.api import (
+    api_router,
+    health_router,
+    metrics_router,
+    profiling_router,
+)
+from src.redirect_serv.api.fast_redirect import (
+    REDIRECT_PREFIX,
+    RedirectFastPathMiddleware,
+)
+from src.redirect_serv.api.metrics import stats_exporter
+from src.redirect_serv.api.profiling import profile_store
+from src.redirect_serv.apps.qr_manager.hash_filter import known_hash_filter
+from src.redirect_serv.apps.qr_manager.last_known import last_known_store
+from src.redirect_serv.apps.qr_manager.qr_image import qr_image_renderer
+from src.redirect_serv.apps.qr_manager.redirect_table import redirect_table
+from src.redirect_serv.apps.qr_manager.services import (
+    scan_count_aggregator,
+    scan_count_sharding,
+    scan_event_recorder,
+    scan_rollup_aggregator,
+    scan_spool,
+    unique_visitor_tracker,
+)
+from src.redirect_serv.apps.qr_manager.snapshot import redirect_snapshot
+from src.redirect_serv.core.config import (
+    base_settings,
+    cors_settings,
+    db_settings,
+    metrics_settings,
+    profiling_settings,
+    rate_limit_settings,
+    redirect_settings,
+    server_settings,
+)
+from src.redirect_serv.core.dependencies.database import AsyncSessionLocal, engine
+from src.redirect_serv.core.exceptions import (
+    BadRequestError,
+    NotFoundError,
+    NotSupportedError,
+    ServiceUnavailableError,
+)
+from src.redirect_serv.core.handlers import (
+    bad_request_handler,
+    not_found_handler,
+    not_supported_handler,
+    service_unavailable_handler,
+)
+from src.redirect_serv.core.metrics import MetricsMiddleware
+from src.redirect_serv.core.profiling import ProfilingMiddleware
+from src.redirect_serv.core.rate_limit import RateLimitMiddleware, rate_limiter
+from src.redirect_serv.core.replicas import replica_router
+from src.redirect_serv.core.warmup import warm_up_or_log
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI) -> AsyncIterator[None]:
+    await replica_router.start()
+    await scan_count_aggregator.start(AsyncSessionLocal)
+    await scan_count_sharding.start(AsyncSessionLocal)
+    await scan_event_recorder.start(AsyncSessionLocal)
+    await scan_rollup_aggregator.start(AsyncSessionLocal)
+    await unique_visitor_tracker.start(AsyncSessionLocal)
+    await known_hash_filter.start(AsyncSessionLocal)
+    await redirect_table.start(AsyncSessionLocal)
+    await redirect_snapshot.start()
+    await last_known_store.start()
+    await scan_spool.start(AsyncSessionLocal)
+    if metrics_settings.enabled:
+        await stats_exporter.start()
+    # Last, so the worker only reports ready once its pool is warm
+    await warm_up_or_log(
+        engine,
+        min(server_settings.warmup_connections, db_settings.pool_size),
+        server_settings.warmup_timeout,
+    )
+    try:
+        yield
+    finally:
+        await stats_exporter.stop()
+        await qr_image_renderer.stop()
+        await scan_spool.stop()
+        await last_known_store.stop()
+        await redirect_snapshot.stop()
+        await redirect_table.stop()
+        await known_hash_filter.stop()
+        await unique_visitor_tracker.stop()
+        await scan_rollup_aggregator.stop()
+        await scan_event_recorder.stop()
+        await scan_count_sharding.stop()
+        await scan_count_aggregator.stop()
+        await replica_router.stop()
+        await engine.dispose()
 
 
 def create_app() -> FastAPI:
@@ -12,6 +104,7 @@ def create_app() -> FastAPI:
         title="Redirect_serv API",
         description="API for redirect_serv",
         version="0.1.0",
+        lifespan=lifespan,
     )
 
     if cors_settings.enabled:
@@ -23,12 +116,52 @@ def create_app() -> FastAPI:
             allow_headers=cors_settings.allow_headers,
         )
 
+    # Middleware added later wraps the one added before it. The fast path
+    # wraps CORS and the routes, and answers redirects without either; the
+    # profiler, rate limiter and metrics below wrap the fast path in turn, so
+    # fast-path requests are still profiled, throttled and timed
+    if redirect_settings.fast_path:
+        app.add_middleware(
+            RedirectFastPathMiddleware,
+            settings=base_settings,
+            dependency_overrides=app.dependency_overrides,
+        )
+
+    if profiling_settings.enabled:
+        app.add_middleware(
+            ProfilingMiddleware,
+            store=profile_store,
+            token=profiling_settings.token,
+            sample_rate=profiling_settings.sample_rate,
+        )
+
+    # Ahead of the fast path, so throttled requests never open a session
+    if rate_limit_settings.enabled:
+        app.add_middleware(
+            RateLimitMiddleware,
+            limiter=rate_limiter,
+            path_prefixes=rate_limit_settings.path_prefixes,
+            key=rate_limit_settings.key,
+            trusted_proxies=rate_limit_settings.trusted_proxies,
+        )
+
+    # Outermost of all so redirect timings include the fast path
+    if metrics_settings.enabled:
+        app.add_middleware(MetricsMiddleware, redirect_prefix=REDIRECT_PREFIX)
+
     # Exception handlers
     app.add_exception_handler(NotFoundError, not_found_handler)  # type: ignore[arg-type]
+    app.add_exception_handler(BadRequestError, bad_request_handler)  # type: ignore[arg-type]
+    app.add_exception_handler(NotSupportedError, not_supported_handler)  # type: ignore[arg-type]
+    app.add_exception_handler(ServiceUnavailableError, service_unavailable_handler)  # type: ignore[arg-type]
 
     # Routers
     app.include_router(api_router)
     app.include_router(health_router)
+    if metrics_settings.enabled:
+        app.include_router(metrics_router)
+    if profiling_settings.enabled:
+        app.include_router(profiling_router)
 
     return app
 
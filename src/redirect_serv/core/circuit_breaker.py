@@ -0,0 +1,103 @@
+import logging
+import time
+from typing import Callable, Dict
+
+from sqlalchemy.exc import InterfaceError, OperationalError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from src.redirect_serv.core.config import degraded_mode_settings
+
+logger = logging.getLogger(__name__)
+
+# Failures meaning the database cannot be reached, as opposed to a bad query.
+# OSError covers refused connections and asyncio timeouts.
+DB_UNAVAILABLE_ERRORS = (OperationalError, InterfaceError, PoolTimeoutError, OSError)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker.
+
+    Opens after failure_threshold failures in a row and rejects calls for
+    reset_timeout seconds. Then a single trial call is let through
+    (half-open): success closes the circuit, failure opens it again.
+    Not thread-safe: intended to be used from a single event loop per worker.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int,
+        reset_timeout: float,
+        timer: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._timer = timer
+        self.state = CLOSED
+        self._changed_at = timer()
+        self.consecutive_failures = 0
+        self.opens = 0
+        self.rejected = 0
+
+    @property
+    def closed(self) -> bool:
+        return self.state == CLOSED
+
+    def allow(self) -> bool:
+        if self.state == CLOSED:
+            return True
+        # A trial that never reported back does not block the circuit forever
+        if self._timer() - self._changed_at >= self.reset_timeout:
+            self._set_state(HALF_OPEN)
+            return True
+        self.rejected += 1
+        return False
+
+    def record_success(self) -> None:
+        self.consecutive_failures = 0
+        if self.state != CLOSED:
+            self._set_state(CLOSED)
+            logger.info("Circuit %s closed", self.name)
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        if self.state == HALF_OPEN or (
+            self.state == CLOSED and self.consecutive_failures >= self.failure_threshold
+        ):
+            self._set_state(OPEN)
+            self.opens += 1
+            logger.warning(
+                "Circuit %s opened after %d consecutive failures",
+                self.name,
+                self.consecutive_failures,
+            )
+
+    def _set_state(self, state: str) -> None:
+        self.state = state
+        self._changed_at = self._timer()
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "open": int(self.state != CLOSED),
+            "consecutive_failures": self.consecutive_failures,
+            "opens": self.opens,
+            "rejected": self.rejected,
+        }
+
+
+db_circuit_breaker = CircuitBreaker(
+    "database",
+    failure_threshold=degraded_mode_settings.breaker_failure_threshold,
+    reset_timeout=degraded_mode_settings.breaker_reset_timeout,
+)
+
+__all__ = (
+    "DB_UNAVAILABLE_ERRORS",
+    "CircuitBreaker",
+    "db_circuit_breaker",
+)
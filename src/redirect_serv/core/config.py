@@ -1,4 +1,5 @@
 import os
+from typing import List
 
 from dotenv import load_dotenv
 
@@ -13,10 +14,48 @@ class DBSettings:
         self.user = os.environ["SQL_USER"]
         self.password = os.environ["SQL_PASSWORD"]
 
+        # Connection pool
+        self.pool_size = int(os.environ.get("SQL_POOL_SIZE", "5"))
+        self.max_overflow = int(os.environ.get("SQL_MAX_OVERFLOW", "10"))
+        self.pool_timeout = float(os.environ.get("SQL_POOL_TIMEOUT", "30"))
+        self.pool_recycle = int(os.environ.get("SQL_POOL_RECYCLE", "1800"))
+        self.pool_pre_ping = (
+            os.environ.get("SQL_POOL_PRE_PING", "false").lower() == "true"
+        )
+        self.prepared_statement_cache_size = int(
+            os.environ.get("SQL_PREPARED_STATEMENT_CACHE_SIZE", "100")
+        )
+
+        # Read replicas as comma-separated host[:port]; QR code lookups are
+        # spread over the healthy ones, everything else uses the primary
+        self.replica_hosts = [
+            host.strip()
+            for host in os.environ.get("SQL_REPLICA_HOSTS", "").split(",")
+            if host.strip()
+        ]
+        # Replicas lagging further behind are skipped until they catch up
+        self.replica_max_lag = float(os.environ.get("SQL_REPLICA_MAX_LAG", "5"))
+        self.replica_check_interval = float(
+            os.environ.get("SQL_REPLICA_CHECK_INTERVAL", "5")
+        )
+        self.replica_check_timeout = float(
+            os.environ.get("SQL_REPLICA_CHECK_TIMEOUT", "2")
+        )
+
     @property
     def ASYNC_DATABASE_URL(self) -> str:  # noqa
         return f"postgresql+asyncpg://{self.user}:{self.password}@{self.host}:{self.port}/{self.database}"
 
+    @property
+    def ASYNC_REPLICA_DATABASE_URLS(self) -> List[str]:  # noqa
+        urls = []
+        for replica in self.replica_hosts:
+            host, _, port = replica.partition(":")
+            urls.append(
+                f"postgresql+asyncpg://{self.user}:{self.password}@{host}:{port or self.port}/{self.database}"
+            )
+        return urls
+
     @property
     def SYNC_DATABASE_URL(self) -> str:  # noqa
         return f"postgresql+psycopg2://{self.user}:{self.password}@{self.host}:{self.port}/{self.database}"
@@ -49,6 +88,285 @@ class BaseSettings:
         return "https" if self.use_https else "http"
 
 
+class RedirectSettings:
+    def __init__(self):
+        # Serve /redirect/{hash} from a raw ASGI handler ahead of FastAPI routing
+        self.fast_path = os.environ.get("REDIRECT_FAST_PATH", "false").lower() == "true"
+        # Cacheable redirects without a synchronous scan count; scans are then
+        # counted by ingest_access_logs from the proxy/CDN access logs
+        self.edge_cache = (
+            os.environ.get("REDIRECT_EDGE_CACHE", "false").lower() == "true"
+        )
+        # Browsers revalidate by default so repeat scans still reach the edge logs
+        self.edge_max_age = int(os.environ.get("REDIRECT_EDGE_MAX_AGE", "0"))
+        self.edge_shared_max_age = int(
+            os.environ.get("REDIRECT_EDGE_SHARED_MAX_AGE", "300")
+        )
+
+
+class HealthSettings:
+    def __init__(self):
+        # Seconds a readiness probe result is reused before the DB is probed again
+        self.ready_probe_ttl = float(os.environ.get("HEALTH_READY_PROBE_TTL", "5"))
+
+
+class CacheSettings:
+    def __init__(self):
+        # Per-worker redirect cache; size 0 disables it
+        self.redirect_cache_size = int(os.environ.get("REDIRECT_CACHE_SIZE", "10000"))
+        self.redirect_cache_ttl = float(os.environ.get("REDIRECT_CACHE_TTL", "60"))
+        # Short-lived memory of hashes the DB did not know
+        self.negative_cache_size = int(os.environ.get("NEGATIVE_CACHE_SIZE", "10000"))
+        self.negative_cache_ttl = float(os.environ.get("NEGATIVE_CACHE_TTL", "10"))
+        # Bloom filter of every known hash, used to 404 unknown ones without a query
+        self.bloom_filter_enabled = (
+            os.environ.get("BLOOM_FILTER_ENABLED", "true").lower() == "true"
+        )
+        self.bloom_filter_error_rate = float(
+            os.environ.get("BLOOM_FILTER_ERROR_RATE", "0.01")
+        )
+        self.bloom_filter_refresh_interval = float(
+            os.environ.get("BLOOM_FILTER_REFRESH_INTERVAL", "5")
+        )
+        self.bloom_filter_rebuild_interval = float(
+            os.environ.get("BLOOM_FILTER_REBUILD_INTERVAL", "600")
+        )
+        # Whole hash -> target table held in memory and synced by updated_at
+        self.redirect_table_enabled = (
+            os.environ.get("REDIRECT_TABLE_ENABLED", "false").lower() == "true"
+        )
+        self.redirect_table_poll_interval = float(
+            os.environ.get("REDIRECT_TABLE_POLL_INTERVAL", "2")
+        )
+        self.redirect_table_reload_interval = float(
+            os.environ.get("REDIRECT_TABLE_RELOAD_INTERVAL", "300")
+        )
+        # mmap-ed snapshot built by build_snapshot; empty path disables it
+        self.redirect_snapshot_path = os.environ.get("REDIRECT_SNAPSHOT_PATH", "")
+        self.redirect_snapshot_check_interval = float(
+            os.environ.get("REDIRECT_SNAPSHOT_CHECK_INTERVAL", "5")
+        )
+
+
+class ScanCountSettings:
+    def __init__(self):
+        # Write-behind batching of scan counts instead of a commit per redirect
+        self.write_behind = (
+            os.environ.get("SCAN_COUNT_WRITE_BEHIND", "false").lower() == "true"
+        )
+        self.flush_interval = float(os.environ.get("SCAN_COUNT_FLUSH_INTERVAL", "1.0"))
+        self.flush_threshold = int(os.environ.get("SCAN_COUNT_FLUSH_THRESHOLD", "1000"))
+        # Without write-behind, codes scanned faster than hot_threshold per
+        # second in a worker count into one of `shards` rows each instead of
+        # all locking their qr_codes row; compacted back every compact_interval
+        # (needs migrate_schema first)
+        self.sharding = os.environ.get("SCAN_COUNT_SHARDING", "false").lower() == "true"
+        self.shards = int(os.environ.get("SCAN_COUNT_SHARDS", "8"))
+        self.hot_threshold = float(os.environ.get("SCAN_COUNT_HOT_THRESHOLD", "20"))
+        # Seconds a code stays sharded after its rate last crossed the threshold
+        self.hot_ttl = float(os.environ.get("SCAN_COUNT_HOT_TTL", "300"))
+        self.compact_interval = float(
+            os.environ.get("SCAN_COUNT_COMPACT_INTERVAL", "10")
+        )
+
+
+class ScanEventSettings:
+    def __init__(self):
+        # Append-only scan event log, written through a bounded in-process queue
+        # (needs migrate_schema and a maintain_scan_events run first)
+        self.enabled = os.environ.get("SCAN_EVENTS_ENABLED", "false").lower() == "true"
+        self.queue_size = int(os.environ.get("SCAN_EVENTS_QUEUE_SIZE", "100000"))
+        self.batch_size = int(os.environ.get("SCAN_EVENTS_BATCH_SIZE", "1000"))
+        self.flush_interval = float(os.environ.get("SCAN_EVENTS_FLUSH_INTERVAL", "1.0"))
+        self.overflow_policy = os.environ.get(
+            "SCAN_EVENTS_OVERFLOW_POLICY", "drop_newest"
+        )
+        self.retention_days = int(os.environ.get("SCAN_EVENTS_RETENTION_DAYS", "90"))
+        self.partitions_ahead = int(os.environ.get("SCAN_EVENTS_PARTITIONS_AHEAD", "7"))
+
+
+class ScanRollupSettings:
+    def __init__(self):
+        # Hourly/daily scan rollups fed from the redirect path, flushed in
+        # batches (needs migrate_schema first)
+        self.enabled = os.environ.get("SCAN_ROLLUPS_ENABLED", "false").lower() == "true"
+        self.flush_interval = float(os.environ.get("SCAN_ROLLUPS_FLUSH_INTERVAL", "5"))
+        # (qr_code, hour) buckets held between flushes, bounding memory while
+        # the database is unreachable
+        self.max_pending_buckets = int(
+            os.environ.get("SCAN_ROLLUPS_MAX_PENDING_BUCKETS", "100000")
+        )
+        # Upper bounds on one stats request, keeping reads to a few hundred rows
+        self.max_hourly_days = int(os.environ.get("SCAN_STATS_MAX_HOURLY_DAYS", "31"))
+        self.max_daily_days = int(os.environ.get("SCAN_STATS_MAX_DAILY_DAYS", "366"))
+
+
+class UniqueVisitorSettings:
+    def __init__(self):
+        # Daily HyperLogLog sketch per QR code of the clients that scanned it,
+        # merged in memory and written every flush interval (needs
+        # migrate_schema first)
+        self.enabled = (
+            os.environ.get("UNIQUE_VISITORS_ENABLED", "false").lower() == "true"
+        )
+        self.flush_interval = float(
+            os.environ.get("UNIQUE_VISITORS_FLUSH_INTERVAL", "10")
+        )
+        # 2**precision bytes per sketch, standard error 1.04 / sqrt(2**precision);
+        # lowering it later is safe, stored sketches are folded on read
+        self.precision = int(os.environ.get("UNIQUE_VISITORS_PRECISION", "12"))
+        # (qr_code, day) sketches held between flushes, bounding memory while
+        # the database is unreachable
+        self.max_pending_sketches = int(
+            os.environ.get("UNIQUE_VISITORS_MAX_PENDING_SKETCHES", "20000")
+        )
+
+
+class MetricsSettings:
+    def __init__(self):
+        self.enabled = os.environ.get("METRICS_ENABLED", "true").lower() == "true"
+        # How often each worker copies component counters into its metrics
+        self.sync_interval = float(os.environ.get("METRICS_SYNC_INTERVAL", "5"))
+
+
+class ProfilingSettings:
+    def __init__(self):
+        # Off by default: the middleware is not even installed then
+        self.enabled = os.environ.get("PROFILING_ENABLED", "false").lower() == "true"
+        # Requests carrying "X-Profile: <token>" are profiled; empty disables it
+        self.token = os.environ.get("PROFILING_TOKEN", "")
+        self.sample_rate = float(os.environ.get("PROFILING_SAMPLE_RATE", "0"))
+        self.directory = os.environ.get(
+            "PROFILING_DIR", "/tmp/redirect_serv_profiles"  # nosec B108
+        )
+        self.max_files = int(os.environ.get("PROFILING_MAX_FILES", "200"))
+        self.max_bytes = int(os.environ.get("PROFILING_MAX_BYTES", str(100 * 2**20)))
+
+
+class QRImageSettings:
+    def __init__(self):
+        # Public origin of this service; images encode <base_url>/redirect/<hash>
+        self.base_url = os.environ.get("QR_IMAGE_BASE_URL", "http://localhost:8000")
+        # Rendered images shared by all workers; empty keeps them in memory only
+        self.cache_dir = os.environ.get(
+            "QR_IMAGE_CACHE_DIR", "/tmp/redirect_serv_qr_images"  # nosec B108
+        )
+        self.memory_cache_bytes = int(
+            os.environ.get("QR_IMAGE_MEMORY_CACHE_BYTES", str(64 * 2**20))
+        )
+        # Oldest images in cache_dir are removed once it grows past this;
+        # 0 lets it grow without bound
+        self.disk_cache_bytes = int(
+            os.environ.get("QR_IMAGE_DISK_CACHE_BYTES", str(1024 * 2**20))
+        )
+        # Render processes per worker; 0 renders in the default thread pool
+        self.render_workers = int(os.environ.get("QR_IMAGE_RENDER_WORKERS", "2"))
+        self.max_scale = int(os.environ.get("QR_IMAGE_MAX_SCALE", "40"))
+        # Quiet zone in modules; the standard asks for 4
+        self.max_border = int(os.environ.get("QR_IMAGE_MAX_BORDER", "16"))
+        self.max_age = int(os.environ.get("QR_IMAGE_MAX_AGE", "300"))
+
+
+class DegradedModeSettings:
+    def __init__(self):
+        # Consecutive DB failures that open the circuit, and seconds it stays
+        # open before one request is let through to probe the database
+        self.breaker_failure_threshold = int(
+            os.environ.get("DB_BREAKER_FAILURE_THRESHOLD", "5")
+        )
+        self.breaker_reset_timeout = float(
+            os.environ.get("DB_BREAKER_RESET_TIMEOUT", "10")
+        )
+        # Every target resolved by a worker, kept without expiry to serve
+        # redirects while the circuit is open
+        self.last_known_size = int(os.environ.get("LAST_KNOWN_TARGETS_SIZE", "100000"))
+        # Loaded at startup and saved periodically; empty keeps it in memory only
+        self.last_known_path = os.environ.get("LAST_KNOWN_TARGETS_PATH", "")
+        self.last_known_save_interval = float(
+            os.environ.get("LAST_KNOWN_TARGETS_SAVE_INTERVAL", "60")
+        )
+        # Scans that could not be counted are appended here; empty drops them
+        self.spool_dir = os.environ.get(
+            "SCAN_SPOOL_DIR", "/tmp/redirect_serv_scan_spool"  # nosec B108
+        )
+        self.spool_fsync_interval = float(
+            os.environ.get("SCAN_SPOOL_FSYNC_INTERVAL", "0.5")
+        )
+        self.spool_replay_interval = float(
+            os.environ.get("SCAN_SPOOL_REPLAY_INTERVAL", "10")
+        )
+
+
+class RateLimitSettings:
+    def __init__(self):
+        self.enabled = os.environ.get("RATE_LIMIT_ENABLED", "false").lower() == "true"
+        # Token bucket per client: sustained requests per second and burst size
+        self.rate = float(os.environ.get("RATE_LIMIT_RATE", "10"))
+        self.burst = int(os.environ.get("RATE_LIMIT_BURST", "40"))
+        # Only requests under these path prefixes are limited
+        self.path_prefixes = [
+            prefix.strip()
+            for prefix in os.environ.get(
+                "RATE_LIMIT_PATH_PREFIXES", "/redirect/,/qr/"
+            ).split(",")
+            if prefix.strip()
+        ]
+        # "client" keys on the peer address; behind proxies use "forwarded",
+        # which takes X-Forwarded-For as seen by the outermost of
+        # RATE_LIMIT_TRUSTED_PROXIES proxies (entries further left are forgeable)
+        self.key = os.environ.get("RATE_LIMIT_KEY", "client")
+        self.trusted_proxies = int(os.environ.get("RATE_LIMIT_TRUSTED_PROXIES", "1"))
+        # Clients tracked per worker, split across shards that are swept in turn
+        self.max_clients = int(os.environ.get("RATE_LIMIT_MAX_CLIENTS", "100000"))
+        self.shards = int(os.environ.get("RATE_LIMIT_SHARDS", "16"))
+        self.sweep_interval = float(os.environ.get("RATE_LIMIT_SWEEP_INTERVAL", "1"))
+
+
+class ServerSettings:
+    def __init__(self):
+        self.host = os.environ.get("SERVER_HOST", "0.0.0.0")  # nosec B104
+        self.port = int(os.environ.get("SERVER_PORT", "8000"))
+        self.workers = int(os.environ.get("SERVER_WORKERS", str(os.cpu_count() or 1)))
+        # "auto" picks uvloop and httptools when installed (the server extra)
+        self.loop = os.environ.get("SERVER_LOOP", "auto")
+        self.http = os.environ.get("SERVER_HTTP", "auto")
+        # Pending connections queued by the kernel per listening socket
+        self.backlog = int(os.environ.get("SERVER_BACKLOG", "2048"))
+        # Longer than the idle timeout of the load balancer in front, so the
+        # server never closes a connection the balancer is about to reuse
+        self.keep_alive = int(os.environ.get("SERVER_KEEP_ALIVE", "75"))
+        self.graceful_shutdown_timeout = int(
+            os.environ.get("SERVER_GRACEFUL_SHUTDOWN_TIMEOUT", "30")
+        )
+        # Trust X-Forwarded-* from these addresses for client IPs and scheme
+        self.forwarded_allow_ips = os.environ.get(
+            "SERVER_FORWARDED_ALLOW_IPS", "127.0.0.1"
+        )
+        # Needed by ingest_access_logs when redirects are counted from logs
+        self.access_log = os.environ.get("SERVER_ACCESS_LOG", "true").lower() == "true"
+        # Pool connections opened, and the redirect lookup run on each, before
+        # a worker starts accepting requests; 0 disables the warm-up
+        self.warmup_connections = int(
+            os.environ.get(
+                "SERVER_WARMUP_CONNECTIONS", os.environ.get("SQL_POOL_SIZE", "5")
+            )
+        )
+        self.warmup_timeout = float(os.environ.get("SERVER_WARMUP_TIMEOUT", "10"))
+
+
 db_settings = DBSettings()
 cors_settings = CorsSettings()
 base_settings = BaseSettings()
+redirect_settings = RedirectSettings()
+health_settings = HealthSettings()
+cache_settings = CacheSettings()
+scan_count_settings = ScanCountSettings()
+scan_event_settings = ScanEventSettings()
+scan_rollup_settings = ScanRollupSettings()
+unique_visitor_settings = UniqueVisitorSettings()
+metrics_settings = MetricsSettings()
+profiling_settings = ProfilingSettings()
+qr_image_settings = QRImageSettings()
+degraded_mode_settings = DegradedModeSettings()
+rate_limit_settings = RateLimitSettings()
+server_settings = ServerSettings()
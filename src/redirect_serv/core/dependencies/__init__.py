@@ -1,5 +1,6 @@
 from .database import SessionDep, get_session
-from .service_dependencies import QRCodeApplicationDep
+from .service_dependencies import QRCodeApplicationDep, ScanStatsApplicationDep
+from .validation import UrlHashDep
 
 __all__ = [
     # Database
@@ -7,4 +8,7 @@ __all__ = [
     "get_session",
     # Services
     "QRCodeApplicationDep",
+    "ScanStatsApplicationDep",
+    # Path parameters
+    "UrlHashDep",
 ]
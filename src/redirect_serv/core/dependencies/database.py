@@ -1,11 +1,12 @@
 from typing import Annotated, AsyncGenerator, TypeAlias
 
 from fastapi import Depends
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from src.redirect_serv.core.config import db_settings
+from src.redirect_serv.core.pool import create_pooled_engine
 
-engine = create_async_engine(db_settings.ASYNC_DATABASE_URL, echo=False, future=True)
+engine = create_pooled_engine(db_settings.ASYNC_DATABASE_URL)
 
 AsyncSessionLocal = async_sessionmaker(
     engine, class_=AsyncSession, expire_on_commit=False
@@ -2,7 +2,10 @@ from typing import Annotated, TypeAlias
 
 from fastapi import Depends
 
-from src.redirect_serv.apps.qr_manager.application import QRCodeApplication
+from src.redirect_serv.apps.qr_manager.application import (
+    QRCodeApplication,
+    ScanStatsApplication,
+)
 from src.redirect_serv.core.dependencies.database import SessionDep
 
 # ==================== SERVICE DEPENDENCIES ====================
@@ -12,9 +15,18 @@ async def get_qr_code_application(session: SessionDep) -> QRCodeApplication:
     return QRCodeApplication(session)
 
 
+async def get_scan_stats_application(session: SessionDep) -> ScanStatsApplication:
+    return ScanStatsApplication(session)
+
+
 # ==================== ANNOTATED TYPES ====================
 
 # QR Code Application
 QRCodeApplicationDep: TypeAlias = Annotated[
     QRCodeApplication, Depends(get_qr_code_application)
 ]
+
+# Scan Stats Application
+ScanStatsApplicationDep: TypeAlias = Annotated[
+    ScanStatsApplication, Depends(get_scan_stats_application)
+]
@@ -0,0 +1,28 @@
+from typing import Annotated, TypeAlias
+
+from fastapi import Depends
+
+from src.redirect_serv.apps.qr_manager.hash_filter import (
+    is_valid_url_hash,
+    known_hash_filter,
+)
+from src.redirect_serv.core.exceptions import NotFoundError
+
+# ==================== PATH PARAMETERS ====================
+
+
+async def get_url_hash(hash: str) -> str:
+    """Reject malformed hashes before any session is opened.
+
+    Lowercased, since the stored bytes match either case but the per-worker
+    caches and filters are keyed by the lowercase hex.
+    """
+    if not is_valid_url_hash(hash):
+        known_hash_filter.rejected_malformed += 1
+        raise NotFoundError(f"QR code with hash '{hash}' not found")
+    return hash.lower()
+
+
+# ==================== ANNOTATED TYPES ====================
+
+UrlHashDep: TypeAlias = Annotated[str, Depends(get_url_hash)]
@@ -2,3 +2,21 @@ class NotFoundError(Exception):
     """Raised when an entity is not found"""
 
     pass
+
+
+class BadRequestError(Exception):
+    """Raised when request parameters are valid but cannot be served"""
+
+    pass
+
+
+class NotSupportedError(Exception):
+    """Raised when a feature needs an optional dependency that is not installed"""
+
+    pass
+
+
+class ServiceUnavailableError(Exception):
+    """Raised when a request cannot be served until a dependency recovers"""
+
+    pass
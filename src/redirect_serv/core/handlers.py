@@ -1,10 +1,37 @@
 from fastapi import Request, status
 from fastapi.responses import JSONResponse
 
-from src.redirect_serv.core.exceptions import NotFoundError
+from src.redirect_serv.core.exceptions import (
+    BadRequestError,
+    NotFoundError,
+    NotSupportedError,
+    ServiceUnavailableError,
+)
 
 
 async def not_found_handler(_request: Request, exc: NotFoundError) -> JSONResponse:
     return JSONResponse(
         status_code=status.HTTP_404_NOT_FOUND, content={"detail": str(exc)}
     )
+
+
+async def bad_request_handler(_request: Request, exc: BadRequestError) -> JSONResponse:
+    return JSONResponse(
+        status_code=status.HTTP_400_BAD_REQUEST, content={"detail": str(exc)}
+    )
+
+
+async def not_supported_handler(
+    _request: Request, exc: NotSupportedError
+) -> JSONResponse:
+    return JSONResponse(
+        status_code=status.HTTP_501_NOT_IMPLEMENTED, content={"detail": str(exc)}
+    )
+
+
+async def service_unavailable_handler(
+    _request: Request, exc: ServiceUnavailableError
+) -> JSONResponse:
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content={"detail": str(exc)}
+    )
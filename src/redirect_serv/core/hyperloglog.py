@@ -0,0 +1,164 @@
+import math
+from typing import Dict, Iterator, Optional, Tuple
+
+MIN_PRECISION = 4
+MAX_PRECISION = 16
+
+# A sparse sketch turns dense past 2**precision >> this many registers set
+_SPARSE_LIMIT_SHIFT = 6
+
+# 2 ** -rank for every rank a register of a 64-bit hash can hold
+_INVERSE_POWERS = [2.0**-rank for rank in range(65)]
+
+
+def _alpha(size: int) -> float:
+    if size == 16:
+        return 0.673
+    if size == 32:
+        return 0.697
+    if size == 64:
+        return 0.709
+    return 0.7213 / (1 + 1.079 / size)
+
+
+class HyperLogLog:
+    """HyperLogLog distinct counter over 64-bit hashes.
+
+    Keeps 2**precision one-byte registers, so a sketch serialises to that
+    many bytes whatever the number of items, and sketches merge by taking
+    the register-wise maximum: merging is a union, and merging the same
+    sketch twice changes nothing. The standard error is about
+    1.04 / sqrt(2**precision), 1.6% at precision 12.
+
+    A new sketch starts sparse, holding only its non-zero registers, and
+    turns dense once that no longer saves memory: most QR codes see a
+    handful of visitors a day. Estimates and serialised bytes are the same
+    either way.
+    """
+
+    def __init__(self, precision: int = 12, registers: Optional[bytes] = None):
+        if not MIN_PRECISION <= precision <= MAX_PRECISION:
+            raise ValueError(
+                f"HyperLogLog precision must be between {MIN_PRECISION} "
+                f"and {MAX_PRECISION}"
+            )
+        size = 1 << precision
+        if registers is not None and len(registers) != size:
+            raise ValueError(f"Expected {size} registers, got {len(registers)}")
+
+        self.precision = precision
+        # Non-zero registers by index while sparse, None once dense
+        self._sparse: Optional[Dict[int, int]] = {} if registers is None else None
+        self._registers = bytearray(registers or b"")
+
+    @classmethod
+    def from_bytes(cls, registers: bytes) -> "HyperLogLog":
+        precision = len(registers).bit_length() - 1
+        if len(registers) != 1 << precision:
+            raise ValueError(f"{len(registers)} is not a power of two")
+        return cls(precision, registers)
+
+    @property
+    def is_sparse(self) -> bool:
+        return self._sparse is not None
+
+    def to_bytes(self) -> bytes:
+        if self._sparse is None:
+            return bytes(self._registers)
+        return bytes(self._expanded())
+
+    def add(self, value: int) -> bool:
+        """Add an unsigned 64-bit hash, return whether a register changed"""
+        bits = 64 - self.precision
+        index = value >> bits
+        rank = bits - (value & ((1 << bits) - 1)).bit_length() + 1
+        sparse = self._sparse
+        if sparse is not None:
+            if rank <= sparse.get(index, 0):
+                return False
+            sparse[index] = rank
+            self._densify_if_large()
+            return True
+        if rank > self._registers[index]:
+            self._registers[index] = rank
+            return True
+        return False
+
+    def fold(self, precision: int) -> "HyperLogLog":
+        """The same sketch at a lower precision, as if built at that one"""
+        if precision > self.precision:
+            raise ValueError("A sketch cannot be folded to a higher precision")
+        dropped = self.precision - precision
+        ranks: Dict[int, int] = {}
+        for index, rank in self._items():
+            # The dropped index bits become the leading bits of the rest
+            low = index & ((1 << dropped) - 1)
+            rank = dropped - low.bit_length() + 1 if low else rank + dropped
+            target = index >> dropped
+            if rank > ranks.get(target, 0):
+                ranks[target] = rank
+        folded = HyperLogLog(precision)
+        folded._sparse = ranks
+        folded._densify_if_large()
+        return folded
+
+    def merge(self, other: "HyperLogLog") -> None:
+        """Union other into this sketch, folding to the lower precision"""
+        if other.precision > self.precision:
+            other = other.fold(self.precision)
+        elif other.precision < self.precision:
+            folded = self.fold(other.precision)
+            self.precision = folded.precision
+            self._sparse, self._registers = folded._sparse, folded._registers
+
+        if self._sparse is not None:
+            sparse = self._sparse
+            for index, rank in other._items():
+                if rank > sparse.get(index, 0):
+                    sparse[index] = rank
+            self._densify_if_large()
+        elif other._sparse is not None:
+            registers = self._registers
+            for index, rank in other._sparse.items():
+                if rank > registers[index]:
+                    registers[index] = rank
+        else:
+            self._registers = bytearray(map(max, self._registers, other._registers))
+
+    def count(self) -> int:
+        size = 1 << self.precision
+        if self._sparse is not None:
+            zeros = size - len(self._sparse)
+            # fsum is exact, so the sum matches the dense one bit for bit
+            total = math.fsum(
+                [zeros, *(_INVERSE_POWERS[rank] for rank in self._sparse.values())]
+            )
+        else:
+            zeros = self._registers.count(0)
+            total = math.fsum(_INVERSE_POWERS[rank] for rank in self._registers)
+        estimate = _alpha(size) * size * size / total
+        if zeros and estimate <= 2.5 * size:
+            # Linear counting is more accurate while many registers are empty
+            estimate = size * math.log(size / zeros)
+        return round(estimate)
+
+    def _items(self) -> Iterator[Tuple[int, int]]:
+        """(index, rank) of every non-zero register"""
+        if self._sparse is not None:
+            return iter(self._sparse.items())
+        return ((index, rank) for index, rank in enumerate(self._registers) if rank)
+
+    def _densify_if_large(self) -> None:
+        # A dict entry costs tens of bytes, a dense register one
+        if len(self._sparse) <= (1 << self.precision) >> _SPARSE_LIMIT_SHIFT:
+            return
+        self._sparse, self._registers = None, self._expanded()
+
+    def _expanded(self) -> bytearray:
+        registers = bytearray(1 << self.precision)
+        for index, rank in self._sparse.items():
+            registers[index] = rank
+        return registers
+
+
+__all__ = ("HyperLogLog",)
@@ -0,0 +1,249 @@
+"""Prometheus metrics of the redirect hot path and the in-process components.
+
+Hot-path metrics are prometheus_client histograms/counters updated inline;
+each worker owns its values, so updates never contend across processes.
+Component counters (cache hits, queue depths, pool usage) stay plain ints on
+the hot path and are copied into Prometheus families by StatsExporter every
+sync_interval seconds and on every scrape.
+
+For several uvicorn workers set PROMETHEUS_MULTIPROC_DIR to an empty,
+writable directory before the workers start; /metrics then aggregates the
+values of every worker.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from contextlib import suppress
+from typing import Any, Callable, Collection, Dict, List, Optional, Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+# Sub-millisecond in-memory hits up to pool timeouts
+LATENCY_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+)
+
+REDIRECT_SECONDS = Histogram(
+    "redirect_serv_redirect_seconds",
+    "Total time spent serving /redirect/{hash}",
+    buckets=LATENCY_BUCKETS,
+)
+REDIRECT_RESOLVE_SECONDS = Histogram(
+    "redirect_serv_redirect_resolve_seconds",
+    "Time spent resolving a url hash to its redirect target",
+    buckets=LATENCY_BUCKETS,
+)
+REDIRECT_SCAN_WRITE_SECONDS = Histogram(
+    "redirect_serv_redirect_scan_write_seconds",
+    "Time spent counting a scan (includes resolution on the single-statement path)",
+    buckets=LATENCY_BUCKETS,
+)
+REDIRECT_RESPONSES = Counter(
+    "redirect_serv_redirect_responses_total",
+    "Responses of /redirect/{hash} by status code",
+    ["status"],
+)
+HTTP_IN_FLIGHT = Gauge(
+    "redirect_serv_http_requests_in_flight",
+    "HTTP requests currently being served",
+    multiprocess_mode="livesum",
+)
+
+CACHE_REQUESTS = Counter(
+    "redirect_serv_cache_requests_total",
+    "Lookups of an in-process caching layer by result",
+    ["cache", "result"],
+)
+COMPONENT_EVENTS = Counter(
+    "redirect_serv_component_events_total",
+    "Cumulative counters reported by in-process components",
+    ["component", "event"],
+)
+COMPONENT_STATE = Gauge(
+    "redirect_serv_component_state",
+    "Current values reported by in-process components, summed over workers",
+    ["component", "stat"],
+    multiprocess_mode="livesum",
+)
+# Flags, ages and latencies mean nothing summed, the worst worker is reported
+COMPONENT_STATE_MAX = Gauge(
+    "redirect_serv_component_state_max",
+    "Current values reported by in-process components, worst over workers",
+    ["component", "stat"],
+    multiprocess_mode="livemax",
+)
+
+_CACHE_RESULTS = {"hits": "hit", "misses": "miss"}
+
+StatsSource = Callable[[], Dict[str, Any]]
+
+
+class StatsExporter:
+    """Publishes the stats() dicts of in-process components as metrics.
+
+    hits/misses become cache_requests_total, the keys listed as counters
+    become component_events_total (incremented by their delta since the
+    last sync), the keys listed as maxima are set on component_state_max
+    and every other numeric value is set on component_state.
+    """
+
+    def __init__(self, sync_interval: float):
+        self.sync_interval = sync_interval
+        self._sources: List[
+            Tuple[str, StatsSource, Collection[str], Collection[str]]
+        ] = []
+        self._last: Dict[Tuple[str, str], float] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def register(
+        self,
+        component: str,
+        source: StatsSource,
+        counters: Collection[str] = (),
+        maxima: Collection[str] = (),
+    ) -> None:
+        self._sources.append(
+            (component, source, frozenset(counters), frozenset(maxima))
+        )
+
+    def sync(self) -> None:
+        for component, source, counters, maxima in self._sources:
+            for stat, value in source().items():
+                if value is None or isinstance(value, str):
+                    continue
+                if stat in _CACHE_RESULTS:
+                    child = CACHE_REQUESTS.labels(component, _CACHE_RESULTS[stat])
+                    self._increment(child, component, stat, value)
+                elif stat in counters:
+                    child = COMPONENT_EVENTS.labels(component, stat)
+                    self._increment(child, component, stat, value)
+                elif stat in maxima:
+                    COMPONENT_STATE_MAX.labels(component, stat).set(float(value))
+                else:
+                    COMPONENT_STATE.labels(component, stat).set(float(value))
+
+    def _increment(self, child: Counter, component: str, stat: str, value) -> None:
+        last = self._last.get((component, stat), 0.0)
+        self._last[(component, stat)] = value
+        # A component that was reset starts a new baseline instead of going back
+        if value > last:
+            child.inc(value - last)
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        if is_multiprocess():
+            multiprocess.mark_process_dead(os.getpid())
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            try:
+                self.sync()
+            except Exception:
+                logger.exception("Failed to sync component metrics")
+
+
+def is_multiprocess() -> bool:
+    # Same check prometheus_client uses when it picks its value class
+    return "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Exposition of this worker, or of all workers in multiprocess mode"""
+    if is_multiprocess():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+class MetricsMiddleware:
+    """Tracks in-flight requests plus total latency and status of redirects.
+
+    Added outermost so it also times requests answered by the fast path.
+    """
+
+    def __init__(self, app: ASGIApp, redirect_prefix: str):
+        self.app = app
+        self.redirect_prefix = redirect_prefix
+        self._responses: Dict[int, Counter] = {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        HTTP_IN_FLIGHT.inc()
+        if not scope["path"].startswith(self.redirect_prefix):
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                HTTP_IN_FLIGHT.dec()
+            return
+
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            REDIRECT_SECONDS.observe(time.perf_counter() - started)
+            self._response_counter(status).inc()
+            HTTP_IN_FLIGHT.dec()
+
+    def _response_counter(self, status: int) -> Counter:
+        counter = self._responses.get(status)
+        if counter is None:
+            counter = self._responses[status] = REDIRECT_RESPONSES.labels(str(status))
+        return counter
+
+
+__all__ = (
+    "REDIRECT_RESOLVE_SECONDS",
+    "REDIRECT_SCAN_WRITE_SECONDS",
+    "MetricsMiddleware",
+    "StatsExporter",
+    "is_multiprocess",
+    "render_metrics",
+)
@@ -0,0 +1,89 @@
+import time
+from typing import Any, Dict
+
+from sqlalchemy import exc
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from src.redirect_serv.core.config import db_settings
+
+
+class PoolWaitStats:
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def record(self, wait_seconds: float) -> None:
+        self.checkouts += 1
+        self.total_wait_seconds += wait_seconds
+        self.max_wait_seconds = max(self.max_wait_seconds, wait_seconds)
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long callers wait for a connection"""
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.wait_stats = PoolWaitStats()
+
+    def _do_get(self):  # type: ignore[no-untyped-def]
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.wait_stats.timeouts += 1
+            raise
+        finally:
+            self.wait_stats.record(time.perf_counter() - started)
+
+
+def create_pooled_engine(url: str) -> AsyncEngine:
+    """Engine with the pool settings of DBSettings, for the primary or a replica"""
+    return create_async_engine(
+        url,
+        echo=False,
+        future=True,
+        poolclass=InstrumentedQueuePool,
+        pool_size=db_settings.pool_size,
+        max_overflow=db_settings.max_overflow,
+        pool_timeout=db_settings.pool_timeout,
+        pool_recycle=db_settings.pool_recycle,
+        pool_pre_ping=db_settings.pool_pre_ping,
+        connect_args={
+            "prepared_statement_cache_size": db_settings.prepared_statement_cache_size
+        },
+    )
+
+
+def pool_status(engine: AsyncEngine) -> Dict[str, Any]:
+    pool = engine.pool
+    status: Dict[str, Any] = {"pool_class": type(pool).__name__}
+
+    if isinstance(pool, AsyncAdaptedQueuePool):
+        status.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+        )
+
+    wait_stats = getattr(pool, "wait_stats", None)
+    if wait_stats is not None:
+        status.update(
+            checkouts=wait_stats.checkouts,
+            timeouts=wait_stats.timeouts,
+            total_wait_seconds=wait_stats.total_wait_seconds,
+            max_wait_seconds=wait_stats.max_wait_seconds,
+        )
+
+    return status
+
+
+__all__ = (
+    "InstrumentedQueuePool",
+    "PoolWaitStats",
+    "create_pooled_engine",
+    "pool_status",
+)
@@ -0,0 +1,67 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+
+@dataclass(frozen=True, slots=True)
+class ProbeResult:
+    ok: bool
+    error: Optional[str]
+    checked_at: float
+
+
+class DatabaseProbe:
+    """Runs SELECT 1 at most once per ttl seconds and shares the result.
+
+    Concurrent callers wait on the same in-flight probe, so a burst of
+    readiness checks takes at most one pool connection.
+    """
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        ttl: float,
+        timer: Callable[[], float] = time.monotonic,
+    ):
+        self.engine = engine
+        self.ttl = ttl
+        self._timer = timer
+        self._last: Optional[ProbeResult] = None
+        self._lock = asyncio.Lock()
+
+    def _fresh(self) -> Optional[ProbeResult]:
+        if self._last is not None and self._timer() - self._last.checked_at < self.ttl:
+            return self._last
+        return None
+
+    async def check(self) -> ProbeResult:
+        result = self._fresh()
+        if result is not None:
+            return result
+
+        async with self._lock:
+            result = self._fresh()
+            if result is None:
+                result = await self._probe()
+                self._last = result
+            return result
+
+    async def _probe(self) -> ProbeResult:
+        try:
+            async with self.engine.connect() as conn:
+                result = await conn.execute(text("SELECT 1"))
+                result.scalar()
+        except Exception as e:
+            return ProbeResult(
+                ok=False,
+                error=f"Database check failed: {str(e)}",
+                checked_at=self._timer(),
+            )
+        return ProbeResult(ok=True, error=None, checked_at=self._timer())
+
+
+__all__ = ("DatabaseProbe", "ProbeResult")
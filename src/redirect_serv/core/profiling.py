@@ -0,0 +1,227 @@
+"""Per-request cProfile capture for diagnosing CPU-bound workers.
+
+The middleware is only installed when profiling is enabled; then a request
+is profiled when it carries the profiling header with the configured token
+or is picked by the sampling rate. cProfile sees the whole thread, so
+requests running concurrently on the same event loop show up in the
+profile as well.
+"""
+
+import asyncio
+import cProfile
+import hmac
+import itertools
+import json
+import os
+import random
+import re
+import time
+from dataclasses import asdict, dataclass
+from typing import List, Optional
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+PROFILE_HEADER = b"x-profile"
+
+_SLUG_RE = re.compile(r"[^A-Za-z0-9]+")
+_NAME_RE = re.compile(r"[0-9]+-[0-9]+-[0-9]+-[A-Za-z0-9_]+")
+
+
+@dataclass(frozen=True, slots=True)
+class ProfileInfo:
+    """Metadata stored next to a profile"""
+
+    name: str
+    method: str
+    route: str
+    status: int
+    duration_ms: float
+    created_at: float
+    size: int
+
+
+class ProfileStore:
+    """Directory of .prof files (pstats format) with a count and size cap.
+
+    The oldest profiles are deleted once either cap is exceeded.
+    """
+
+    def __init__(self, directory: str, max_files: int, max_bytes: int):
+        self.directory = directory
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self._sequence = itertools.count()
+
+    def save(
+        self,
+        profile: cProfile.Profile,
+        method: str,
+        route: str,
+        status: int,
+        duration: float,
+    ) -> ProfileInfo:
+        os.makedirs(self.directory, exist_ok=True)
+        created_at = time.time()
+        slug = _SLUG_RE.sub("_", f"{method}{route}").strip("_")
+        name = f"{int(created_at * 1e6)}-{os.getpid()}-{next(self._sequence)}-{slug}"
+
+        path = self.path(name)
+        profile.dump_stats(path)
+        info = ProfileInfo(
+            name=name,
+            method=method,
+            route=route,
+            status=status,
+            duration_ms=round(duration * 1000, 3),
+            created_at=created_at,
+            size=os.path.getsize(path),
+        )
+        with open(self._meta_path(name), "w") as f:
+            json.dump(asdict(info), f)
+
+        self._rotate()
+        return info
+
+    def list(self, limit: int = 50) -> List[ProfileInfo]:
+        """Most recent profiles first"""
+        profiles = []
+        for name in self._names()[::-1][:limit]:
+            try:
+                with open(self._meta_path(name)) as f:
+                    profiles.append(ProfileInfo(**json.load(f)))
+            except (OSError, ValueError, TypeError):
+                continue
+        return profiles
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory, f"{name}.prof")
+
+    def find(self, name: str) -> Optional[str]:
+        """Path of an existing profile, refusing names outside the store"""
+        if not _NAME_RE.fullmatch(name):
+            return None
+        path = self.path(name)
+        return path if os.path.isfile(path) else None
+
+    def _meta_path(self, name: str) -> str:
+        return os.path.join(self.directory, f"{name}.json")
+
+    def _names(self) -> List[str]:
+        """Profile names, oldest first (by timestamp, then per-process sequence)"""
+        try:
+            files = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        names = [f[: -len(".prof")] for f in files if f.endswith(".prof")]
+        names = [name for name in names if _NAME_RE.fullmatch(name)]
+        return sorted(names, key=_sort_key)
+
+    def _rotate(self) -> None:
+        names = self._names()
+        sizes = {name: self._size(name) for name in names}
+        total = sum(sizes.values())
+        while names and (len(names) > self.max_files or total > self.max_bytes):
+            oldest = names.pop(0)
+            total -= sizes[oldest]
+            for path in (self.path(oldest), self._meta_path(oldest)):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def _size(self, name: str) -> int:
+        size = 0
+        for path in (self.path(name), self._meta_path(name)):
+            try:
+                size += os.path.getsize(path)
+            except FileNotFoundError:
+                pass
+        return size
+
+
+def _sort_key(name: str):
+    timestamp, _pid, sequence, _slug = name.split("-", 3)
+    return int(timestamp), int(sequence)
+
+
+def token_matches(value: Optional[bytes], token: str) -> bool:
+    return (
+        bool(token) and value is not None and hmac.compare_digest(value, token.encode())
+    )
+
+
+class ProfilingMiddleware:
+    """Profiles requests selected by header token or sampling rate"""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        store: ProfileStore,
+        token: str = "",
+        sample_rate: float = 0.0,
+    ):
+        self.app = app
+        self.store = store
+        self.token = token
+        self.sample_rate = sample_rate
+        self.profiled = 0
+        # Only one cProfile profiler can be active per thread at a time
+        self._active = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or self._active or not self._selected(scope):
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        profile = cProfile.Profile()
+        started = time.perf_counter()
+        self._active = True
+        profile.enable()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            profile.disable()
+            self._active = False
+            duration = time.perf_counter() - started
+            self.profiled += 1
+            # Written after the response went out, off the event loop
+            await asyncio.to_thread(
+                self.store.save,
+                profile,
+                scope["method"],
+                self._route(scope),
+                status,
+                duration,
+            )
+
+    def _selected(self, scope: Scope) -> bool:
+        if self.sample_rate and random.random() < self.sample_rate:  # nosec B311
+            return True
+        if self.token:
+            for name, value in scope["headers"]:
+                if name == PROFILE_HEADER:
+                    return token_matches(value, self.token)
+        return False
+
+    @staticmethod
+    def _route(scope: Scope) -> str:
+        # The route template keeps url hashes and ids out of file names
+        route = scope.get("route")
+        return getattr(route, "path", None) or scope["path"]
+
+
+__all__ = (
+    "PROFILE_HEADER",
+    "ProfileInfo",
+    "ProfileStore",
+    "ProfilingMiddleware",
+    "token_matches",
+)
@@ -0,0 +1,180 @@
+"""Per-client token bucket rate limiting, answered before any routing.
+
+Each client holds one bucket (two floats) that refills at rate tokens per
+second up to burst. Buckets live in shards ordered by last use, so idle
+buckets are always at the front: every sweep_interval one shard drops the
+buckets that would be full again by now, which is the same as forgetting
+them. Shards are also capped, dropping their least recently used client.
+Limits are per worker; with N workers a client can get up to N times rate.
+"""
+
+import json
+import math
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from src.redirect_serv.core.config import rate_limit_settings
+
+KEY_CLIENT = "client"
+KEY_FORWARDED = "forwarded"
+
+
+class _Bucket:
+    __slots__ = ("tokens", "updated_at")
+
+    def __init__(self, tokens: float, updated_at: float):
+        self.tokens = tokens
+        self.updated_at = updated_at
+
+
+class RateLimiter:
+    """Not thread-safe: intended to be used from a single event loop per worker"""
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int,
+        max_clients: int,
+        shards: int,
+        sweep_interval: float,
+        timer: Callable[[], float] = time.monotonic,
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.sweep_interval = sweep_interval
+        self._timer = timer
+        self._shards: List["OrderedDict[str, _Bucket]"] = [
+            OrderedDict() for _ in range(max(shards, 1))
+        ]
+        self._shard_size = max(max_clients // len(self._shards), 1)
+        # Seconds after which an untouched bucket is full again
+        self._idle_after = burst / rate
+        self._next_shard = 0
+        self._next_sweep = timer() + sweep_interval
+        self.allowed = 0
+        self.throttled = 0
+        self.evicted = 0
+
+    def acquire(self, key: str) -> float:
+        """Take a token for key: 0 when allowed, else seconds until one is due"""
+        now = self._timer()
+        if now >= self._next_sweep:
+            self.sweep(now)
+
+        shard = self._shards[hash(key) % len(self._shards)]
+        bucket = shard.get(key)
+        if bucket is None:
+            bucket = shard[key] = _Bucket(self.burst, now)
+            if len(shard) > self._shard_size:
+                shard.popitem(last=False)
+                self.evicted += 1
+        else:
+            shard.move_to_end(key)
+            elapsed = now - bucket.updated_at
+            bucket.tokens = min(self.burst, bucket.tokens + elapsed * self.rate)
+        bucket.updated_at = now
+
+        if bucket.tokens < 1:
+            self.throttled += 1
+            return (1 - bucket.tokens) / self.rate
+        bucket.tokens -= 1
+        self.allowed += 1
+        return 0.0
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """Drop the idle buckets of the next shard, return how many"""
+        now = self._timer() if now is None else now
+        self._next_sweep = now + self.sweep_interval
+        shard = self._shards[self._next_shard]
+        self._next_shard = (self._next_shard + 1) % len(self._shards)
+
+        evicted = 0
+        while shard:
+            bucket = next(iter(shard.values()))
+            if now - bucket.updated_at < self._idle_after:
+                break
+            shard.popitem(last=False)
+            evicted += 1
+        self.evicted += evicted
+        return evicted
+
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in self._shards)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "clients": len(self),
+            "allowed": self.allowed,
+            "throttled": self.throttled,
+            "evicted": self.evicted,
+        }
+
+
+def client_key(scope: Scope, key: str, trusted_proxies: int) -> str:
+    if key == KEY_FORWARDED:
+        # Repeated headers form one list, in the order they were received
+        forwarded = b",".join(
+            value for name, value in scope["headers"] if name == b"x-forwarded-for"
+        )
+        hops = [hop.strip() for hop in forwarded.decode("latin-1").split(",")]
+        hops = [hop for hop in hops if hop]
+        if hops:
+            index = min(max(len(hops) - trusted_proxies, 0), len(hops) - 1)
+            return hops[index]
+    client = scope.get("client")
+    return client[0] if client else ""
+
+
+class RateLimitMiddleware:
+    """Answers 429 to clients over their limit, before routing or sessions"""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        limiter: RateLimiter,
+        path_prefixes: Sequence[str],
+        key: str,
+        trusted_proxies: int,
+    ):
+        self.app = app
+        self.limiter = limiter
+        self.path_prefixes = tuple(path_prefixes)
+        self.key = key
+        self.trusted_proxies = trusted_proxies
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not scope["path"].startswith(self.path_prefixes):
+            await self.app(scope, receive, send)
+            return
+
+        wait = self.limiter.acquire(client_key(scope, self.key, self.trusted_proxies))
+        if not wait:
+            await self.app(scope, receive, send)
+            return
+
+        body, headers = self._too_many_requests(wait)
+        await send({"type": "http.response.start", "status": 429, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+    @staticmethod
+    def _too_many_requests(wait: float) -> Tuple[bytes, List[Tuple[bytes, bytes]]]:
+        body = json.dumps({"detail": "Too many requests"}).encode()
+        return body, [
+            (b"content-length", str(len(body)).encode()),
+            (b"content-type", b"application/json"),
+            (b"retry-after", str(math.ceil(wait)).encode()),
+        ]
+
+
+rate_limiter = RateLimiter(
+    rate=rate_limit_settings.rate,
+    burst=rate_limit_settings.burst,
+    max_clients=rate_limit_settings.max_clients,
+    shards=rate_limit_settings.shards,
+    sweep_interval=rate_limit_settings.sweep_interval,
+)
+
+__all__ = ("RateLimitMiddleware", "RateLimiter", "client_key", "rate_limiter")
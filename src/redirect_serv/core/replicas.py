@@ -0,0 +1,156 @@
+"""Routing of read-only lookups to PostgreSQL read replicas.
+
+Replicas are checked every check_interval seconds; one that fails the
+check or replays WAL more than max_lag seconds behind the primary is left
+out of the round robin until a later check passes. Keys written through
+this worker within the last max_lag seconds are pinned to the primary so
+they are read back even before the replicas have replayed them.
+"""
+
+import asyncio
+import itertools
+import logging
+import time
+from contextlib import suppress
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.redirect_serv.core.cache import TTLCache
+from src.redirect_serv.core.config import db_settings
+from src.redirect_serv.core.pool import create_pooled_engine
+
+logger = logging.getLogger(__name__)
+
+# Seconds since the last replayed transaction, 0 while the replica is caught up
+# (otherwise an idle primary would make every replica look lagging)
+_LAG_QUERY = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() "
+    "THEN 0 ELSE COALESCE(EXTRACT(EPOCH FROM now() - "
+    "pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+@dataclass(slots=True)
+class Replica:
+    name: str
+    engine: AsyncEngine
+    healthy: bool = False
+    lag: Optional[float] = None
+    error: Optional[str] = None
+    checked_at: Optional[float] = None
+
+
+class ReplicaRouter:
+    """Round robin over the healthy replicas; None means use the primary"""
+
+    def __init__(
+        self,
+        engines: List[AsyncEngine],
+        max_lag: float,
+        check_interval: float,
+        check_timeout: float,
+        pinned_keys: int = 10000,
+    ):
+        self.replicas = [
+            Replica(name=f"replica{i}", engine=engine)
+            for i, engine in enumerate(engines)
+        ]
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.check_timeout = check_timeout
+        self._pinned: TTLCache[str, bool] = TTLCache(maxsize=pinned_keys, ttl=max_lag)
+        self._turn = itertools.count()
+        self._task: Optional[asyncio.Task] = None
+        self.replica_reads = 0
+        self.primary_fallbacks = 0
+        self.failed_checks = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.replicas)
+
+    def choose(self, key: Optional[str] = None) -> Optional[Replica]:
+        """Next healthy replica, or None when key was just written or none is"""
+        if not self.replicas or (key is not None and self._pinned.get(key)):
+            return None
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        return healthy[next(self._turn) % len(healthy)]
+
+    def pin(self, key: str) -> None:
+        """Read key from the primary until the replicas have caught up with it"""
+        if self.replicas:
+            self._pinned.set(key, True)
+
+    def mark_failed(self, replica: Replica, error: BaseException) -> None:
+        """Take a replica out of rotation until its next successful check"""
+        replica.healthy = False
+        replica.error = str(error)
+        logger.warning("Read replica %s failed: %s", replica.name, error)
+
+    async def check(self) -> None:
+        await asyncio.gather(*(self._check(replica) for replica in self.replicas))
+
+    async def _check(self, replica: Replica) -> None:
+        try:
+            async with asyncio.timeout(self.check_timeout):
+                async with replica.engine.connect() as conn:
+                    lag = float(await conn.scalar(_LAG_QUERY))
+        except Exception as e:
+            self.failed_checks += 1
+            replica.healthy, replica.lag, replica.error = False, None, str(e)
+        else:
+            replica.lag = lag
+            replica.healthy = lag <= self.max_lag
+            replica.error = None if replica.healthy else f"lagging {lag:.1f}s"
+        replica.checked_at = time.time()
+
+    async def start(self) -> None:
+        if not self.replicas or self._task is not None:
+            return
+        # Replicas only take reads once a first check has passed
+        await self.check()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.check_interval)
+            try:
+                await self.check()
+            except Exception:
+                logger.exception("Failed to check read replicas")
+
+    def stats(self) -> Dict[str, Any]:
+        lags = [replica.lag for replica in self.replicas if replica.lag is not None]
+        return {
+            "replicas": len(self.replicas),
+            "healthy": sum(replica.healthy for replica in self.replicas),
+            "max_lag_seconds": max(lags) if lags else None,
+            "pinned_keys": len(self._pinned),
+            "replica_reads": self.replica_reads,
+            "primary_fallbacks": self.primary_fallbacks,
+            "failed_checks": self.failed_checks,
+        }
+
+
+replica_router = ReplicaRouter(
+    [create_pooled_engine(url) for url in db_settings.ASYNC_REPLICA_DATABASE_URLS],
+    max_lag=db_settings.replica_max_lag,
+    check_interval=db_settings.replica_check_interval,
+    check_timeout=db_settings.replica_check_timeout,
+)
+
+__all__ = ("Replica", "ReplicaRouter", "replica_router")
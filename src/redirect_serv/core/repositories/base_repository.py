@@ -1,7 +1,22 @@
 from abc import ABC
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar
+from itertools import islice
+from typing import (
+    Any,
+    AsyncIterator,
+    Dict,
+    Generic,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Type,
+    TypeVar,
+)
 
-from sqlalchemy import Select, delete, select, update
+from sqlalchemy import Row, Select, delete, func, insert, select, text, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
@@ -10,11 +25,21 @@ from src.redirect_serv.models import Base
 ModelType = TypeVar("ModelType", bound=Base)
 
 
+def chunked(rows: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    iterator = iter(rows)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
 class BaseRepository(ABC, Generic[ModelType]):
     def __init__(self, model: Type[ModelType], session: AsyncSession):
         self.model = model
         self.session = session
 
+    @property
+    def _is_postgresql(self) -> bool:
+        return self.session.bind.dialect.name == "postgresql"
+
     async def create(self, **kwargs: Any) -> ModelType:
         instance = self.model(**kwargs)
         self.session.add(instance)
@@ -22,6 +47,56 @@ class BaseRepository(ABC, Generic[ModelType]):
         await self.session.refresh(instance)
         return instance
 
+    async def bulk_create(
+        self, rows: Iterable[Dict[str, Any]], chunk_size: int = 1000
+    ) -> int:
+        """Insert plain dicts with one multi-row INSERT per chunk, no refresh"""
+        table = self.model.__table__
+        created = 0
+        for chunk in chunked(rows, chunk_size):
+            await self.session.execute(insert(table), chunk)
+            created += len(chunk)
+        await self.session.flush()
+        return created
+
+    async def bulk_upsert(
+        self,
+        rows: Iterable[Dict[str, Any]],
+        conflict_columns: Sequence[str],
+        update_columns: Sequence[str] = (),
+        returning: Sequence[str] = (),
+        chunk_size: int = 1000,
+    ) -> List[Row]:
+        """INSERT ... ON CONFLICT per chunk (PostgreSQL and SQLite).
+
+        Conflicting rows get update_columns overwritten with the new values,
+        or are skipped when there are none. Returns the returning columns of
+        inserted (and updated) rows.
+        """
+        table = self.model.__table__
+        dialect_insert = postgresql_insert if self._is_postgresql else sqlite_insert
+        statement = dialect_insert(table)
+        if update_columns:
+            statement = statement.on_conflict_do_update(
+                index_elements=list(conflict_columns),
+                set_={name: statement.excluded[name] for name in update_columns},
+            )
+        else:
+            # No conflict columns: skip rows violating any unique constraint
+            statement = statement.on_conflict_do_nothing(
+                index_elements=list(conflict_columns) or None
+            )
+        if returning:
+            statement = statement.returning(*(table.c[name] for name in returning))
+
+        returned: List[Row] = []
+        for chunk in chunked(rows, chunk_size):
+            result = await self.session.execute(statement, chunk)
+            if returning:
+                returned.extend(result.all())
+        await self.session.flush()
+        return returned
+
     async def get_by_id(self, id: int) -> Optional[ModelType]:
         result = await self.session.execute(
             select(self.model).where(self.model.id == id)  # type: ignore
@@ -46,12 +121,8 @@ class BaseRepository(ABC, Generic[ModelType]):
         filters: Optional[Dict[str, Any]] = None,
         order_by: Optional[str] = None,
     ) -> List[ModelType]:
-        query = select(self.model)
-
-        if filters:
-            for field, value in filters.items():
-                if hasattr(self.model, field):
-                    query = query.where(getattr(self.model, field) == value)  # type: ignore
+        """OFFSET pagination; deep pages get slower, prefer get_page"""
+        query = self._apply_filters(select(self.model), filters)
 
         if order_by and hasattr(self.model, order_by):
             query = query.order_by(getattr(self.model, order_by))
@@ -61,6 +132,59 @@ class BaseRepository(ABC, Generic[ModelType]):
         result = await self.session.execute(query)
         return list(result.scalars().all())
 
+    async def get_page(
+        self,
+        limit: int = 100,
+        after: Any = None,
+        order_by: str = "id",
+        filters: Optional[Dict[str, Any]] = None,
+        descending: bool = False,
+    ) -> List[ModelType]:
+        """Keyset (seek) pagination: rows following the cursor after.
+
+        Pass page_cursor(last_row) of the previous page as after. Ordering by
+        a column other than id uses (column, id) so duplicates are neither
+        skipped nor repeated; the column should be indexed for this to seek.
+        """
+        id_column = self.model.id  # type: ignore
+        column = getattr(self.model, order_by)
+        if order_by == "id":
+            key, ordering = id_column, [id_column]
+        else:
+            key, ordering = tuple_(column, id_column), [column, id_column]
+
+        query = self._apply_filters(select(self.model), filters)
+        if after is not None:
+            cursor = after if order_by == "id" else tuple_(*after)
+            query = query.where(key < cursor if descending else key > cursor)
+        if descending:
+            ordering = [item.desc() for item in ordering]
+
+        result = await self.session.execute(query.order_by(*ordering).limit(limit))
+        return list(result.scalars().all())
+
+    @staticmethod
+    def page_cursor(instance: ModelType, order_by: str = "id") -> Any:
+        """Cursor to pass as get_page(after=...) to continue after instance"""
+        if order_by == "id":
+            return instance.id  # type: ignore
+        return getattr(instance, order_by), instance.id  # type: ignore
+
+    async def stream(
+        self,
+        filters: Optional[Dict[str, Any]] = None,
+        order_by: str = "id",
+        chunk_size: int = 1000,
+    ) -> AsyncIterator[ModelType]:
+        """Iterate over every matching row, fetching chunk_size rows at a time"""
+        query = self._apply_filters(select(self.model), filters)
+        query = query.order_by(getattr(self.model, order_by))
+        result = await self.session.stream_scalars(
+            query.execution_options(yield_per=chunk_size)
+        )
+        async for instance in result:
+            yield instance
+
     async def update(self, id: int, **kwargs: Any) -> Optional[ModelType]:
         update_data = {k: v for k, v in kwargs.items() if v is not None}
 
@@ -89,15 +213,38 @@ class BaseRepository(ABC, Generic[ModelType]):
         return result.scalar_one_or_none() is not None
 
     async def count(self, filters: Optional[Dict[str, Any]] = None) -> int:
-        query = select(self.model.id)  # type: ignore
+        query = select(func.count()).select_from(self.model)
+        result = await self.session.execute(self._apply_filters(query, filters))
+        return result.scalar_one()
+
+    async def approximate_count(self) -> int:
+        """Row estimate from PostgreSQL statistics, exact count elsewhere.
+
+        Reads pg_class.reltuples, which is as fresh as the last ANALYZE or
+        autovacuum; tables that were never analyzed fall back to count().
+        """
+        if self.session.bind.dialect.name != "postgresql":
+            return await self.count()
 
+        estimate = await self.session.scalar(
+            text(
+                "SELECT reltuples::bigint FROM pg_class "
+                "WHERE oid = to_regclass(:table_name)"
+            ),
+            {"table_name": self.model.__tablename__},
+        )
+        if estimate is None or estimate < 0:
+            return await self.count()
+        return estimate
+
+    def _apply_filters(
+        self, query: Select, filters: Optional[Dict[str, Any]]
+    ) -> Select:
         if filters:
             for field, value in filters.items():
                 if hasattr(self.model, field):
                     query = query.where(getattr(self.model, field) == value)  # type: ignore
-
-        result = await self.session.execute(query)
-        return len(result.scalars().all())
+        return query
 
     def _build_query(self) -> Select:
         return select(self.model)
@@ -0,0 +1,59 @@
+"""Worker warm-up run by the lifespan before the first request is accepted.
+
+Opens pool connections up front and runs the redirect lookup once on each,
+so connection setup, statement compilation and the per-connection prepared
+statement cache are paid before the worker takes traffic, not by the first
+users after a deploy. A failed warm-up is logged and the worker starts
+anyway: it is an optimisation, and degraded mode covers a missing database.
+"""
+
+import asyncio
+import logging
+import time
+from contextlib import AsyncExitStack
+from typing import Any, Dict
+
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession
+
+from src.redirect_serv.apps.qr_manager.repositories import QRCodeRepository
+
+logger = logging.getLogger(__name__)
+
+# Never issued, so the lookup misses without touching any real row
+WARMUP_URL_HASH = "0" * 64
+
+
+async def _warm_connection(conn: AsyncConnection) -> None:
+    async with AsyncSession(bind=conn) as session:
+        await QRCodeRepository(session).get_redirect_target(WARMUP_URL_HASH)
+
+
+async def warm_up(engine: AsyncEngine, connections: int) -> Dict[str, Any]:
+    """Check out connections at once so the pool keeps that many open"""
+    started = time.perf_counter()
+    async with AsyncExitStack() as stack:
+        opened = [
+            await stack.enter_async_context(engine.connect())
+            for _ in range(connections)
+        ]
+        await asyncio.gather(*(_warm_connection(conn) for conn in opened))
+    return {
+        "connections": len(opened),
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+async def warm_up_or_log(engine: AsyncEngine, connections: int, timeout: float) -> bool:
+    if connections <= 0:
+        return False
+    try:
+        async with asyncio.timeout(timeout):
+            result = await warm_up(engine, connections)
+    except Exception:
+        logger.exception("Worker warm-up failed, starting cold")
+        return False
+    logger.info("Worker warmed up: %s", result)
+    return True
+
+
+__all__ = ("WARMUP_URL_HASH", "warm_up", "warm_up_or_log")
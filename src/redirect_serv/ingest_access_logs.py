@@ -0,0 +1,53 @@
+"""Count redirect scans from proxy or uvicorn access logs.
+
+python -m src.redirect_serv.ingest_access_logs /var/log/nginx/access.log*
+
+Used with REDIRECT_EDGE_CACHE=true, where redirects are not counted when
+served. Run it periodically (cron or a k8s CronJob) over the current and the
+rotated logs: files are tracked by inode and offset in access_log_offsets,
+so every line is counted exactly once however often it runs. Compressed
+rotations are not read, so run it before logrotate compresses a file.
+access_log_offsets is created by migrate_schema.
+"""
+
+import argparse
+import asyncio
+from typing import List, Optional
+
+from src.redirect_serv.apps.qr_manager.schemas import AccessLogIngestResult
+from src.redirect_serv.apps.qr_manager.services import AccessLogIngestor
+from src.redirect_serv.core.dependencies.database import AsyncSessionLocal, engine
+
+
+async def ingest_access_logs(
+    paths: List[str], batch_lines: int
+) -> List[AccessLogIngestResult]:
+    ingestor = AccessLogIngestor(AsyncSessionLocal, batch_lines)
+    try:
+        return [await ingestor.ingest(path) for path in paths]
+    finally:
+        await engine.dispose()
+
+
+def main(argv: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="+", help="access log files")
+    parser.add_argument(
+        "--batch-lines",
+        type=int,
+        default=100_000,
+        help="lines applied per transaction",
+    )
+    args = parser.parse_args(argv)
+
+    for result in asyncio.run(ingest_access_logs(args.paths, args.batch_lines)):
+        restarted = " (restarted)" if result.restarted else ""
+        print(
+            f"{result.path}: {result.lines} lines, {result.scans} scans "
+            f"({result.unknown_scans} unknown), offset {result.start_offset} -> "
+            f"{result.end_offset}{restarted}"
+        )
+
+
+if __name__ == "__main__":
+    main()
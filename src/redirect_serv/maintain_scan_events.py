@@ -0,0 +1,64 @@
+"""Create upcoming scan_events partitions and drop the ones past retention.
+
+python -m src.redirect_serv.maintain_scan_events --retention-days 90 --ahead 7
+
+Run daily (cron or a k8s CronJob); PostgreSQL only, a no-op elsewhere. If
+runs were missed, events of days without a partition sit in the default
+partition until the next run moves them into their day's partition. The
+partitioned scan_events table itself comes from migrate_schema.
+"""
+
+import argparse
+import asyncio
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+
+from src.redirect_serv.apps.qr_manager.repositories import ScanEventRepository
+from src.redirect_serv.core.config import scan_event_settings
+from src.redirect_serv.core.dependencies.database import AsyncSessionLocal, engine
+
+
+async def maintain_scan_events(
+    today: date, retention_days: int, ahead: int
+) -> Tuple[List[str], List[str]]:
+    async with AsyncSessionLocal() as session:
+        repository = ScanEventRepository(session)
+        # Start from yesterday so late events around midnight still have a home
+        created = await repository.ensure_partitions(
+            today - timedelta(days=1), ahead + 2
+        )
+        dropped = await repository.drop_partitions_before(
+            today - timedelta(days=retention_days)
+        )
+    await engine.dispose()
+    return created, dropped
+
+
+def main(argv: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--retention-days",
+        type=int,
+        default=scan_event_settings.retention_days,
+        help="keep this many days of events (defaults to SCAN_EVENTS_RETENTION_DAYS)",
+    )
+    parser.add_argument(
+        "--ahead",
+        type=int,
+        default=scan_event_settings.partitions_ahead,
+        help="days of partitions to create in advance "
+        "(defaults to SCAN_EVENTS_PARTITIONS_AHEAD)",
+    )
+    args = parser.parse_args(argv)
+
+    today = datetime.now(timezone.utc).date()
+    created, dropped = asyncio.run(
+        maintain_scan_events(today, args.retention_days, args.ahead)
+    )
+    print(f"Ensured {len(created)} partitions, dropped {len(dropped)}")
+    for name in dropped:
+        print(f"  dropped {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""Bring a shared schema up to date with the columns and tables of this service.
+
+python -m src.redirect_serv.migrate_schema [--dry-run]
+
+Run before deploying code, or before enabling a feature, that uses them;
+PostgreSQL only, a no-op elsewhere, and safe to re-run: every step reads the
+catalog and plans only the DDL still missing. Everything happens in one
+transaction. Steps, in order:
+
+- updated_at on companies, company_branches and qr_codes, with its index and
+  a BEFORE UPDATE trigger, so writes from the back office that shares these
+  tables move it too (the redirect table's delta sync reads it)
+- scan_events, partitioned by day on scanned_at, with its default partition
+  (SCAN_EVENTS_ENABLED); make maintain_scan_events adds the day partitions
+- scan_rollups_hourly, scan_rollups_daily and scan_rollups_company_daily
+  (SCAN_ROLLUPS_ENABLED)
+- access_log_offsets, keyed by file_id (ingest_access_logs)
+- scan_count_shards (SCAN_COUNT_SHARDING)
+- visitor_sketches_daily (UNIQUE_VISITORS_ENABLED)
+"""
+
+import argparse
+import asyncio
+from typing import Awaitable, Callable, List, Optional
+
+from sqlalchemy import Table, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.schema import CreateIndex, CreateTable, DDLElement
+
+from src.redirect_serv.apps.company.models import Company, CompanyBranch
+from src.redirect_serv.apps.qr_manager.models import (
+    AccessLogOffset,
+    CompanyScanDailyRollup,
+    QRCode,
+    ScanCountShard,
+    ScanDailyRollup,
+    ScanEvent,
+    ScanHourlyRollup,
+    VisitorDailySketch,
+)
+from src.redirect_serv.core.dependencies.database import AsyncSessionLocal, engine
+
+Step = Callable[[AsyncSession], Awaitable[List[str]]]
+
+_DIALECT = postgresql.dialect()
+
+_COLUMN_EXISTS = text(
+    "SELECT 1 FROM information_schema.columns "
+    "WHERE table_schema = current_schema() AND table_name = :table "
+    "AND column_name = :column"
+)
+_RELATION_EXISTS = text("SELECT to_regclass(:name) IS NOT NULL")
+_FUNCTION_EXISTS = text(
+    "SELECT 1 FROM pg_proc p JOIN pg_namespace n ON n.oid = p.pronamespace "
+    "WHERE n.nspname = current_schema() AND p.proname = :name"
+)
+_IS_PARTITIONED = text(
+    "SELECT 1 FROM pg_partitioned_table WHERE partrelid = CAST(:table AS regclass)"
+)
+_TRIGGER_EXISTS = text(
+    "SELECT 1 FROM pg_trigger "
+    "WHERE tgrelid = CAST(:table AS regclass) AND tgname = :name"
+)
+
+_TOUCH_FUNCTION = "redirect_serv_touch_updated_at"
+# Counter writes leave updated_at alone (see QRCodeRepository), so the trigger
+# fires only when a column other than these changes
+_UNTRACKED_COLUMNS = {
+    "qr_codes": ("scan_count", "last_scanned"),
+}
+
+
+def _ddl(element: DDLElement) -> str:
+    return str(element.compile(dialect=_DIALECT)).strip()
+
+
+def _create_table(table: Table) -> List[str]:
+    """The model's CREATE TABLE and CREATE INDEX statements"""
+    return [_ddl(CreateTable(table))] + [
+        _ddl(CreateIndex(index))
+        for index in sorted(table.indexes, key=lambda index: index.name)
+    ]
+
+
+async def _exists(session: AsyncSession, query, **params) -> bool:
+    return bool(await session.scalar(query, params))
+
+
+async def plan_updated_at(session: AsyncSession) -> List[str]:
+    """updated_at columns, their indexes and the triggers that move them"""
+    statements = []
+    if not await _exists(session, _FUNCTION_EXISTS, name=_TOUCH_FUNCTION):
+        # now() is the transaction start: the delta sync's lookback covers
+        # back-office transactions that commit a few seconds later
+        statements.append(
+            f"CREATE FUNCTION {_TOUCH_FUNCTION}() RETURNS trigger AS $$ "
+            "BEGIN NEW.updated_at := now(); RETURN NEW; END "
+            "$$ LANGUAGE plpgsql"
+        )
+
+    for model in (Company, CompanyBranch, QRCode):
+        table: Table = model.__table__
+        if not await _exists(
+            session, _COLUMN_EXISTS, table=table.name, column="updated_at"
+        ):
+            # now() is stable, so existing rows get it without a table rewrite
+            statements.append(
+                f"ALTER TABLE {table.name} ADD COLUMN updated_at "
+                "TIMESTAMP WITH TIME ZONE DEFAULT now() NOT NULL"
+            )
+        index = f"ix_{table.name}_updated_at"
+        if not await _exists(session, _RELATION_EXISTS, name=index):
+            statements.append(f"CREATE INDEX {index} ON {table.name} (updated_at)")
+
+        trigger = f"{table.name}_touch_updated_at"
+        if not await _exists(session, _TRIGGER_EXISTS, table=table.name, name=trigger):
+            untracked = {"id", "updated_at", *_UNTRACKED_COLUMNS.get(table.name, ())}
+            changed = " OR ".join(
+                f"OLD.{column.name} IS DISTINCT FROM NEW.{column.name}"
+                for column in table.columns
+                if column.name not in untracked
+            )
+            statements.append(
+                f"CREATE TRIGGER {trigger} BEFORE UPDATE ON {table.name} "
+                f"FOR EACH ROW WHEN ({changed}) "
+                f"EXECUTE FUNCTION {_TOUCH_FUNCTION}()"
+            )
+    return statements
+
+
+async def plan_scan_events(session: AsyncSession) -> List[str]:
+    """The partitioned scan_events parent and its default partition"""
+    table: Table = ScanEvent.__table__
+    statements = []
+    if not await _exists(session, _RELATION_EXISTS, name=table.name):
+        # postgresql_partition_by makes this PARTITION BY RANGE (scanned_at)
+        statements.extend(_create_table(table))
+    elif not await _exists(session, _IS_PARTITIONED, table=table.name):
+        raise RuntimeError(
+            f"{table.name} exists but is not partitioned; rename it and re-run "
+            "to create the partitioned table, then copy its rows over"
+        )
+
+    # Named as ScanEventRepository.ensure_partitions expects it
+    default = f"{table.name}_default"
+    if not await _exists(session, _RELATION_EXISTS, name=default):
+        statements.append(f"CREATE TABLE {default} PARTITION OF {table.name} DEFAULT")
+    return statements
+
+
+async def _plan_tables(session: AsyncSession, *tables: Table) -> List[str]:
+    statements = []
+    for table in tables:
+        if not await _exists(session, _RELATION_EXISTS, name=table.name):
+            statements.extend(_create_table(table))
+    return statements
+
+
+async def plan_scan_rollups(session: AsyncSession) -> List[str]:
+    """The hourly, daily and per-company scan rollup tables"""
+    return await _plan_tables(
+        session,
+        ScanHourlyRollup.__table__,
+        ScanDailyRollup.__table__,
+        CompanyScanDailyRollup.__table__,
+    )
+
+
+async def plan_access_log_offsets(session: AsyncSession) -> List[str]:
+    """The offsets that make access log ingestion count every line once"""
+    return await _plan_tables(session, AccessLogOffset.__table__)
+
+
+async def plan_scan_count_shards(session: AsyncSession) -> List[str]:
+    """The per-shard scan counts of hot QR codes"""
+    return await _plan_tables(session, ScanCountShard.__table__)
+
+
+async def plan_visitor_sketches(session: AsyncSession) -> List[str]:
+    """The daily unique visitor sketches"""
+    return await _plan_tables(session, VisitorDailySketch.__table__)
+
+
+_STEPS: List[Step] = [
+    plan_updated_at,
+    plan_scan_events,
+    plan_scan_rollups,
+    plan_access_log_offsets,
+    plan_scan_count_shards,
+    plan_visitor_sketches,
+]
+
+
+async def plan_schema_migration(session: AsyncSession) -> List[str]:
+    """DDL still needed by every step, in order"""
+    statements = []
+    for step in _STEPS:
+        statements.extend(await step(session))
+    return statements
+
+
+async def migrate_schema(dry_run: bool) -> List[str]:
+    try:
+        async with AsyncSessionLocal() as session:
+            if session.bind.dialect.name != "postgresql":
+                return []
+            statements = await plan_schema_migration(session)
+            if dry_run:
+                await session.rollback()
+                return statements
+            for statement in statements:
+                await session.execute(text(statement))
+            await session.commit()
+    finally:
+        await engine.dispose()
+    return statements
+
+
+def main(argv: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--dry-run", action="store_true", help="print the DDL without running it"
+    )
+    args = parser.parse_args(argv)
+
+    statements = asyncio.run(migrate_schema(args.dry_run))
+    if not statements:
+        print("The schema is up to date")
+    for statement in statements:
+        print(f"{statement};")
+
+
+if __name__ == "__main__":
+    main()
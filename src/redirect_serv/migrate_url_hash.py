@@ -0,0 +1,122 @@
+"""Convert qr_codes.url_hash from CHAR(64) hex text to 32-byte BYTEA.
+
+python -m src.redirect_serv.migrate_url_hash [--dry-run]
+
+Run once before deploying code that maps url_hash as HexBytes; PostgreSQL
+only, a no-op elsewhere, and safe to re-run. Everything happens in one
+transaction: the column is rewritten in place, which holds an ACCESS
+EXCLUSIVE lock on qr_codes for the duration, so run it in a maintenance
+window. Afterwards a single unique index covers url_hash; a redundant
+plain index left over from index=True is dropped.
+"""
+
+import argparse
+import asyncio
+from typing import List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.redirect_serv.core.dependencies.database import AsyncSessionLocal, engine
+
+_TABLE = "qr_codes"
+_UNIQUE = "uq_qr_codes_url_hash"
+_CHECK = "ck_qr_codes_url_hash_length"
+
+_COLUMN_TYPE = text(
+    "SELECT data_type FROM information_schema.columns "
+    "WHERE table_schema = current_schema() AND table_name = :table "
+    "AND column_name = 'url_hash'"
+)
+# Plain single-column indexes on url_hash, with the constraint each backs
+_URL_HASH_INDEXES = text(
+    "SELECT i.relname AS name, ix.indisunique AS is_unique, "
+    "c.contype AS constraint_type "
+    "FROM pg_index ix "
+    "JOIN pg_class i ON i.oid = ix.indexrelid "
+    "JOIN pg_attribute a ON a.attrelid = ix.indrelid AND a.attnum = ix.indkey[0] "
+    "LEFT JOIN pg_constraint c ON c.conindid = ix.indexrelid "
+    "AND c.conrelid = ix.indrelid "
+    "WHERE ix.indrelid = CAST(:table AS regclass) AND ix.indnatts = 1 "
+    "AND ix.indpred IS NULL AND a.attname = 'url_hash' "
+    "ORDER BY c.contype IS NULL, i.relname"
+)
+_CHECK_EXISTS = text(
+    "SELECT 1 FROM pg_constraint "
+    "WHERE conrelid = CAST(:table AS regclass) AND conname = :name"
+)
+
+
+async def plan_url_hash_migration(session: AsyncSession) -> List[str]:
+    """DDL still needed to bring url_hash to its BYTEA form, in order"""
+    params = {"table": _TABLE}
+    statements = []
+
+    data_type = await session.scalar(_COLUMN_TYPE, params)
+    if data_type is None:
+        raise RuntimeError(f"{_TABLE}.url_hash does not exist")
+    if data_type != "bytea":
+        statements.append(
+            f"ALTER TABLE {_TABLE} ALTER COLUMN url_hash TYPE bytea "
+            "USING decode(url_hash, 'hex')"
+        )
+
+    if not await session.scalar(_CHECK_EXISTS, {**params, "name": _CHECK}):
+        statements.append(
+            f"ALTER TABLE {_TABLE} ADD CONSTRAINT {_CHECK} "
+            "CHECK (length(url_hash) = 32)"
+        )
+
+    indexes = (await session.execute(_URL_HASH_INDEXES, params)).all()
+    keep = next((index for index in indexes if index.constraint_type == "u"), None)
+    if keep is None:
+        keep = next((index for index in indexes if index.is_unique), None)
+        if keep is None:
+            statements.append(
+                f"ALTER TABLE {_TABLE} ADD CONSTRAINT {_UNIQUE} UNIQUE (url_hash)"
+            )
+        else:
+            # Promotes the existing unique index without building another one
+            statements.append(
+                f"ALTER TABLE {_TABLE} ADD CONSTRAINT {_UNIQUE} "
+                f"UNIQUE USING INDEX {keep.name}"
+            )
+    for index in indexes:
+        if index is not keep and index.constraint_type is None:
+            statements.append(f'DROP INDEX "{index.name}"')
+    return statements
+
+
+async def migrate_url_hash(dry_run: bool) -> List[str]:
+    try:
+        async with AsyncSessionLocal() as session:
+            if session.bind.dialect.name != "postgresql":
+                return []
+            statements = await plan_url_hash_migration(session)
+            if dry_run:
+                await session.rollback()
+                return statements
+            for statement in statements:
+                await session.execute(text(statement))
+            await session.commit()
+    finally:
+        await engine.dispose()
+    return statements
+
+
+def main(argv: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--dry-run", action="store_true", help="print the DDL without running it"
+    )
+    args = parser.parse_args(argv)
+
+    statements = asyncio.run(migrate_url_hash(args.dry_run))
+    if not statements:
+        print("url_hash is already stored as BYTEA")
+    for statement in statements:
+        print(f"{statement};")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 from src.redirect_serv.models.base import Base
-from src.redirect_serv.models.mixins import IdMixin
+from src.redirect_serv.models.mixins import IdMixin, TimestampMixin
+from src.redirect_serv.models.types import HexBytes
 
-__all__ = ("Base", "IdMixin")
+__all__ = ("Base", "HexBytes", "IdMixin", "TimestampMixin")
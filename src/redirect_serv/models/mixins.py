@@ -1,4 +1,7 @@
-from sqlalchemy import Integer
+from datetime import datetime
+
+from sqlalchemy import Integer, func
+from sqlalchemy.dialects.postgresql import TIMESTAMP
 from sqlalchemy.orm import Mapped, mapped_column
 
 
@@ -6,4 +9,16 @@ class IdMixin:
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
 
 
-__all__ = ("IdMixin",)
+class TimestampMixin:
+    # onupdate only covers writes through this service; on PostgreSQL a
+    # trigger (see migrate_schema) moves it for every other writer as well
+    updated_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+        index=True,
+    )
+
+
+__all__ = ("IdMixin", "TimestampMixin")
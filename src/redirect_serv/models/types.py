@@ -0,0 +1,26 @@
+from typing import Any, Optional
+
+from sqlalchemy import LargeBinary
+from sqlalchemy.types import TypeDecorator
+
+
+class HexBytes(TypeDecorator):
+    """Hex string in Python, stored as its raw bytes (BYTEA on PostgreSQL).
+
+    Half the size of the hex text in the row and in every index on it, and
+    compared as bytes instead of under a collation.
+    """
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value: Any, dialect: Any) -> Optional[bytes]:
+        if value is None or isinstance(value, bytes):
+            return value
+        return bytes.fromhex(value)
+
+    def process_result_value(self, value: Any, dialect: Any) -> Optional[str]:
+        return None if value is None else bytes(value).hex()
+
+
+__all__ = ("HexBytes",)
@@ -0,0 +1,36 @@
+"""Run the service under uvicorn with production settings.
+
+python -m src.redirect_serv.serve
+
+Workers, event loop, HTTP parser, backlog and keep-alive come from the
+SERVER_* settings. Each worker builds its own app and warms its connection
+pool in the lifespan before it accepts requests. For development with
+auto-reload use make run_server instead.
+"""
+
+import uvicorn
+
+from src.redirect_serv.core.config import server_settings
+
+
+def main() -> None:
+    uvicorn.run(
+        "src.redirect_serv.core.app:create_app",
+        factory=True,
+        host=server_settings.host,
+        port=server_settings.port,
+        workers=server_settings.workers,
+        loop=server_settings.loop,
+        http=server_settings.http,
+        backlog=server_settings.backlog,
+        timeout_keep_alive=server_settings.keep_alive,
+        timeout_graceful_shutdown=server_settings.graceful_shutdown_timeout,
+        proxy_headers=True,
+        forwarded_allow_ips=server_settings.forwarded_allow_ips,
+        access_log=server_settings.access_log,
+        lifespan="on",
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+import hashlib
+from typing import AsyncGenerator
+from unittest.mock import MagicMock, patch
+
+import httpx
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.redirect_serv.api.fast_redirect import RedirectFastPathMiddleware
+from src.redirect_serv.apps.qr_manager.services import UniqueVisitorTracker
+from src.redirect_serv.core.app import create_app
+from src.redirect_serv.core.config import rate_limit_settings
+from src.redirect_serv.core.dependencies.database import get_session
+from tests.fixtures.factories import CompanyBranchFactory, QRCodeFactory
+
+SERVICE = "src.redirect_serv.apps.qr_manager.services.qr_code_service"
+
+
+@pytest.fixture
+def redirect_settings() -> MagicMock:
+    settings = MagicMock()
+    settings.guest_serv_domain = "example.com"
+    settings.redirect_protocol = "https"
+    settings.use_https = True
+    return settings
+
+
+@pytest_asyncio.fixture
+async def fast_client(
+    test_session: AsyncSession, redirect_settings: MagicMock
+) -> AsyncGenerator[httpx.AsyncClient, None]:
+    app = create_app()
+    app.add_middleware(
+        RedirectFastPathMiddleware,
+        settings=redirect_settings,
+        dependency_overrides=app.dependency_overrides,
+    )
+
+    async def override_get_session():
+        yield test_session
+
+    app.dependency_overrides[get_session] = override_get_session
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+        yield ac
+
+
+@pytest.mark.asyncio
+async def test_fast_path_matches_application_response(
+    client: httpx.AsyncClient,
+    fast_client: httpx.AsyncClient,
+    test_session: AsyncSession,
+    test_company,
+    redirect_settings: MagicMock,
+):
+    branch = await CompanyBranchFactory.create(
+        session=test_session,
+        company_id=test_company.id,
+    )
+    url_hash = hashlib.sha256(str(branch.id).encode()).hexdigest()
+    qr_code = await QRCodeFactory.create(
+        session=test_session,
+        company_branch_id=branch.id,
+        url_hash=url_hash,
+    )
+
+    with patch(
+        "src.redirect_serv.apps.qr_manager.application.base_settings",
+        redirect_settings,
+    ):
+        expected = await client.get(f"/redirect/{url_hash}")
+    response = await fast_client.get(f"/redirect/{url_hash}")
+
+    assert response.status_code == expected.status_code == 302
+    for header in ("location", "set-cookie", "content-length"):
+        assert response.headers[header] == expected.headers[header]
+
+    await test_session.refresh(qr_code)
+    assert qr_code.scan_count == 2
+
+
+@pytest.mark.asyncio
+async def test_fast_path_not_found(fast_client: httpx.AsyncClient):
+    url_hash = hashlib.sha256("99999".encode()).hexdigest()
+
+    response = await fast_client.get(f"/redirect/{url_hash}")
+
+    assert response.status_code == 404
+    assert "not found" in response.json()["detail"].lower()
+
+
+@pytest.mark.asyncio
+async def test_fast_path_passes_other_routes_through(fast_client: httpx.AsyncClient):
+    response = await fast_client.get("/health/live")
+
+    assert response.status_code == 200
+    assert response.json() == {"status": "ok"}
+
+
+@pytest.mark.asyncio
+async def test_visitors_are_keyed_on_the_peer_address(
+    client: httpx.AsyncClient,
+    fast_client: httpx.AsyncClient,
+    test_session: AsyncSession,
+    test_company,
+):
+    branch = await CompanyBranchFactory.create(
+        session=test_session, company_id=test_company.id
+    )
+    url_hash = hashlib.sha256(b"visitors").hexdigest()
+    await QRCodeFactory.create(
+        session=test_session, company_branch_id=branch.id, url_hash=url_hash
+    )
+    tracker = UniqueVisitorTracker(
+        enabled=True, precision=4, flush_interval=60, max_pending_sketches=1000
+    )
+    headers = {"X-Forwarded-For": "10.0.0.1, 10.0.0.2"}
+
+    # Rate limit settings do not affect how visitors are identified
+    with patch(f"{SERVICE}.unique_visitor_tracker", tracker), patch.multiple(
+        rate_limit_settings, key="forwarded", trusted_proxies=0
+    ):
+        for http in (client, fast_client):
+            response = await http.get(
+                f"/redirect/{url_hash}", headers=headers, follow_redirects=False
+            )
+            assert response.status_code == 302
+
+    assert tracker.pending_sketches == 1
@@ -0,0 +1,62 @@
+import hashlib
+
+import httpx
+import pytest
+from prometheus_client import REGISTRY
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from tests.fixtures.factories import CompanyBranchFactory, QRCodeFactory
+
+
+def sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+@pytest.mark.asyncio
+async def test_redirects_are_timed_and_counted(
+    client: httpx.AsyncClient, test_session: AsyncSession, test_company
+):
+    branch = await CompanyBranchFactory.create(
+        session=test_session, company_id=test_company.id
+    )
+    url_hash = hashlib.sha256(b"metrics").hexdigest()
+    await QRCodeFactory.create(
+        session=test_session, company_branch_id=branch.id, url_hash=url_hash
+    )
+
+    found = sample("redirect_serv_redirect_responses_total", status="302")
+    missing = sample("redirect_serv_redirect_responses_total", status="404")
+    timed = sample("redirect_serv_redirect_seconds_count")
+    writes = sample("redirect_serv_redirect_scan_write_seconds_count")
+
+    response = await client.get(f"/redirect/{url_hash}", follow_redirects=False)
+    assert response.status_code == 302
+    response = await client.get(f"/redirect/{'0' * 64}", follow_redirects=False)
+    assert response.status_code == 404
+
+    assert sample("redirect_serv_redirect_responses_total", status="302") == found + 1
+    assert sample("redirect_serv_redirect_responses_total", status="404") == missing + 1
+    assert sample("redirect_serv_redirect_seconds_count") == timed + 2
+    assert sample("redirect_serv_redirect_scan_write_seconds_count") >= writes + 1
+    assert sample("redirect_serv_http_requests_in_flight") == 0
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_exports_component_stats(client: httpx.AsyncClient):
+    response = await client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert "redirect_serv_redirect_resolve_seconds_bucket" in body
+    assert 'redirect_serv_cache_requests_total{cache="redirect_cache"' in body
+    assert 'redirect_serv_component_state{component="db_pool",stat="size"}' in body
+    assert (
+        'redirect_serv_component_state_max{component="database_circuit",stat="open"}'
+        in body
+    )
+    assert 'redirect_serv_component_state{component="database_circuit"' not in body
+    assert (
+        'redirect_serv_component_events_total{component="scan_events",event="dropped"}'
+        in body
+    )
@@ -0,0 +1,132 @@
+import hashlib
+import os
+
+import httpx
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.redirect_serv.apps.qr_manager.qr_image import qr_image_renderer
+from tests.fixtures.factories import CompanyBranchFactory, QRCodeFactory
+
+pytest.importorskip("segno")
+
+
+@pytest.fixture
+def renderer(tmp_path, monkeypatch):
+    monkeypatch.setattr(qr_image_renderer, "cache_dir", str(tmp_path))
+    monkeypatch.setattr(qr_image_renderer, "render_workers", 0)
+    qr_image_renderer.clear()
+    yield qr_image_renderer
+    qr_image_renderer.clear()
+
+
+async def create_qr_code(session: AsyncSession, company_id: int, qr_options=None):
+    branch = await CompanyBranchFactory.create(session=session, company_id=company_id)
+    return await QRCodeFactory.create(
+        session=session,
+        company_branch_id=branch.id,
+        url_hash=hashlib.sha256(f"image-{branch.id}".encode()).hexdigest(),
+        qr_options=qr_options,
+    )
+
+
+@pytest.mark.asyncio
+async def test_png_is_cached_and_revalidated(
+    client: httpx.AsyncClient, test_session: AsyncSession, test_company, renderer
+):
+    qr_code = await create_qr_code(test_session, test_company.id, {"scale": 4})
+
+    first = await client.get(f"/qr/{qr_code.url_hash}.png")
+    assert first.status_code == 200
+    assert first.headers["content-type"] == "image/png"
+    assert first.content.startswith(b"\x89PNG")
+    etag = first.headers["etag"]
+    assert renderer.renders == 1
+
+    response = await client.get(
+        f"/qr/{qr_code.url_hash}.png", headers={"If-None-Match": etag}
+    )
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert not response.content
+
+    # Other workers find the image on disk instead of rendering it again
+    renderer.clear()
+    again = await client.get(f"/qr/{qr_code.url_hash}.png")
+    assert again.content == first.content
+    assert renderer.renders == 1
+    assert renderer.disk_hits == 1
+
+
+@pytest.mark.asyncio
+async def test_options_and_format_change_the_etag(
+    client: httpx.AsyncClient, test_session: AsyncSession, test_company, renderer
+):
+    plain = await create_qr_code(test_session, test_company.id)
+    styled = await create_qr_code(
+        test_session, test_company.id, {"dark": "#0000ff", "unrelated": True}
+    )
+
+    svg = await client.get(f"/qr/{plain.url_hash}.svg")
+    assert svg.status_code == 200
+    assert svg.headers["content-type"] == "image/svg+xml"
+    assert b"<svg" in svg.content
+
+    png = await client.get(f"/qr/{plain.url_hash}.png")
+    styled_svg = await client.get(f"/qr/{styled.url_hash}.svg")
+    assert len({r.headers["etag"] for r in (svg, png, styled_svg)}) == 3
+    assert b"#00f" in styled_svg.content
+
+
+@pytest.mark.asyncio
+async def test_unknown_hash_and_format(
+    client: httpx.AsyncClient, test_session: AsyncSession, test_company, renderer
+):
+    response = await client.get(f"/qr/{'0' * 64}.png")
+    assert response.status_code == 404
+
+    qr_code = await create_qr_code(test_session, test_company.id)
+    response = await client.get(f"/qr/{qr_code.url_hash}.gif")
+    assert response.status_code == 422
+
+
+def test_numeric_options_are_clamped(renderer):
+    spec = renderer.spec(
+        "0" * 64, {"scale": 10_000, "border": -3, "dark": "red"}, "png"
+    )
+    assert spec.options == {"scale": renderer.max_scale, "border": 0, "dark": "red"}
+
+    spec = renderer.spec("0" * 64, {"scale": "huge", "border": 10_000}, "png")
+    assert spec.options == {"border": renderer.max_border}
+
+
+@pytest.mark.asyncio
+async def test_disk_cache_keeps_the_most_recently_used_images(
+    client: httpx.AsyncClient,
+    test_session: AsyncSession,
+    test_company,
+    renderer,
+    monkeypatch,
+):
+    qr_codes = [await create_qr_code(test_session, test_company.id) for _ in range(4)]
+    for qr_code in qr_codes:
+        response = await client.get(f"/qr/{qr_code.url_hash}.svg")
+        assert response.status_code == 200
+    paths = sorted(
+        (
+            os.path.join(root, name)
+            for root, _, names in os.walk(renderer.cache_dir)
+            for name in names
+        ),
+        key=os.path.getmtime,
+    )
+    assert len(paths) == 4
+    for age, path in enumerate(reversed(paths)):
+        os.utime(path, (1000 - age, 1000 - age))
+    sizes = [os.path.getsize(path) for path in paths]
+
+    # Room for the two newest files once pruned down to the low watermark
+    monkeypatch.setattr(renderer, "disk_cache_bytes", int(sum(sizes[-2:]) / 0.9) + 1)
+    assert await renderer.prune_disk() == 2
+    assert renderer.disk_evictions == 2
+    assert [os.path.exists(path) for path in paths] == [False, False, True, True]
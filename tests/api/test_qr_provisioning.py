@@ -0,0 +1,60 @@
+import json
+
+import httpx
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.redirect_serv.apps.qr_manager.hash_filter import known_hash_filter
+from tests.fixtures.factories import CompanyBranchFactory
+
+
+async def provision(client: httpx.AsyncClient, branch_ids):
+    response = await client.post(
+        "/qr-codes/bulk", json={"company_branch_ids": branch_ids}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+@pytest.mark.asyncio
+async def test_provision_creates_codes_once(
+    client: httpx.AsyncClient, test_session: AsyncSession, test_company
+):
+    branches = [
+        await CompanyBranchFactory.create(
+            session=test_session, company_id=test_company.id
+        )
+        for _ in range(3)
+    ]
+    ids = [branch.id for branch in branches]
+
+    first = await provision(client, ids + [ids[0]])
+    assert [row["company_branch_id"] for row in first] == ids
+    assert all(row["created"] for row in first)
+    hashes = {row["company_branch_id"]: row["url_hash"] for row in first}
+    assert len(set(hashes.values())) == 3
+    assert all(known_hash_filter.might_exist(h) for h in hashes.values())
+
+    # Rerunning is idempotent and returns the existing hashes
+    second = await provision(client, ids)
+    assert [(row["url_hash"], row["created"]) for row in second] == [
+        (hashes[i], False) for i in ids
+    ]
+
+    response = await client.get(f"/redirect/{hashes[ids[0]]}", follow_redirects=False)
+    assert response.status_code == 302
+
+
+@pytest.mark.asyncio
+async def test_provision_reports_unknown_branches(client: httpx.AsyncClient):
+    rows = await provision(client, [999999])
+    assert rows == [{"company_branch_id": 999999, "url_hash": None, "created": False}]
+
+
+@pytest.mark.asyncio
+async def test_provision_rejects_oversized_batches(client: httpx.AsyncClient):
+    response = await client.post(
+        "/qr-codes/bulk", json={"company_branch_ids": list(range(100_001))}
+    )
+    assert response.status_code == 400
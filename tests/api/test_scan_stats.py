@@ -0,0 +1,233 @@
+import hashlib
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+
+import httpx
+import pytest
+from sqlalchemy.exc import OperationalError, ProgrammingError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.redirect_serv.apps.qr_manager.services import (
+    ScanRollupAggregator,
+    UniqueVisitorTracker,
+)
+from tests.fixtures.factories import CompanyBranchFactory, QRCodeFactory
+
+MORNING = datetime(2025, 3, 1, 9, 15, tzinfo=timezone.utc)
+EVENING = datetime(2025, 3, 1, 18, 40, tzinfo=timezone.utc)
+NEXT_DAY = datetime(2025, 3, 2, 8, 5, tzinfo=timezone.utc)
+
+
+async def create_qr_code(session: AsyncSession, company_id: int):
+    branch = await CompanyBranchFactory.create(session=session, company_id=company_id)
+    return await QRCodeFactory.create(
+        session=session,
+        company_branch_id=branch.id,
+        url_hash=hashlib.sha256(f"stats-{branch.id}".encode()).hexdigest(),
+    )
+
+
+async def record_scans(session: AsyncSession, scans):
+    @asynccontextmanager
+    async def factory():
+        yield session
+
+    aggregator = ScanRollupAggregator(
+        enabled=True, flush_interval=60, max_pending_buckets=1000
+    )
+    await aggregator.start(factory)
+    for qr_code_id, scanned_at in scans:
+        aggregator.add(qr_code_id, scanned_at)
+    await aggregator.stop()
+
+
+def failing_factory(error: Exception):
+    @asynccontextmanager
+    async def factory():
+        raise error
+        yield
+
+    return factory
+
+
+@pytest.mark.asyncio
+async def test_rollups_keep_scans_only_while_the_database_is_unreachable():
+    aggregator = ScanRollupAggregator(
+        enabled=True, flush_interval=60, max_pending_buckets=2
+    )
+    for qr_code_id in (1, 2, 3):
+        aggregator.add(qr_code_id, MORNING)
+    assert aggregator.pending_buckets == 2
+    assert aggregator.dropped_scans == 1
+
+    await aggregator.start(failing_factory(OperationalError("", {}, OSError())))
+    await aggregator.flush()
+    assert aggregator.pending_buckets == 2
+    assert aggregator.failed_flushes == 1
+
+    # A missing table will not appear by retrying
+    aggregator._session_factory = failing_factory(
+        ProgrammingError("", {}, Exception("relation does not exist"))
+    )
+    await aggregator.flush()
+    assert aggregator.pending_buckets == 0
+    assert aggregator.dropped_scans == 3
+    assert not aggregator.enabled
+    aggregator.add(1, MORNING)
+    assert aggregator.pending_buckets == 0
+    await aggregator.stop()
+
+
+@pytest.mark.asyncio
+async def test_branch_scans_by_day_and_hour(
+    client: httpx.AsyncClient, test_session: AsyncSession, test_company
+):
+    qr_code = await create_qr_code(test_session, test_company.id)
+    await record_scans(
+        test_session,
+        [(qr_code.id, MORNING), (qr_code.id, MORNING), (qr_code.id, EVENING)],
+    )
+    # A second flush adds to the existing buckets
+    await record_scans(test_session, [(qr_code.id, NEXT_DAY)])
+
+    response = await client.get(
+        f"/stats/branches/{qr_code.company_branch_id}/scans",
+        params={"start": "2025-03-01T00:00:00Z", "end": "2025-03-03T00:00:00Z"},
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert body["total"] == 4
+    assert [(p["bucket"], p["scans"]) for p in body["points"]] == [
+        ("2025-03-01", 3),
+        ("2025-03-02", 1),
+    ]
+
+    response = await client.get(
+        f"/stats/branches/{qr_code.company_branch_id}/scans",
+        params={
+            "start": "2025-03-01T09:30:00Z",
+            "end": "2025-03-02T00:00:00Z",
+            "granularity": "hour",
+        },
+    )
+    assert response.status_code == 200
+    assert [p["scans"] for p in response.json()["points"]] == [2, 1]
+
+
+@pytest.mark.asyncio
+async def test_company_scans_sum_all_branches(
+    client: httpx.AsyncClient, test_session: AsyncSession, test_company
+):
+    first = await create_qr_code(test_session, test_company.id)
+    second = await create_qr_code(test_session, test_company.id)
+    await record_scans(
+        test_session, [(first.id, MORNING), (second.id, EVENING), (second.id, NEXT_DAY)]
+    )
+
+    response = await client.get(
+        f"/stats/companies/{test_company.id}/scans",
+        params={"start": "2025-03-01T00:00:00Z", "end": "2025-03-02T12:00:00Z"},
+    )
+    assert response.status_code == 200
+    assert [(p["bucket"], p["scans"]) for p in response.json()["points"]] == [
+        ("2025-03-01", 2),
+        ("2025-03-02", 1),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_scan_stats_rejects_bad_ranges(
+    client: httpx.AsyncClient, test_session: AsyncSession, test_company
+):
+    qr_code = await create_qr_code(test_session, test_company.id)
+    url = f"/stats/branches/{qr_code.company_branch_id}/scans"
+
+    response = await client.get(
+        url, params={"start": "2025-03-02T00:00:00Z", "end": "2025-03-01T00:00:00Z"}
+    )
+    assert response.status_code == 400
+
+    response = await client.get(
+        url,
+        params={
+            "start": "2025-01-01T00:00:00Z",
+            "end": "2025-03-01T00:00:00Z",
+            "granularity": "hour",
+        },
+    )
+    assert response.status_code == 400
+
+    response = await client.get("/stats/branches/999999/scans")
+    assert response.status_code == 404
+
+
+async def record_visits(session: AsyncSession, visits):
+    @asynccontextmanager
+    async def factory():
+        yield session
+
+    tracker = UniqueVisitorTracker(
+        enabled=True, precision=12, flush_interval=60, max_pending_sketches=1000
+    )
+    await tracker.start(factory)
+    for qr_code_id, client, scanned_at in visits:
+        tracker.add(qr_code_id, client, "Mozilla/5.0", scanned_at)
+    await tracker.stop()
+
+
+@pytest.mark.asyncio
+async def test_branch_visitors_union_days_and_flushes(
+    client: httpx.AsyncClient, test_session: AsyncSession, test_company
+):
+    qr_code = await create_qr_code(test_session, test_company.id)
+    clients = [f"10.0.0.{i}" for i in range(30)]
+    await record_visits(
+        test_session,
+        [(qr_code.id, address, MORNING) for address in clients[:20]]
+        + [(qr_code.id, address, EVENING) for address in clients[:20]],
+    )
+    # Merged into the stored sketch of the first day, and a new one
+    await record_visits(
+        test_session,
+        [(qr_code.id, address, MORNING) for address in clients[10:25]]
+        + [(qr_code.id, address, NEXT_DAY) for address in clients[20:]],
+    )
+
+    response = await client.get(
+        f"/stats/branches/{qr_code.company_branch_id}/visitors",
+        params={"start": "2025-03-01T00:00:00Z", "end": "2025-03-03T00:00:00Z"},
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert body["total"] == 30
+    assert [(p["day"], p["visitors"]) for p in body["points"]] == [
+        ("2025-03-01", 25),
+        ("2025-03-02", 10),
+    ]
+
+    missing = await client.get("/stats/branches/999999/visitors")
+    assert missing.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_visitor_sketches_are_bounded_while_flushes_fail():
+    tracker = UniqueVisitorTracker(
+        enabled=True, precision=4, flush_interval=60, max_pending_sketches=2
+    )
+    for qr_code_id in (1, 2, 3):
+        tracker.add(qr_code_id, "10.0.0.1", scanned_at=MORNING)
+    assert tracker.pending_sketches == 2
+    assert tracker.dropped_visits == 1
+
+    await tracker.start(failing_factory(OperationalError("", {}, OSError())))
+    await tracker.flush()
+    assert tracker.pending_sketches == 2
+
+    tracker._session_factory = failing_factory(
+        ProgrammingError("", {}, Exception("relation does not exist"))
+    )
+    await tracker.flush()
+    assert tracker.pending_sketches == 0
+    assert tracker.dropped_sketches == 2
+    assert not tracker.enabled
+    await tracker.stop()
@@ -0,0 +1,101 @@
+import hashlib
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.redirect_serv.apps.qr_manager.access_log import parse_scan
+from src.redirect_serv.apps.qr_manager.models import QRCode, ScanHourlyRollup
+from src.redirect_serv.apps.qr_manager.services import AccessLogIngestor
+from tests.fixtures.factories import CompanyBranchFactory, QRCodeFactory
+
+DEFAULT_TIME = datetime(2025, 1, 1, tzinfo=timezone.utc)
+HASH = "ab" * 32
+
+
+def nginx_line(url_hash: str, when: str, status: int = 302) -> str:
+    return (
+        f'10.0.0.1 - - [{when}] "GET /redirect/{url_hash}?utm=x HTTP/1.1" '
+        f'{status} 0 "-" "Mozilla/5.0"\n'
+    )
+
+
+def test_parse_scan_formats():
+    line = nginx_line(HASH, "01/Mar/2025:09:15:00 +0100").encode()
+    assert parse_scan(line, DEFAULT_TIME) == (
+        HASH,
+        datetime(2025, 3, 1, 8, 15, tzinfo=timezone.utc),
+    )
+
+    uvicorn = f'INFO:     10.0.0.1:5000 - "GET /redirect/{HASH} HTTP/1.1" 302\n'
+    assert parse_scan(uvicorn.encode(), DEFAULT_TIME) == (HASH, DEFAULT_TIME)
+    stamped = f"2025-03-01 09:15:00,123 {uvicorn}"
+    assert parse_scan(stamped.encode(), DEFAULT_TIME) == (
+        HASH,
+        datetime(2025, 3, 1, 9, 15, tzinfo=timezone.utc),
+    )
+
+    not_found = nginx_line(HASH, "01/Mar/2025:09:15:00 +0000", status=404)
+    assert parse_scan(not_found.encode(), DEFAULT_TIME) is None
+    assert parse_scan(b'"GET /metrics HTTP/1.1" 200\n', DEFAULT_TIME) is None
+
+
+@pytest.mark.asyncio
+async def test_ingest_counts_each_line_once(
+    test_session: AsyncSession, test_company, tmp_path
+):
+    branch = await CompanyBranchFactory.create(
+        session=test_session, company_id=test_company.id
+    )
+    url_hash = hashlib.sha256(b"edge").hexdigest()
+    qr_code = await QRCodeFactory.create(
+        session=test_session, company_branch_id=branch.id, url_hash=url_hash
+    )
+
+    @asynccontextmanager
+    async def factory():
+        yield test_session
+
+    log = tmp_path / "access.log"
+    log.write_text(
+        nginx_line(url_hash, "01/Mar/2025:09:15:00 +0000")
+        + nginx_line(url_hash, "01/Mar/2025:10:05:00 +0000")
+        + nginx_line("cd" * 32, "01/Mar/2025:10:06:00 +0000")
+        # Still being written, left for the next run
+        + nginx_line(url_hash, "01/Mar/2025:10:07:00 +0000").rstrip("\n")
+    )
+    ingestor = AccessLogIngestor(factory, batch_lines=2)
+
+    result = await ingestor.ingest(str(log))
+    assert (result.lines, result.scans, result.unknown_scans) == (3, 3, 1)
+
+    # A repeated run over the same lines counts nothing
+    again = await ingestor.ingest(str(log))
+    assert (again.start_offset, again.lines) == (result.end_offset, 0)
+
+    with log.open("a") as f:
+        f.write("\n")
+    assert (await ingestor.ingest(str(log))).scans == 1
+
+    await test_session.refresh(qr_code)
+    assert qr_code.scan_count == 3
+    assert qr_code.last_scanned.replace(tzinfo=timezone.utc) == datetime(
+        2025, 3, 1, 10, 7, tzinfo=timezone.utc
+    )
+    rollups = await test_session.execute(
+        select(ScanHourlyRollup.hour, ScanHourlyRollup.scans)
+        .where(ScanHourlyRollup.qr_code_id == qr_code.id)
+        .order_by(ScanHourlyRollup.hour)
+    )
+    assert [(hour.hour, scans) for hour, scans in rollups.all()] == [(9, 1), (10, 2)]
+
+    # Truncated in place (copytruncate): read again from the start
+    log.write_text(nginx_line(url_hash, "02/Mar/2025:08:00:00 +0000"))
+    restarted = await ingestor.ingest(str(log))
+    assert restarted.restarted and restarted.scans == 1
+    scan_count = await test_session.scalar(
+        select(QRCode.scan_count).where(QRCode.id == qr_code.id)
+    )
+    assert scan_count == 4
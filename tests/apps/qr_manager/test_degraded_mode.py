@@ -0,0 +1,72 @@
+import hashlib
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, patch
+
+import httpx
+import pytest
+from sqlalchemy import select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.redirect_serv.apps.qr_manager.cache import redirect_cache
+from src.redirect_serv.apps.qr_manager.models import AccessLogOffset, QRCode
+from src.redirect_serv.apps.qr_manager.repositories import QRCodeRepository
+from src.redirect_serv.apps.qr_manager.services import ScanSpool
+from src.redirect_serv.core.circuit_breaker import CircuitBreaker
+from tests.fixtures.factories import CompanyBranchFactory, QRCodeFactory
+
+SERVICE = "src.redirect_serv.apps.qr_manager.services.qr_code_service"
+
+
+@pytest.mark.asyncio
+async def test_redirects_and_spools_scans_while_database_is_down(
+    client: httpx.AsyncClient, test_session: AsyncSession, test_company, tmp_path
+):
+    branch = await CompanyBranchFactory.create(
+        session=test_session, company_id=test_company.id
+    )
+    url_hash = hashlib.sha256(b"degraded").hexdigest()
+    qr_code = await QRCodeFactory.create(
+        session=test_session, company_branch_id=branch.id, url_hash=url_hash
+    )
+
+    @asynccontextmanager
+    async def factory():
+        yield test_session
+
+    breaker = CircuitBreaker("db", failure_threshold=1, reset_timeout=60)
+    spool = ScanSpool(str(tmp_path), 60, 60, breaker)
+    down = AsyncMock(side_effect=OperationalError("SELECT", {}, OSError("down")))
+
+    with patch(f"{SERVICE}.db_circuit_breaker", breaker), patch(
+        f"{SERVICE}.scan_spool", spool
+    ):
+        response = await client.get(f"/redirect/{url_hash}", follow_redirects=False)
+        assert response.status_code == 302
+
+        # Only the last known targets survive the redirect cache expiring
+        redirect_cache.clear()
+        with patch.object(
+            QRCodeRepository, "get_redirect_target_and_increment_scan", down
+        ):
+            response = await client.get(f"/redirect/{url_hash}", follow_redirects=False)
+            assert response.status_code == 302
+            assert not breaker.closed
+
+            unknown = await client.get(f"/redirect/{'cd' * 32}")
+            assert unknown.status_code == 503
+        assert spool.spooled == 1
+
+        await spool.start(factory)
+        breaker.record_success()
+        assert await spool.replay() == 1
+        # Replayed segments are removed along with their offsets
+        assert await spool.replay() == 0
+        await spool.stop()
+
+    assert list(tmp_path.iterdir()) == []
+    assert await test_session.scalar(select(AccessLogOffset.file_id)) is None
+    scan_count = await test_session.scalar(
+        select(QRCode.scan_count).where(QRCode.id == qr_code.id)
+    )
+    assert scan_count == 2
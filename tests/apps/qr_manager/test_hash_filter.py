@@ -0,0 +1,174 @@
+import hashlib
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import httpx
+import pytest
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.redirect_serv.apps.qr_manager.hash_filter import (
+    KnownHashFilter,
+    is_valid_url_hash,
+)
+from src.redirect_serv.apps.qr_manager.models import QRCode
+from src.redirect_serv.apps.qr_manager.services import QRCodeService
+from src.redirect_serv.core.dependencies.database import get_session
+from src.redirect_serv.core.exceptions import NotFoundError
+from tests.fixtures.factories import CompanyBranchFactory, QRCodeFactory
+
+HASH_FILTER = "src.redirect_serv.apps.qr_manager.hash_filter"
+
+
+def session_factory_for(session: AsyncSession):
+    @asynccontextmanager
+    async def factory():
+        yield session
+
+    return factory
+
+
+async def build_filter(session: AsyncSession) -> KnownHashFilter:
+    known_hash_filter = KnownHashFilter(
+        enabled=False, error_rate=0.001, refresh_interval=60, rebuild_interval=600
+    )
+    await known_hash_filter.start(session_factory_for(session))
+    await known_hash_filter.rebuild()
+    return known_hash_filter
+
+
+def test_is_valid_url_hash():
+    assert is_valid_url_hash(hashlib.sha256(b"1").hexdigest())
+    assert not is_valid_url_hash("not-a-hash")
+    assert not is_valid_url_hash("z" * 64)
+    assert not is_valid_url_hash("a" * 65)
+
+
+@pytest.mark.asyncio
+async def test_malformed_hash_is_rejected_before_session(test_app, test_session):
+    async def failing_session():
+        raise AssertionError("session must not be opened")
+        yield  # pragma: no cover
+
+    test_app.dependency_overrides[get_session] = failing_session
+    transport = httpx.ASGITransport(app=test_app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+        response = await ac.get("/redirect/wp-login.php")
+
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_filter_is_built_from_known_hashes(
+    test_session: AsyncSession,
+    test_company,
+):
+    branch = await CompanyBranchFactory.create(
+        session=test_session,
+        company_id=test_company.id,
+    )
+    qr_code = await QRCodeFactory.create(
+        session=test_session,
+        company_branch_id=branch.id,
+    )
+    known_hash_filter = await build_filter(test_session)
+
+    assert known_hash_filter.ready
+    assert known_hash_filter.might_exist(qr_code.url_hash)
+    assert not known_hash_filter.might_exist(hashlib.sha256(b"unknown").hexdigest())
+
+
+@pytest.mark.asyncio
+async def test_unknown_hash_is_rejected_without_query(
+    qr_code_service: QRCodeService,
+    test_session: AsyncSession,
+):
+    known_hash_filter = await build_filter(test_session)
+    url_hash = hashlib.sha256(b"unknown").hexdigest()
+
+    with (
+        patch(
+            "src.redirect_serv.apps.qr_manager.services.qr_code_service"
+            ".known_hash_filter",
+            known_hash_filter,
+        ),
+        patch.object(qr_code_service.repository, "get_redirect_target") as lookup,
+    ):
+        with pytest.raises(NotFoundError):
+            await qr_code_service.get_redirect_target(url_hash)
+
+    lookup.assert_not_called()
+    assert known_hash_filter.rejected_bloom == 1
+
+
+@pytest.mark.asyncio
+async def test_unknown_hash_is_remembered_in_negative_cache(
+    qr_code_service: QRCodeService,
+):
+    url_hash = hashlib.sha256(b"unknown").hexdigest()
+
+    with pytest.raises(NotFoundError):
+        await qr_code_service.get_redirect_target(url_hash)
+
+    with patch.object(qr_code_service.repository, "get_redirect_target") as lookup:
+        with pytest.raises(NotFoundError):
+            await qr_code_service.get_redirect_target(url_hash)
+
+    lookup.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_created_code_is_removed_from_negative_cache(
+    qr_code_service: QRCodeService,
+    test_session: AsyncSession,
+    test_company,
+):
+    branch = await CompanyBranchFactory.create(
+        session=test_session,
+        company_id=test_company.id,
+    )
+    url_hash = hashlib.sha256(str(branch.id).encode()).hexdigest()
+
+    with pytest.raises(NotFoundError):
+        await qr_code_service.get_redirect_target(url_hash)
+
+    await QRCodeFactory.create(
+        session=test_session,
+        company_branch_id=branch.id,
+        url_hash=url_hash,
+    )
+
+    target = await qr_code_service.get_redirect_target(url_hash)
+    assert target.company_branch_id == branch.id
+
+
+@pytest.mark.asyncio
+async def test_refresh_picks_up_hashes_changed_on_existing_codes(
+    test_session: AsyncSession, test_company
+):
+    branch = await CompanyBranchFactory.create(
+        session=test_session, company_id=test_company.id
+    )
+    qr_code = await QRCodeFactory.create(
+        session=test_session, company_branch_id=branch.id
+    )
+    known_hash_filter = await build_filter(test_session)
+    new_hash = hashlib.sha256(b"changed elsewhere").hexdigest()
+
+    # As another worker would: the ORM hooks of this one never see it
+    await test_session.execute(
+        update(QRCode)
+        .where(QRCode.id == qr_code.id)
+        .values(
+            url_hash=new_hash,
+            updated_at=datetime.now(timezone.utc) + timedelta(minutes=1),
+        )
+    )
+    await test_session.commit()
+
+    with patch(f"{HASH_FILTER}._REFRESH_LOOKBACK_IDS", 0):
+        assert not known_hash_filter.might_exist(new_hash)
+        await known_hash_filter.refresh()
+
+    assert known_hash_filter.might_exist(new_hash)
@@ -0,0 +1,118 @@
+import hashlib
+from typing import List
+
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.redirect_serv.apps.qr_manager.repositories import QRCodeRepository
+from src.redirect_serv.apps.qr_manager.repositories.qr_code_repository import (
+    _INCREMENT_AND_RETURN_TARGET,
+)
+from src.redirect_serv.apps.qr_manager.schemas import RedirectTarget
+from tests.fixtures.factories import CompanyBranchFactory, QRCodeFactory
+
+
+@pytest.mark.asyncio
+async def test_get_redirect_target_uses_single_statement(
+    test_session: AsyncSession,
+    test_company,
+):
+    branch = await CompanyBranchFactory.create(
+        session=test_session,
+        company_id=test_company.id,
+    )
+    url_hash = hashlib.sha256(str(branch.id).encode()).hexdigest()
+    qr_code = await QRCodeFactory.create(
+        session=test_session,
+        company_branch_id=branch.id,
+        url_hash=url_hash,
+    )
+
+    statements: List[str] = []
+
+    def record(_conn, _cursor, statement, *_args):
+        statements.append(statement)
+
+    sync_engine = test_session.bind.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", record)
+    try:
+        target = await QRCodeRepository(test_session).get_redirect_target(url_hash)
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", record)
+
+    assert target == RedirectTarget(
+        qr_code_id=qr_code.id,
+        company_branch_id=branch.id,
+        subdomain=test_company.subdomain,
+    )
+    assert len(statements) == 1
+
+
+@pytest.mark.asyncio
+async def test_get_redirect_target_unknown_hash(test_session: AsyncSession):
+    url_hash = hashlib.sha256("99999".encode()).hexdigest()
+
+    assert await QRCodeRepository(test_session).get_redirect_target(url_hash) is None
+
+
+@pytest.mark.asyncio
+async def test_get_redirect_target_and_increment_scan(
+    test_session: AsyncSession,
+    test_company,
+):
+    branch = await CompanyBranchFactory.create(
+        session=test_session,
+        company_id=test_company.id,
+    )
+    url_hash = hashlib.sha256(str(branch.id).encode()).hexdigest()
+    qr_code = await QRCodeFactory.create(
+        session=test_session,
+        company_branch_id=branch.id,
+        url_hash=url_hash,
+        scan_count=2,
+    )
+
+    repository = QRCodeRepository(test_session)
+    target = await repository.get_redirect_target_and_increment_scan(url_hash)
+
+    assert target is not None
+    assert target.company_branch_id == branch.id
+    assert target.subdomain == test_company.subdomain
+    await test_session.refresh(qr_code)
+    assert qr_code.scan_count == 3
+    assert qr_code.last_scanned is not None
+
+
+def test_increment_and_return_target_is_one_postgres_statement():
+    sql = str(_INCREMENT_AND_RETURN_TARGET.compile(dialect=postgresql.dialect()))
+
+    assert sql.startswith("UPDATE qr_codes SET scan_count=(qr_codes.scan_count +")
+    assert "FROM company_branches, companies" in sql
+    assert (
+        "RETURNING qr_codes.id, qr_codes.company_branch_id, companies.subdomain" in sql
+    )
+
+
+@pytest.mark.asyncio
+async def test_url_hash_is_stored_as_raw_bytes(
+    test_session: AsyncSession, test_company
+):
+    branch = await CompanyBranchFactory.create(
+        session=test_session, company_id=test_company.id
+    )
+    url_hash = hashlib.sha256(b"bytes").hexdigest()
+    qr_code = await QRCodeFactory.create(
+        session=test_session, company_branch_id=branch.id, url_hash=url_hash
+    )
+
+    stored = await test_session.scalar(
+        text("SELECT url_hash FROM qr_codes WHERE id = :id"), {"id": qr_code.id}
+    )
+    assert stored == bytes.fromhex(url_hash)
+
+    repository = QRCodeRepository(test_session)
+    assert await repository.get_ids_by_url_hashes([url_hash]) == {url_hash: qr_code.id}
+    target = await repository.get_redirect_target(url_hash)
+    assert target.qr_code_id == qr_code.id
@@ -5,6 +5,7 @@ import httpx
 import pytest
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.redirect_serv.core.config import redirect_settings
 from tests.fixtures.factories import CompanyBranchFactory, QRCodeFactory
 
 
@@ -172,3 +173,49 @@ async def test_redirect_qr_code_cookie_attributes(
         assert "HttpOnly" in set_cookie_header
         assert "SameSite=lax" in set_cookie_header
         assert "Max-Age=2592000" in set_cookie_header  # 30 days
+
+
+@pytest.mark.asyncio
+async def test_redirect_edge_cache_mode_skips_counting(
+    client: httpx.AsyncClient,
+    test_session: AsyncSession,
+    test_company,
+    monkeypatch,
+):
+    monkeypatch.setattr(redirect_settings, "edge_cache", True)
+    branch = await CompanyBranchFactory.create(
+        session=test_session, company_id=test_company.id
+    )
+    url_hash = hashlib.sha256(f"edge-{branch.id}".encode()).hexdigest()
+    qr_code = await QRCodeFactory.create(
+        session=test_session, company_branch_id=branch.id, url_hash=url_hash
+    )
+
+    response = await client.get(f"/redirect/{url_hash}", follow_redirects=False)
+
+    assert response.status_code == 302
+    assert response.headers["cache-control"] == (
+        f"public, max-age={redirect_settings.edge_max_age}, "
+        f"s-maxage={redirect_settings.edge_shared_max_age}"
+    )
+    assert "Accept-Encoding" in response.headers["vary"]
+    await test_session.refresh(qr_code)
+    assert qr_code.scan_count == 0
+
+
+@pytest.mark.asyncio
+async def test_redirect_accepts_uppercase_hash(
+    client: httpx.AsyncClient, test_session: AsyncSession, test_company
+):
+    branch = await CompanyBranchFactory.create(
+        session=test_session, company_id=test_company.id
+    )
+    url_hash = hashlib.sha256(b"upper").hexdigest()
+    await QRCodeFactory.create(
+        session=test_session, company_branch_id=branch.id, url_hash=url_hash
+    )
+
+    response = await client.get(f"/redirect/{url_hash.upper()}", follow_redirects=False)
+
+    assert response.status_code == 302
+    assert response.cookies["company_branch_id"] == str(branch.id)
@@ -1,13 +1,20 @@
 import hashlib
 from datetime import datetime
+from unittest.mock import patch
 
 import pytest
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.redirect_serv.apps.qr_manager.services import QRCodeService
+from src.redirect_serv.apps.qr_manager.snapshot import (
+    RedirectSnapshotWatcher,
+    write_snapshot,
+)
 from src.redirect_serv.core.exceptions import NotFoundError
 from tests.fixtures.factories import CompanyBranchFactory, QRCodeFactory
 
+SERVICE = "src.redirect_serv.apps.qr_manager.services.qr_code_service"
+
 
 @pytest.mark.asyncio
 async def test_get_company_branch_and_increment_scan_success(
@@ -153,3 +160,94 @@ async def test_get_company_branch_and_increment_scan_returns_correct_branch(
     assert result1.id == branch1.id
     assert result2.id == branch2.id
     assert result1.id != result2.id
+
+
+@pytest.mark.asyncio
+async def test_get_redirect_target_is_served_from_cache(
+    qr_code_service: QRCodeService,
+    test_session: AsyncSession,
+    test_company,
+):
+    branch = await CompanyBranchFactory.create(
+        session=test_session,
+        company_id=test_company.id,
+    )
+    url_hash = hashlib.sha256(str(branch.id).encode()).hexdigest()
+    await QRCodeFactory.create(
+        session=test_session,
+        company_branch_id=branch.id,
+        url_hash=url_hash,
+    )
+
+    first = await qr_code_service.get_redirect_target(url_hash)
+
+    with patch.object(qr_code_service.repository, "get_redirect_target") as lookup:
+        second = await qr_code_service.get_redirect_target(url_hash)
+
+    lookup.assert_not_called()
+    assert second == first
+    assert second.company_branch_id == branch.id
+    assert second.subdomain == test_company.subdomain
+
+
+@pytest.mark.asyncio
+async def test_get_redirect_target_cache_invalidated_on_subdomain_change(
+    qr_code_service: QRCodeService,
+    test_session: AsyncSession,
+    test_company,
+):
+    branch = await CompanyBranchFactory.create(
+        session=test_session,
+        company_id=test_company.id,
+    )
+    url_hash = hashlib.sha256(str(branch.id).encode()).hexdigest()
+    await QRCodeFactory.create(
+        session=test_session,
+        company_branch_id=branch.id,
+        url_hash=url_hash,
+    )
+
+    await qr_code_service.get_redirect_target(url_hash)
+
+    test_company.subdomain = "renamed-restaurant"
+    await test_session.commit()
+
+    target = await qr_code_service.get_redirect_target(url_hash)
+    assert target.subdomain == "renamed-restaurant"
+
+
+@pytest.mark.asyncio
+async def test_snapshot_entries_are_masked_on_subdomain_change(
+    qr_code_service: QRCodeService,
+    test_session: AsyncSession,
+    test_company,
+    tmp_path,
+):
+    branch = await CompanyBranchFactory.create(
+        session=test_session, company_id=test_company.id
+    )
+    url_hash = hashlib.sha256(b"snapshot-masked").hexdigest()
+    qr_code = await QRCodeFactory.create(
+        session=test_session, company_branch_id=branch.id, url_hash=url_hash
+    )
+    path = str(tmp_path / "snapshot.bin")
+    write_snapshot(
+        path, [(url_hash, qr_code.id, branch.id, test_company.subdomain)], created_at=0
+    )
+    watcher = RedirectSnapshotWatcher(path=path, check_interval=60)
+    watcher.reload_if_changed()
+
+    with patch(f"{SERVICE}.redirect_snapshot", watcher), patch(
+        "src.redirect_serv.apps.qr_manager.cache.redirect_snapshot", watcher
+    ):
+        old_subdomain = test_company.subdomain
+        assert (await qr_code_service.get_redirect_target(url_hash)).subdomain == (
+            old_subdomain
+        )
+
+        test_company.subdomain = "moved-restaurant"
+        await test_session.commit()
+
+        target = await qr_code_service.get_redirect_target(url_hash)
+        assert target.subdomain == "moved-restaurant"
+        assert watcher.masked == 1
@@ -0,0 +1,105 @@
+import hashlib
+from contextlib import asynccontextmanager
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.redirect_serv.apps.qr_manager.redirect_table import RedirectTable
+from src.redirect_serv.apps.qr_manager.services import QRCodeService
+from tests.fixtures.factories import CompanyBranchFactory, QRCodeFactory
+
+
+def session_factory_for(session: AsyncSession):
+    @asynccontextmanager
+    async def factory():
+        yield session
+
+    return factory
+
+
+async def load_table(session: AsyncSession) -> RedirectTable:
+    table = RedirectTable(enabled=False, poll_interval=60, reload_interval=600)
+    await table.start(session_factory_for(session))
+    await table.reload()
+    return table
+
+
+async def create_qr_code(session: AsyncSession, company_id: int):
+    branch = await CompanyBranchFactory.create(session=session, company_id=company_id)
+    return await QRCodeFactory.create(
+        session=session,
+        company_branch_id=branch.id,
+        url_hash=hashlib.sha256(str(branch.id).encode()).hexdigest(),
+    )
+
+
+@pytest.mark.asyncio
+async def test_reload_loads_every_code(test_session: AsyncSession, test_company):
+    first = await create_qr_code(test_session, test_company.id)
+    second = await create_qr_code(test_session, test_company.id)
+
+    table = await load_table(test_session)
+
+    assert len(table) == 2
+    assert table.get(first.url_hash).company_branch_id == first.company_branch_id
+    assert table.get(second.url_hash).subdomain == test_company.subdomain
+    assert table.get(hashlib.sha256(b"unknown").hexdigest()) is None
+    assert table.lag_seconds is not None
+
+
+@pytest.mark.asyncio
+async def test_sync_picks_up_new_codes_and_subdomain_changes(
+    test_session: AsyncSession,
+    test_company,
+):
+    first = await create_qr_code(test_session, test_company.id)
+    table = await load_table(test_session)
+
+    second = await create_qr_code(test_session, test_company.id)
+    test_company.subdomain = "renamed-restaurant"
+    await test_session.commit()
+
+    await table.sync()
+
+    assert table.full_reloads == 1
+    assert table.get(first.url_hash).subdomain == "renamed-restaurant"
+    assert table.get(second.url_hash).company_branch_id == second.company_branch_id
+
+
+@pytest.mark.asyncio
+async def test_sync_reloads_after_delete(test_session: AsyncSession, test_company):
+    first = await create_qr_code(test_session, test_company.id)
+    second = await create_qr_code(test_session, test_company.id)
+    table = await load_table(test_session)
+
+    await test_session.delete(second)
+    await test_session.commit()
+    await table.sync()
+
+    assert table.full_reloads == 2
+    assert table.get(first.url_hash) is not None
+    assert table.get(second.url_hash) is None
+
+
+@pytest.mark.asyncio
+async def test_service_resolves_from_table_without_query(
+    qr_code_service: QRCodeService,
+    test_session: AsyncSession,
+    test_company,
+):
+    qr_code = await create_qr_code(test_session, test_company.id)
+    table = await load_table(test_session)
+
+    with (
+        patch(
+            "src.redirect_serv.apps.qr_manager.services.qr_code_service"
+            ".redirect_table",
+            table,
+        ),
+        patch.object(qr_code_service.repository, "get_redirect_target") as lookup,
+    ):
+        target = await qr_code_service.get_redirect_target(qr_code.url_hash)
+
+    lookup.assert_not_called()
+    assert target.qr_code_id == qr_code.id
@@ -0,0 +1,106 @@
+import hashlib
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.redirect_serv.apps.qr_manager.services import (
+    QRCodeService,
+    ScanCountAggregator,
+)
+from tests.fixtures.factories import CompanyBranchFactory, QRCodeFactory
+
+
+def session_factory_for(session: AsyncSession):
+    @asynccontextmanager
+    async def factory():
+        yield session
+
+    return factory
+
+
+async def create_qr_code(session: AsyncSession, company_id: int, scan_count: int = 0):
+    branch = await CompanyBranchFactory.create(session=session, company_id=company_id)
+    return await QRCodeFactory.create(
+        session=session,
+        company_branch_id=branch.id,
+        url_hash=hashlib.sha256(str(branch.id).encode()).hexdigest(),
+        scan_count=scan_count,
+    )
+
+
+@pytest.mark.asyncio
+async def test_flush_applies_aggregated_counts(
+    test_session: AsyncSession,
+    test_company,
+):
+    first = await create_qr_code(test_session, test_company.id, scan_count=3)
+    second = await create_qr_code(test_session, test_company.id)
+
+    aggregator = ScanCountAggregator(
+        enabled=True, flush_interval=60, flush_threshold=1000
+    )
+    await aggregator.start(session_factory_for(test_session))
+
+    latest = datetime(2025, 1, 1, 12, 0, tzinfo=timezone.utc)
+    aggregator.add(first.id, latest)
+    aggregator.add(first.id, latest - timedelta(minutes=5))
+    aggregator.add(second.id, latest)
+
+    assert aggregator.queue_depth == 2
+    assert aggregator.pending_scans == 3
+
+    await aggregator.stop()
+
+    await test_session.refresh(first)
+    await test_session.refresh(second)
+    assert first.scan_count == 5
+    assert first.last_scanned.replace(tzinfo=timezone.utc) == latest
+    assert second.scan_count == 1
+    assert aggregator.queue_depth == 0
+    assert aggregator.stats()["flushed_scans"] == 3
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_keeps_pending_counts(test_session: AsyncSession):
+    @asynccontextmanager
+    async def broken_factory():
+        raise RuntimeError("database is down")
+        yield  # pragma: no cover
+
+    aggregator = ScanCountAggregator(
+        enabled=True, flush_interval=60, flush_threshold=1000
+    )
+    await aggregator.start(broken_factory)
+    aggregator.add(1)
+    aggregator.add(1)
+
+    await aggregator.stop()
+
+    assert aggregator.pending_scans == 2
+    assert aggregator.failed_flushes == 1
+
+
+@pytest.mark.asyncio
+async def test_write_behind_does_not_commit_on_redirect(
+    qr_code_service: QRCodeService,
+    test_session: AsyncSession,
+    test_company,
+):
+    qr_code = await create_qr_code(test_session, test_company.id)
+    aggregator = ScanCountAggregator(
+        enabled=True, flush_interval=60, flush_threshold=1000
+    )
+
+    with patch(
+        "src.redirect_serv.apps.qr_manager.services.qr_code_service"
+        ".scan_count_aggregator",
+        aggregator,
+    ):
+        await qr_code_service.get_redirect_target_and_increment_scan(qr_code.url_hash)
+
+    await test_session.refresh(qr_code)
+    assert qr_code.scan_count == 0
+    assert aggregator.pending_scans == 1
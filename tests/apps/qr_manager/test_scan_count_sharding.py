@@ -0,0 +1,131 @@
+import hashlib
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+import httpx
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.redirect_serv.apps.qr_manager.cache import redirect_cache
+from src.redirect_serv.apps.qr_manager.models import QRCode, ScanCountShard
+from src.redirect_serv.apps.qr_manager.repositories import ScanCountShardRepository
+from src.redirect_serv.apps.qr_manager.services import ScanCountSharding
+from tests.fixtures.factories import CompanyBranchFactory, QRCodeFactory
+
+SERVICE = "src.redirect_serv.apps.qr_manager.services.qr_code_service"
+HOT = hashlib.sha256(b"hot").hexdigest()
+COLD = hashlib.sha256(b"cold").hexdigest()
+
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_sharding(timer=None, **kwargs) -> ScanCountSharding:
+    options = dict(
+        enabled=True, shards=4, hot_threshold=3, hot_ttl=10, compact_interval=60
+    )
+    options.update(kwargs)
+    return ScanCountSharding(timer=timer or FakeTimer(), **options)
+
+
+def test_code_turns_hot_within_a_window_and_cools_down():
+    timer = FakeTimer()
+    sharding = make_sharding(timer)
+
+    assert [sharding.is_hot(HOT) for _ in range(4)] == [False, False, True, True]
+    assert not sharding.is_hot(COLD)
+
+    # Stays hot in the next window until the TTL runs out
+    timer.now += 1
+    assert sharding.is_hot(HOT)
+    timer.now += 10
+    assert not sharding.is_hot(HOT)
+
+
+def test_disabled_sharding_never_reports_hot():
+    sharding = make_sharding(enabled=False)
+    assert not any(sharding.is_hot(HOT) for _ in range(10))
+
+
+@pytest.mark.asyncio
+async def test_shards_add_to_reads_and_compact_into_scan_count(
+    test_session: AsyncSession, test_company
+):
+    branch = await CompanyBranchFactory.create(
+        session=test_session, company_id=test_company.id
+    )
+    qr_code = await QRCodeFactory.create(
+        session=test_session,
+        company_branch_id=branch.id,
+        url_hash=hashlib.sha256(b"viral").hexdigest(),
+        scan_count=5,
+    )
+    qr_code_id = qr_code.id
+
+    @asynccontextmanager
+    async def factory():
+        yield test_session
+
+    sharding = make_sharding()
+    scanned_at = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    for _ in range(10):
+        await sharding.increment(test_session, qr_code_id, scanned_at)
+
+    repository = ScanCountShardRepository(test_session)
+    assert await repository.get_scan_counts([qr_code_id]) == {qr_code_id: 15}
+    shard_rows = (await test_session.scalars(select(ScanCountShard))).all()
+    assert 1 <= len(shard_rows) <= 4
+
+    await sharding.start(factory)
+    assert await sharding.compact() == 10
+
+    test_session.expire_all()
+    qr_code = await test_session.get(QRCode, qr_code_id)
+    assert qr_code.scan_count == 15
+    assert qr_code.last_scanned is not None
+    assert (await test_session.scalars(select(ScanCountShard))).all() == []
+    assert await repository.get_scan_counts([qr_code_id]) == {qr_code_id: 15}
+    assert sharding.stats()["compacted_scans"] == 10
+    await sharding.stop()
+
+
+@pytest.mark.asyncio
+async def test_hot_cache_misses_go_to_shards_and_reads_include_them(
+    client: httpx.AsyncClient, test_session: AsyncSession, test_company
+):
+    branch = await CompanyBranchFactory.create(
+        session=test_session, company_id=test_company.id
+    )
+    url_hash = hashlib.sha256(b"hot-miss").hexdigest()
+    qr_code = await QRCodeFactory.create(
+        session=test_session, company_branch_id=branch.id, url_hash=url_hash
+    )
+    qr_code_id, branch_id = qr_code.id, branch.id
+    sharding = make_sharding(hot_threshold=2)
+
+    with patch(f"{SERVICE}.scan_count_sharding", sharding):
+        for _ in range(5):
+            # Every scan misses the in-memory caches
+            redirect_cache.clear()
+            response = await client.get(f"/redirect/{url_hash}", follow_redirects=False)
+            assert response.status_code == 302
+
+    # The first scan updated the row, the others went to shards
+    test_session.expire_all()
+    assert (await test_session.get(QRCode, qr_code_id)).scan_count == 1
+    assert sharding.sharded_scans == 4
+
+    response = await client.get(f"/stats/branches/{branch_id}/scan-count")
+    assert response.status_code == 200
+    assert response.json() == {
+        "qr_code_id": qr_code_id,
+        "company_branch_id": branch_id,
+        "scans": 5,
+    }
@@ -0,0 +1,131 @@
+import hashlib
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.redirect_serv.apps.qr_manager.models import ScanEvent
+from src.redirect_serv.apps.qr_manager.schemas import RedirectTarget
+from src.redirect_serv.apps.qr_manager.services import (
+    QRCodeService,
+    ScanEventRecorder,
+)
+from src.redirect_serv.apps.qr_manager.services.scan_event_recorder import (
+    fingerprint,
+)
+from tests.fixtures.factories import CompanyBranchFactory, QRCodeFactory
+
+TARGET = RedirectTarget(qr_code_id=1, company_branch_id=2, subdomain="demo")
+
+
+def session_factory_for(session: AsyncSession):
+    @asynccontextmanager
+    async def factory():
+        yield session
+
+    return factory
+
+
+def make_recorder(**overrides) -> ScanEventRecorder:
+    options = dict(enabled=True, queue_size=100, batch_size=10, flush_interval=60)
+    options.update(overrides)
+    return ScanEventRecorder(**options)
+
+
+def test_fingerprint_is_stable_signed_64_bit():
+    value = fingerprint("Mozilla/5.0")
+
+    assert value == fingerprint("Mozilla/5.0")
+    assert value != fingerprint("curl/8.0")
+    assert -(2**63) <= value < 2**63
+    assert fingerprint(None) is None
+    assert fingerprint("") is None
+
+
+@pytest.mark.parametrize(
+    "policy, expected_ids", [("drop_newest", [0, 1]), ("drop_oldest", [1, 2])]
+)
+def test_overflow_policy(policy, expected_ids):
+    recorder = make_recorder(queue_size=2, overflow_policy=policy)
+
+    for qr_code_id in range(3):
+        recorder.record(RedirectTarget(qr_code_id, 2, "demo"))
+
+    assert [event.qr_code_id for event in recorder._queue] == expected_ids
+    assert recorder.stats()["dropped"] == 1
+
+
+def test_unknown_overflow_policy_is_rejected():
+    with pytest.raises(ValueError):
+        make_recorder(overflow_policy="block")
+
+
+@pytest.mark.asyncio
+async def test_stop_writes_queued_events(test_session: AsyncSession):
+    recorder = make_recorder(batch_size=2)
+    await recorder.start(session_factory_for(test_session))
+
+    scanned_at = datetime(2025, 1, 1, 12, 0, tzinfo=timezone.utc)
+    for _ in range(5):
+        recorder.record(TARGET, "Mozilla/5.0", None, scanned_at)
+    await recorder.stop()
+
+    events = (await test_session.scalars(select(ScanEvent))).all()
+    assert len(events) == 5
+    assert {event.qr_code_id for event in events} == {1}
+    assert {event.company_branch_id for event in events} == {2}
+    assert {event.user_agent_fingerprint for event in events} == {
+        fingerprint("Mozilla/5.0")
+    }
+    assert {event.referrer_fingerprint for event in events} == {None}
+    assert recorder.stats()["written"] == 5
+    assert recorder.queue_depth == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_is_requeued():
+    @asynccontextmanager
+    async def broken_factory():
+        raise RuntimeError("database is down")
+        yield
+
+    recorder = make_recorder()
+    await recorder.start(broken_factory)
+    recorder.record(TARGET)
+    recorder.record(TARGET)
+
+    assert await recorder.drain() == 0
+    assert recorder.queue_depth == 2
+    assert recorder.stats()["failed_batches"] == 1
+
+
+@pytest.mark.asyncio
+async def test_redirect_records_scan_event(test_session: AsyncSession, test_company):
+    branch = await CompanyBranchFactory.create(
+        session=test_session, company_id=test_company.id
+    )
+    url_hash = hashlib.sha256(b"scan-event").hexdigest()
+    qr_code = await QRCodeFactory.create(
+        session=test_session, company_branch_id=branch.id, url_hash=url_hash
+    )
+
+    recorder = make_recorder()
+    with patch(
+        "src.redirect_serv.apps.qr_manager.services.qr_code_service."
+        "scan_event_recorder",
+        recorder,
+    ):
+        await QRCodeService(test_session).get_redirect_target_and_increment_scan(
+            url_hash, user_agent="Mozilla/5.0", referrer="https://example.com/"
+        )
+
+    await recorder.start(session_factory_for(test_session))
+    await recorder.stop()
+
+    event = (await test_session.scalars(select(ScanEvent))).one()
+    assert event.qr_code_id == qr_code.id
+    assert event.company_branch_id == branch.id
+    assert event.referrer_fingerprint == fingerprint("https://example.com/")
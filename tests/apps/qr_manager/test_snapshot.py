@@ -0,0 +1,108 @@
+import hashlib
+import os
+import time
+
+import pytest
+
+from src.redirect_serv.apps.qr_manager.schemas import RedirectTarget
+from src.redirect_serv.apps.qr_manager.snapshot import (
+    RedirectSnapshot,
+    RedirectSnapshotWatcher,
+    SnapshotError,
+    write_snapshot,
+)
+
+
+def sha(value: int) -> str:
+    return hashlib.sha256(str(value).encode()).hexdigest()
+
+
+def rows(count: int):
+    return [(sha(i), i, 100 + i, f"company-{i % 3}") for i in range(count)]
+
+
+def test_snapshot_round_trip(tmp_path):
+    path = str(tmp_path / "snapshot.bin")
+
+    assert write_snapshot(path, rows(50), created_at=1700000000) == 50
+
+    snapshot = RedirectSnapshot(path)
+    try:
+        assert snapshot.count == 50
+        assert snapshot.created_at == 1700000000
+        for i in range(50):
+            assert snapshot.get(sha(i)) == RedirectTarget(
+                qr_code_id=i, company_branch_id=100 + i, subdomain=f"company-{i % 3}"
+            )
+        assert snapshot.get(sha(50)) is None
+        assert snapshot.get("not-hex") is None
+    finally:
+        snapshot.close()
+
+
+def test_corrupted_snapshot_is_rejected(tmp_path):
+    path = str(tmp_path / "snapshot.bin")
+    write_snapshot(path, rows(5), created_at=0)
+
+    with open(path, "r+b") as file:
+        file.seek(-1, os.SEEK_END)
+        file.write(b"\xff")
+
+    with pytest.raises(SnapshotError):
+        RedirectSnapshot(path)
+
+
+def test_watcher_swaps_in_new_snapshot(tmp_path):
+    path = str(tmp_path / "snapshot.bin")
+    write_snapshot(path, rows(1), created_at=0)
+    watcher = RedirectSnapshotWatcher(path=path, check_interval=60)
+
+    assert watcher.reload_if_changed()
+    assert not watcher.reload_if_changed()
+    assert watcher.get(sha(1)) is None
+
+    write_snapshot(path, rows(2), created_at=1)
+
+    assert watcher.reload_if_changed()
+    assert watcher.get(sha(1)).company_branch_id == 101
+    assert watcher.stats()["reloads"] == 2
+
+
+def test_watcher_keeps_previous_snapshot_on_bad_file(tmp_path):
+    path = str(tmp_path / "snapshot.bin")
+    write_snapshot(path, rows(1), created_at=0)
+    watcher = RedirectSnapshotWatcher(path=path, check_interval=60)
+    watcher.reload_if_changed()
+
+    bad_path = str(tmp_path / "bad.bin")
+    with open(bad_path, "wb") as file:
+        file.write(b"garbage")
+    os.replace(bad_path, path)
+
+    assert not watcher.reload_if_changed()
+    assert watcher.get(sha(0)) is not None
+    assert watcher.failed_reloads == 1
+
+
+def test_masked_entries_are_hidden_until_a_newer_snapshot(tmp_path):
+    path = str(tmp_path / "snapshot.bin")
+    write_snapshot(path, rows(3), created_at=0)
+    watcher = RedirectSnapshotWatcher(path=path, check_interval=60)
+    watcher.reload_if_changed()
+
+    watcher.mask_url_hash(sha(0))
+    watcher.mask_company_branch(101)
+    watcher.mask_subdomain("company-2")
+
+    assert [watcher.get(sha(i)) for i in range(3)] == [None, None, None]
+    assert watcher.stats()["masked"] == 3
+
+    # A snapshot built before the changes keeps them masked
+    write_snapshot(path, rows(3), created_at=1)
+    watcher.reload_if_changed()
+    assert watcher.get(sha(0)) is None
+
+    write_snapshot(path, rows(3), created_at=int(time.time()) + 120)
+    watcher.reload_if_changed()
+    assert all(watcher.get(sha(i)) is not None for i in range(3))
+    assert watcher.stats()["masked_entries"] == 0
@@ -1,27 +1,43 @@
 from typing import AsyncGenerator
 
 import httpx
+import pytest
 import pytest_asyncio
 from fastapi import FastAPI
-from sqlalchemy import JSON, DateTime, Table
-from sqlalchemy.dialects.postgresql import JSONB, TIMESTAMP
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.pool import StaticPool
 
 from src.redirect_serv.apps.company.models import Company, CompanyBranch
-from src.redirect_serv.apps.qr_manager.models import QRCode
+from src.redirect_serv.apps.qr_manager.cache import (
+    last_known_targets,
+    negative_cache,
+    redirect_cache,
+)
+from src.redirect_serv.apps.qr_manager.models import (
+    AccessLogOffset,
+    CompanyScanDailyRollup,
+    QRCode,
+    ScanCountShard,
+    ScanDailyRollup,
+    ScanEvent,
+    ScanHourlyRollup,
+    VisitorDailySketch,
+)
 from src.redirect_serv.core.app import create_app
 from src.redirect_serv.core.dependencies.database import get_session
 from tests.fixtures.factories import CompanyFactory
+from tests.fixtures.sqlite import adapt_table_for_sqlite
 
 
-def adapt_table_for_sqlite(table: Table) -> None:
-    """Adapt PostgreSQL-specific types to SQLite-compatible types"""
-    for column in table.columns:
-        if isinstance(column.type, JSONB):
-            column.type = JSON()
-        elif isinstance(column.type, TIMESTAMP):
-            column.type = DateTime()
+@pytest.fixture(autouse=True)
+def clear_redirect_caches():
+    redirect_cache.clear()
+    negative_cache.clear()
+    last_known_targets.clear()
+    yield
+    redirect_cache.clear()
+    negative_cache.clear()
+    last_known_targets.clear()
 
 
 @pytest_asyncio.fixture(scope="function")
@@ -36,6 +52,13 @@ async def test_session() -> AsyncGenerator[AsyncSession, None]:
         Company.__table__,
         CompanyBranch.__table__,
         QRCode.__table__,
+        ScanCountShard.__table__,
+        ScanEvent.__table__,
+        ScanHourlyRollup.__table__,
+        ScanDailyRollup.__table__,
+        CompanyScanDailyRollup.__table__,
+        VisitorDailySketch.__table__,
+        AccessLogOffset.__table__,
     ]
 
     async with engine.begin() as conn:
@@ -0,0 +1,76 @@
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.redirect_serv.apps.company.models import Company
+from src.redirect_serv.core.repositories import BaseRepository
+from tests.fixtures.factories import CompanyFactory
+
+
+class CompanyRepository(BaseRepository[Company]):
+    def __init__(self, session: AsyncSession):
+        super().__init__(Company, session)
+
+
+async def create_companies(session: AsyncSession, names):
+    for i, name in enumerate(names):
+        await CompanyFactory.create(session=session, name=name, subdomain=f"c{i}")
+
+
+@pytest.mark.asyncio
+async def test_get_page_walks_by_id(test_session: AsyncSession):
+    await create_companies(test_session, [f"Company {i}" for i in range(5)])
+    repository = CompanyRepository(test_session)
+
+    seen = []
+    after = None
+    while page := await repository.get_page(limit=2, after=after):
+        seen.extend(company.id for company in page)
+        after = repository.page_cursor(page[-1])
+
+    assert seen == sorted(seen)
+    assert len(seen) == 5
+
+
+@pytest.mark.asyncio
+async def test_get_page_on_duplicate_column_values(test_session: AsyncSession):
+    await create_companies(test_session, ["b", "a", "b", "a", "b"])
+    repository = CompanyRepository(test_session)
+
+    seen = []
+    after = None
+    while page := await repository.get_page(
+        limit=2, after=after, order_by="name", descending=True
+    ):
+        seen.extend((company.name, company.id) for company in page)
+        after = repository.page_cursor(page[-1], "name")
+
+    assert seen == sorted(seen, reverse=True)
+    assert len(set(seen)) == 5
+
+
+@pytest.mark.asyncio
+async def test_stream_yields_every_row(test_session: AsyncSession):
+    await create_companies(test_session, [f"Company {i}" for i in range(7)])
+    repository = CompanyRepository(test_session)
+
+    names = [company.name async for company in repository.stream(chunk_size=3)]
+
+    assert names == [f"Company {i}" for i in range(7)]
+
+
+@pytest.mark.asyncio
+async def test_count_runs_in_sql(test_session: AsyncSession):
+    await create_companies(test_session, ["a", "b", "a"])
+    repository = CompanyRepository(test_session)
+    statements = []
+    event.listen(
+        test_session.bind.sync_engine,
+        "before_cursor_execute",
+        lambda *args: statements.append(args[2]),
+    )
+
+    assert await repository.count() == 3
+    assert await repository.count(filters={"name": "a"}) == 2
+    assert await repository.approximate_count() == 3
+    assert all("count(*)" in statement for statement in statements)
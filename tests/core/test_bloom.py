@@ -0,0 +1,24 @@
+import hashlib
+
+from src.redirect_serv.core.bloom import BloomFilter
+
+
+def sha(value: int) -> str:
+    return hashlib.sha256(str(value).encode()).hexdigest()
+
+
+def test_added_items_are_always_found():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    bloom.update(sha(i) for i in range(1000))
+
+    assert all(sha(i) in bloom for i in range(1000))
+    assert bloom.count == 1000
+
+
+def test_false_positive_rate_stays_near_target():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    bloom.update(sha(i) for i in range(1000))
+
+    false_positives = sum(sha(i) in bloom for i in range(1000, 11000))
+
+    assert false_positives < 300
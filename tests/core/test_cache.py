@@ -0,0 +1,64 @@
+from src.redirect_serv.core.cache import TTLCache
+
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_get_returns_stored_value():
+    cache: TTLCache[str, int] = TTLCache(maxsize=2, ttl=10)
+
+    cache.set("a", 1)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.hits == 1
+    assert cache.misses == 1
+
+
+def test_entries_expire_after_ttl():
+    timer = FakeTimer()
+    cache: TTLCache[str, int] = TTLCache(maxsize=2, ttl=10, timer=timer)
+
+    cache.set("a", 1)
+    timer.now = 9.9
+    assert cache.get("a") == 1
+
+    timer.now = 10.0
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache: TTLCache[str, int] = TTLCache(maxsize=2, ttl=10)
+
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+def test_zero_size_disables_cache():
+    cache: TTLCache[str, int] = TTLCache(maxsize=0, ttl=10)
+
+    cache.set("a", 1)
+
+    assert cache.get("a") is None
+
+
+def test_discard_where_drops_matching_values():
+    cache: TTLCache[str, int] = TTLCache(maxsize=10, ttl=10)
+    for key, value in (("a", 1), ("b", 2), ("c", 1)):
+        cache.set(key, value)
+
+    assert cache.discard_where(lambda value: value == 1) == 2
+    assert cache.get("b") == 2
+    assert len(cache) == 1
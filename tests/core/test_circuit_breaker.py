@@ -0,0 +1,46 @@
+from src.redirect_serv.core.circuit_breaker import CircuitBreaker
+
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_opens_after_consecutive_failures():
+    breaker = CircuitBreaker("db", failure_threshold=3, reset_timeout=10)
+
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.closed
+
+    breaker.record_failure()
+    assert not breaker.closed
+    assert not breaker.allow()
+    assert breaker.stats()["rejected"] == 1
+
+
+def test_half_open_lets_one_trial_through():
+    timer = FakeTimer()
+    breaker = CircuitBreaker("db", failure_threshold=1, reset_timeout=10, timer=timer)
+    breaker.record_failure()
+
+    timer.now = 10
+    assert breaker.allow()
+    assert not breaker.allow()
+
+    # A failed trial opens the circuit for another reset_timeout
+    breaker.record_failure()
+    timer.now = 19
+    assert not breaker.allow()
+
+    timer.now = 20
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.closed and breaker.allow()
+    assert breaker.stats()["opens"] == 2
@@ -0,0 +1,90 @@
+import hashlib
+
+import pytest
+
+from src.redirect_serv.core.hyperloglog import HyperLogLog
+
+
+def h(value: int) -> int:
+    digest = hashlib.blake2b(str(value).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+def sketch_of(values, precision: int = 12) -> HyperLogLog:
+    sketch = HyperLogLog(precision)
+    for value in values:
+        sketch.add(h(value))
+    return sketch
+
+
+@pytest.mark.parametrize("distinct", [10, 1000, 50000])
+def test_count_stays_near_the_distinct_number(distinct):
+    sketch = sketch_of(range(distinct))
+
+    assert abs(sketch.count() - distinct) <= max(1, distinct * 0.05)
+
+
+def test_repeated_items_do_not_count_again():
+    sketch = sketch_of(range(500))
+    registers = sketch.to_bytes()
+
+    assert not any(sketch.add(h(value)) for value in range(500))
+    assert sketch.to_bytes() == registers
+
+
+def test_merge_is_a_union_and_idempotent():
+    first = sketch_of(range(0, 6000))
+    second = sketch_of(range(4000, 10000))
+
+    first.merge(second)
+    union = first.count()
+    first.merge(second)
+
+    assert first.count() == union
+    assert abs(union - 10000) <= 500
+    assert first.to_bytes() == sketch_of(range(10000)).to_bytes()
+
+
+def test_round_trips_through_bytes():
+    sketch = sketch_of(range(100), precision=10)
+    registers = sketch.to_bytes()
+
+    assert len(registers) == 1024
+    assert HyperLogLog.from_bytes(registers).count() == sketch.count()
+    with pytest.raises(ValueError):
+        HyperLogLog.from_bytes(registers[:1000])
+
+
+def test_merging_precisions_folds_to_the_lower_one():
+    fine = sketch_of(range(3000), precision=12)
+    coarse = sketch_of(range(2000, 5000), precision=10)
+
+    assert fine.fold(10).to_bytes() == sketch_of(range(3000), precision=10).to_bytes()
+    fine.merge(coarse)
+    assert fine.precision == 10
+    assert fine.to_bytes() == sketch_of(range(5000), precision=10).to_bytes()
+
+
+def test_sparse_sketches_match_dense_ones():
+    sparse = sketch_of(range(20))
+    dense = HyperLogLog.from_bytes(sparse.to_bytes())
+
+    assert sparse.is_sparse and not dense.is_sparse
+    assert sparse.count() == dense.count()
+    assert sparse.fold(10).to_bytes() == dense.fold(10).to_bytes()
+
+    other = sketch_of(range(10, 40))
+    dense.merge(other)
+    sparse.merge(other)
+    assert sparse.to_bytes() == dense.to_bytes()
+    assert sparse.count() == dense.count()
+
+
+def test_sparse_sketch_turns_dense_once_larger():
+    sketch = sketch_of(range(40))
+    assert sketch.is_sparse
+
+    sketch.merge(sketch_of(range(40, 2000)))
+
+    assert not sketch.is_sparse
+    assert sketch.to_bytes() == sketch_of(range(2000)).to_bytes()
@@ -0,0 +1,31 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.redirect_serv.core.pool import InstrumentedQueuePool, pool_status
+
+
+@pytest.mark.asyncio
+async def test_pool_status_reports_checkouts():
+    engine = create_async_engine(
+        "sqlite+aiosqlite:///:memory:",
+        poolclass=InstrumentedQueuePool,
+        pool_size=2,
+        max_overflow=0,
+    )
+
+    try:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            status = pool_status(engine)
+            assert status["checked_out"] == 1
+            assert status["size"] == 2
+
+        status = pool_status(engine)
+    finally:
+        await engine.dispose()
+
+    assert status["pool_class"] == "InstrumentedQueuePool"
+    assert status["checked_out"] == 0
+    assert status["checkouts"] == 1
+    assert status["timeouts"] == 0
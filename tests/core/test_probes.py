@@ -0,0 +1,53 @@
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.redirect_serv.core.probes import DatabaseProbe
+
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.mark.asyncio
+async def test_probe_result_is_reused_within_ttl():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    executed = []
+    event.listen(
+        engine.sync_engine,
+        "before_cursor_execute",
+        lambda *args: executed.append(args[2]),
+    )
+    timer = FakeTimer()
+    probe = DatabaseProbe(engine, ttl=5, timer=timer)
+
+    try:
+        assert (await probe.check()).ok
+        timer.now = 4.9
+        assert (await probe.check()).ok
+        assert len(executed) == 1
+
+        timer.now = 5.0
+        assert (await probe.check()).ok
+        assert len(executed) == 2
+    finally:
+        await engine.dispose()
+
+
+class UnreachableEngine:
+    def connect(self):
+        raise ConnectionRefusedError("connection refused")
+
+
+@pytest.mark.asyncio
+async def test_probe_reports_failure():
+    probe = DatabaseProbe(UnreachableEngine(), ttl=5)  # type: ignore[arg-type]
+
+    result = await probe.check()
+
+    assert not result.ok
+    assert result.error.startswith("Database check failed")
@@ -0,0 +1,76 @@
+import cProfile
+import pstats
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from src.redirect_serv.core.profiling import ProfileStore, ProfilingMiddleware
+
+
+def build_app(store: ProfileStore, **options) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: int):
+        return {"id": item_id}
+
+    app.add_middleware(ProfilingMiddleware, store=store, **options)
+    return app
+
+
+async def get(app: FastAPI, path: str, **kwargs) -> httpx.Response:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+        return await ac.get(path, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_request_with_token_is_profiled(tmp_path):
+    store = ProfileStore(str(tmp_path), max_files=10, max_bytes=10**7)
+    app = build_app(store, token="secret")
+
+    response = await get(app, "/items/7", headers={"X-Profile": "secret"})
+    assert response.status_code == 200
+
+    (info,) = store.list()
+    assert info.route == "/items/{item_id}"
+    assert info.method == "GET"
+    assert info.status == 200
+    assert info.duration_ms > 0
+    stats = pstats.Stats(store.find(info.name))
+    assert stats.total_calls > 0
+
+
+@pytest.mark.asyncio
+async def test_requests_without_valid_token_are_not_profiled(tmp_path):
+    store = ProfileStore(str(tmp_path), max_files=10, max_bytes=10**7)
+    app = build_app(store, token="secret")
+
+    await get(app, "/items/7")
+    await get(app, "/items/7", headers={"X-Profile": "wrong"})
+
+    assert store.list() == []
+
+
+@pytest.mark.asyncio
+async def test_sampling_profiles_without_header(tmp_path):
+    store = ProfileStore(str(tmp_path), max_files=10, max_bytes=10**7)
+    app = build_app(store, sample_rate=1.0)
+
+    await get(app, "/items/1")
+
+    assert len(store.list()) == 1
+
+
+def test_store_keeps_newest_profiles_within_caps(tmp_path):
+    store = ProfileStore(str(tmp_path), max_files=2, max_bytes=10**7)
+
+    names = []
+    for route in ("/a", "/b", "/c"):
+        profile = cProfile.Profile()
+        names.append(store.save(profile, "GET", route, 200, 0.01).name)
+
+    assert [info.name for info in store.list()] == names[:0:-1]
+    assert store.find(names[0]) is None
+    assert store.find("../etc/passwd") is None
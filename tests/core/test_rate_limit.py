@@ -0,0 +1,111 @@
+import httpx
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.redirect_serv.core.app import create_app
+from src.redirect_serv.core.dependencies.database import get_session
+from src.redirect_serv.core.rate_limit import (
+    RateLimiter,
+    RateLimitMiddleware,
+    client_key,
+)
+
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_limiter(timer: FakeTimer, **kwargs) -> RateLimiter:
+    options = dict(rate=2, burst=2, max_clients=100, shards=1, sweep_interval=10)
+    options.update(kwargs)
+    return RateLimiter(timer=timer, **options)
+
+
+def test_bucket_refills_at_rate():
+    timer = FakeTimer()
+    limiter = make_limiter(timer)
+
+    assert limiter.acquire("a") == 0
+    assert limiter.acquire("a") == 0
+    assert limiter.acquire("a") == pytest.approx(0.5)
+    assert limiter.acquire("b") == 0
+
+    timer.now = 0.5
+    assert limiter.acquire("a") == 0
+    assert limiter.stats()["throttled"] == 1
+
+
+def test_idle_and_excess_clients_are_evicted():
+    timer = FakeTimer()
+    limiter = make_limiter(timer, max_clients=2)
+    for key in "abc":
+        limiter.acquire(key)
+    assert len(limiter) == 2
+
+    # Full again after burst / rate seconds, so "c" is kept
+    timer.now = 0.9
+    limiter.acquire("c")
+    timer.now = 1.5
+    assert limiter.sweep() == 1
+    assert len(limiter) == 1
+    assert limiter.stats()["evicted"] == 2
+
+
+@pytest.mark.asyncio
+async def test_throttled_requests_never_open_a_session(test_session: AsyncSession):
+    sessions = 0
+
+    async def counting_session():
+        nonlocal sessions
+        sessions += 1
+        yield test_session
+
+    app = create_app()
+    app.dependency_overrides[get_session] = counting_session
+    app.add_middleware(
+        RateLimitMiddleware,
+        limiter=make_limiter(FakeTimer(), rate=1, burst=1),
+        path_prefixes=["/redirect/"],
+        key="forwarded",
+        trusted_proxies=1,
+    )
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+        url = f"/redirect/{'ab' * 32}"
+        first = await ac.get(url, headers={"X-Forwarded-For": "10.0.0.1"})
+        # Entries left of the one added by the trusted proxy are ignored
+        forged = await ac.get(url, headers={"X-Forwarded-For": "1.1.1.1, 10.0.0.1"})
+        other = await ac.get(url, headers={"X-Forwarded-For": "10.0.0.2"})
+        health = await ac.get("/health/live")
+
+    assert first.status_code == 404
+    assert forged.status_code == 429
+    assert forged.headers["retry-after"] == "1"
+    assert other.status_code == 404
+    assert health.status_code == 200
+    assert sessions == 2
+
+
+def forwarded_scope(*values: bytes):
+    return {
+        "headers": [(b"x-forwarded-for", value) for value in values],
+        "client": ("192.0.2.1", 50000),
+    }
+
+
+def test_client_key_reads_forwarded_hops_safely():
+    scope = forwarded_scope(b"1.1.1.1, 10.0.0.1", b"10.0.0.2")
+
+    # Repeated headers are one list; more trusted proxies than hops is clamped
+    assert client_key(scope, "forwarded", 1) == "10.0.0.2"
+    assert client_key(scope, "forwarded", 2) == "10.0.0.1"
+    assert client_key(scope, "forwarded", 10) == "1.1.1.1"
+    assert client_key(scope, "forwarded", 0) == "10.0.0.2"
+    assert client_key(forwarded_scope(b"10.0.0.1, ,"), "forwarded", 1) == "10.0.0.1"
+    assert client_key(forwarded_scope(b" , "), "forwarded", 1) == "192.0.2.1"
+    assert client_key(scope, "client", 1) == "192.0.2.1"
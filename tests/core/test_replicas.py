@@ -0,0 +1,78 @@
+import hashlib
+
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from src.redirect_serv.apps.company.models import Company, CompanyBranch
+from src.redirect_serv.apps.qr_manager.models import QRCode
+from src.redirect_serv.apps.qr_manager.repositories import (
+    QRCodeRepository,
+)
+from src.redirect_serv.apps.qr_manager.repositories import (
+    qr_code_repository as qr_code_repository_module,
+)
+from src.redirect_serv.core.replicas import ReplicaRouter
+from tests.fixtures.factories import CompanyBranchFactory, QRCodeFactory
+
+
+@pytest_asyncio.fixture
+async def router():
+    # An empty database standing in for a replica that has not caught up yet
+    engine = create_async_engine(
+        "sqlite+aiosqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    async with engine.begin() as conn:
+        for table in (Company.__table__, CompanyBranch.__table__, QRCode.__table__):
+            await conn.run_sync(table.create)
+    router = ReplicaRouter([engine], max_lag=5, check_interval=60, check_timeout=1)
+    yield router
+    await router.stop()
+
+
+def test_round_robin_over_healthy_replicas():
+    engines = [object(), object(), object()]
+    router = ReplicaRouter(engines, max_lag=5, check_interval=60, check_timeout=1)
+    assert router.choose() is None
+
+    router.replicas[0].healthy = router.replicas[2].healthy = True
+    chosen = [router.choose().name for _ in range(4)]
+    assert chosen == ["replica0", "replica2", "replica0", "replica2"]
+
+    router.pin("fresh")
+    assert router.choose("fresh") is None
+    assert router.choose("other") is not None
+
+
+@pytest.mark.asyncio
+async def test_failed_check_takes_replica_out(router: ReplicaRouter):
+    router.replicas[0].healthy = True
+    # SQLite has no replication functions, so the lag query fails
+    await router.check()
+    assert not router.replicas[0].healthy
+    assert router.replicas[0].error
+    assert router.stats()["failed_checks"] == 1
+
+
+@pytest.mark.asyncio
+async def test_replica_miss_falls_back_to_primary(
+    router: ReplicaRouter, test_session: AsyncSession, test_company, monkeypatch
+):
+    monkeypatch.setattr(qr_code_repository_module, "replica_router", router)
+    router.replicas[0].healthy = True
+    branch = await CompanyBranchFactory.create(
+        session=test_session, company_id=test_company.id
+    )
+    url_hash = hashlib.sha256(b"replica").hexdigest()
+    await QRCodeFactory.create(
+        session=test_session, company_branch_id=branch.id, url_hash=url_hash
+    )
+
+    target = await QRCodeRepository(test_session).get_redirect_target(url_hash)
+
+    assert target is not None and target.company_branch_id == branch.id
+    assert router.replica_reads == 1
+    assert router.primary_fallbacks == 1
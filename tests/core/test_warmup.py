@@ -0,0 +1,21 @@
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from src.redirect_serv.core.warmup import warm_up, warm_up_or_log
+
+
+@pytest.mark.asyncio
+async def test_warm_up_runs_the_redirect_lookup(test_session: AsyncSession):
+    result = await warm_up(test_session.bind, connections=2)
+
+    assert result["connections"] == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_warm_up_does_not_stop_the_worker(tmp_path):
+    # No tables: the lookup fails
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/empty.db")
+
+    assert not await warm_up_or_log(engine, connections=1, timeout=5)
+    assert not await warm_up_or_log(engine, connections=0, timeout=5)
+    await engine.dispose()
@@ -0,0 +1,15 @@
+from sqlalchemy import JSON, DateTime, Table
+from sqlalchemy.dialects.postgresql import JSONB, TIMESTAMP
+
+
+def adapt_table_for_sqlite(table: Table) -> None:
+    """Adapt PostgreSQL-specific types to SQLite-compatible types.
+
+    Changes the shared Table in place, so only import this into processes
+    that run against SQLite: the test suite and the benchmarks.
+    """
+    for column in table.columns:
+        if isinstance(column.type, JSONB):
+            column.type = JSON()
+        elif isinstance(column.type, TIMESTAMP):
+            column.type = DateTime()